@@ -1,10 +1,10 @@
 from __future__ import division
 from functools import partial
-from collections import defaultdict
 from math import sqrt
 from collections import namedtuple
 import logging
 import os
+import numpy as np
 
 from spuq.application.egsz.pcg import pcg
 from spuq.application.egsz.multi_operator import MultiOperator, PreconditioningOperator
@@ -80,7 +80,8 @@ def prepare_rhs(A, w, coeff_field, pde):
 def pcg_solve(A, w, coeff_field, pde, stats, pcg_eps, pcg_maxiter):
     b = prepare_rhs(A, w, coeff_field, pde)
     P = PreconditioningOperator(coeff_field.mean_func,
-                                pde.assemble_solve_operator)
+                                pde.assemble_solve_operator,
+                                assembly_cache=A.assembly_cache)
 
     w, zeta, numit = pcg(A, b, P, w0=w, eps=pcg_eps, maxiter=pcg_maxiter)
     logger.info("PCG finished with zeta=%f after %i iterations", zeta, numit)
@@ -119,6 +120,8 @@ def AdaptiveSolver(A, coeff_field, pde,
                     # projection error
                     projection_degree_increase=1,
                     refine_projection_mesh=1,
+                    # number of processes for the evaluation of the estimator (None for all cores)
+                    estimator_processes=1,
                     # pcg solver
                     pcg_eps=1e-6,
                     pcg_maxiter=100,
@@ -180,7 +183,7 @@ def AdaptiveSolver(A, coeff_field, pde,
         with timing(msg="ResidualEstimator.evaluateError", logfunc=logger.info, store_func=partial(_store_stats, key="TIME-ESTIMATOR", stats=stats)):
             xi, resind, projind, mierror, estparts, errors, timing_stats = ResidualEstimator.evaluateError(w, coeff_field, pde, f, zeta, gamma, ceta, cQ,
                                                                                     newmi_add_maxm, maxh, quadrature_degree, projection_degree_increase,
-                                                                                    refine_projection_mesh)
+                                                                                    refine_projection_mesh, estimator_processes)
         reserrmu = [(mu, sqrt(sum(resind[mu].coeffs ** 2))) for mu in resind.keys()]
         projerrmu = [(mu, sqrt(sum(projind[mu].coeffs ** 2))) for mu in projind.keys()]
         res_part, proj_part, pcg_part = estparts[0], estparts[1], estparts[2]
@@ -249,13 +252,13 @@ def AdaptiveSolver(A, coeff_field, pde,
                 if do_refinement["RES"]:
                     mesh_markers = mesh_markers_R.copy()
                 else:
-                    mesh_markers = defaultdict(set)
+                    mesh_markers = {}
                     logger.info("SKIP residual refinement")
     
                 if do_refinement["PROJ"]:
                     for mu, cells in mesh_markers_P.iteritems():
                         if len(cells) > 0:
-                            mesh_markers[mu] = mesh_markers[mu].union(cells)
+                            mesh_markers[mu] = np.union1d(mesh_markers.get(mu, cells), cells)
                 else:
                     logger.info("SKIP projection refinement")
     
@@ -272,7 +275,8 @@ def AdaptiveSolver(A, coeff_field, pde,
             
             # carry out refinement of meshes
             with timing(msg="Marking.refine", logfunc=logger.info, store_func=partial(_store_stats, key="TIME-MARKING", stats=stats)):
-                Marking.refine(w, mesh_markers, new_multiindices.keys(), partial(setup_vector, pde=pde, mesh=mesh0, degree=degree))
+                Marking.refine(w, mesh_markers, new_multiindices.keys(), partial(setup_vector, pde=pde, mesh=mesh0, degree=degree),
+                               A.assembly_cache)
     
     if refinement:
         logger.info("ENDED refinement loop after %i of %i refinements with %i dofs and %i active multiindices",
@@ -0,0 +1,155 @@
+"""Cache for the affine operator terms :math:`A_0` and :math:`A_m` of the EGSZ operator.
+
+The discrete operator only depends on the mesh, the finite element and the
+coefficient index :math:`m`, not on the multiindex :math:`\mu`. Hence the
+matrices can be assembled once per mesh and reused for all multiindices
+and all PCG iterations until the mesh is refined. The same holds for the
+joint meshes (and the bases defined on them) used by the JOINT_MU and
+JOINT_GLOBAL assembly types.
+
+Bases are identified by their ``fingerprint`` attribute (see
+:meth:`spuq.fem.fenics.fenics_basis.FEniCSBasis.fingerprint`). Bases
+without fingerprint are not cached and always reassembled.
+"""
+
+import logging
+logger = logging.getLogger(__name__)
+
+__all__ = ["AssemblyCache", "basis_fingerprint", "operator_nbytes"]
+
+# coefficient index used for the mean term A_0
+MEAN_INDEX = -1
+# index used for the (factorized) solve operator of the mean term
+SOLVE_INDEX = -2
+
+
+def basis_fingerprint(basis):
+    """Return hashable fingerprint of basis or None if it cannot be identified."""
+    return getattr(basis, "fingerprint", None)
+
+
+def mesh_nbytes(basis):
+    """Estimate memory used by the mesh of a basis (in bytes)."""
+    mesh = basis.mesh
+    return mesh.coordinates().nbytes + mesh.cells().nbytes
+
+
+def operator_nbytes(op):
+    """Estimate memory used by an assembled operator (in bytes)."""
+    if isinstance(getattr(op, "nbytes", None), (int, long)):
+        return op.nbytes
+    mat = getattr(op, "_matrix", None)
+    if mat is not None:
+        if hasattr(mat, "nnz") and callable(mat.nnz):
+            # dolfin matrix: values (double) plus column indices (int) and row pointers
+            return 12 * mat.nnz() + 4 * (mat.size(0) + 1)
+        if hasattr(mat, "data") and hasattr(mat, "indices"):
+            # scipy sparse matrix in compressed format
+            return mat.data.nbytes + mat.indices.nbytes + mat.indptr.nbytes
+    for attr in ("_arr", "_diag"):
+        arr = getattr(op, attr, None)
+        if arr is not None:
+            return arr.nbytes
+    return 0
+
+
+class AssemblyCache(object):
+    """Stores assembled operators keyed on (basis fingerprint, coefficient index)."""
+
+    def __init__(self):
+        self._ops = {}
+        self._nbytes = {}
+        self._deps = {}
+        self._joint = {}
+        self._joint_nbytes = {}
+        self.hits = 0
+        self.misses = 0
+        self.joint_hits = 0
+        self.joint_misses = 0
+
+    def assemble(self, assemble_func, basis, coeff, m=MEAN_INDEX, depends=None):
+        """Return operator for coefficient ``m`` on ``basis``, assembling it only if required.
+
+        ``depends`` optionally lists further bases (e.g. the meshes a joint mesh was
+        created from) whose invalidation also invalidates the assembled operator."""
+        fp = basis_fingerprint(basis)
+        if fp is None:
+            self.misses += 1
+            return assemble_func(basis, coeff)
+        key = (fp, m)
+        try:
+            op = self._ops[key]
+            self.hits += 1
+        except KeyError:
+            op = assemble_func(basis, coeff)
+            self._ops[key] = op
+            self._nbytes[key] = operator_nbytes(op)
+            deps = set([fp])
+            if depends is not None:
+                deps.update(basis_fingerprint(b) for b in depends)
+            self._deps[key] = deps
+            self.misses += 1
+        return op
+
+    def joint_basis(self, basis, bases):
+        """Return copy of ``basis`` on the joint mesh of ``bases``, creating it only if required.
+
+        The joint mesh is identified by the set of fingerprints of the participating bases."""
+        key = frozenset(basis_fingerprint(b) for b in bases)
+        try:
+            Vfine = self._joint[key]
+            self.joint_hits += 1
+        except KeyError:
+            from spuq.fem.fenics.fenics_utils import create_joint_mesh
+            mesh, _ = create_joint_mesh([b.mesh for b in bases])
+            Vfine = basis.copy(mesh=mesh)
+            self._joint[key] = Vfine
+            self._joint_nbytes[key] = mesh_nbytes(Vfine)
+            self.joint_misses += 1
+        return Vfine
+
+    def invalidate(self, basis=None):
+        """Remove all operators and joint meshes depending on ``basis`` or clear cache if no basis is given."""
+        if basis is None:
+            self._ops.clear()
+            self._nbytes.clear()
+            self._deps.clear()
+            self._joint.clear()
+            self._joint_nbytes.clear()
+            return
+        fp = basis_fingerprint(basis)
+        for key in [key for key, deps in self._deps.iteritems() if fp in deps]:
+            del self._ops[key]
+            del self._nbytes[key]
+            del self._deps[key]
+        for key in [key for key in self._joint.iterkeys() if fp in key]:
+            del self._joint[key]
+            del self._joint_nbytes[key]
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.joint_hits = 0
+        self.joint_misses = 0
+
+    @property
+    def nbytes(self):
+        """Estimated memory of all cached operators and joint meshes in bytes."""
+        return sum(self._nbytes.itervalues()) + sum(self._joint_nbytes.itervalues())
+
+    @property
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses,
+                "joint_hits": self.joint_hits, "joint_misses": self.joint_misses,
+                "entries": len(self), "joint_entries": len(self._joint),
+                "nbytes": self.nbytes}
+
+    def __len__(self):
+        return len(self._ops)
+
+    def __contains__(self, key):
+        return key in self._ops
+
+    def __repr__(self):
+        return "<AssemblyCache entries=%i hits=%i misses=%i nbytes=%i>" % \
+               (len(self), self.hits, self.misses, self.nbytes)
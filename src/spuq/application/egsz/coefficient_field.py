@@ -3,9 +3,10 @@
 import sys
 from abc import ABCMeta, abstractmethod, abstractproperty
 from types import GeneratorType
-from numpy import prod
+import numpy as np
 
 from spuq.utils.type_check import takes, anything, sequence_of
+from spuq.polyquad.polynomials import eval_product_basis
 from spuq.stochastics.random_variable import RandomVariable
 from spuq.utils import strclass
 from spuq.utils.parametric_array import ParametricArray
@@ -45,12 +46,29 @@ class CoefficientField(object):
     def sample_realization(self, Lambda, RV_samples=None):
         if RV_samples is None:
             RV_samples = self.sample_rvs()
-        sample_map = {}
-        for mu in Lambda:
-            univariate_vals = list(self[m][1].orth_polys[mu[m]](RV_samples[m]) for m in range(len(mu)))
-            sample_map[mu] = prod(univariate_vals)
+        Lambda = list(Lambda)
+        M = max([len(mu) for mu in Lambda] or [0])
+        X = np.array([[RV_samples[m] for m in range(M)]], dtype=float).reshape(1, M)
+        values = self.eval_basis(Lambda, X)
+        sample_map = dict(zip(Lambda, values[:, 0]))
         return sample_map, RV_samples
 
+    def eval_basis(self, Lambda, RV_samples, chunk_size=4096):
+        """Evaluate the polynomials of all mu in Lambda for the samples given
+        as rows of the (n_samples x M) array RV_samples.
+
+        Returns an array of shape (len(Lambda), n_samples)."""
+        Lambda = list(Lambda)
+        if not Lambda:
+            return np.zeros((0, np.shape(RV_samples)[0]))
+        M = max(len(mu) for mu in Lambda)
+        I = np.zeros((len(Lambda), M), dtype=int)
+        for i, mu in enumerate(Lambda):
+            inds, vals = mu.sparse
+            I[i, list(inds)] = vals
+        families = [self[m][1].orth_polys for m in range(M)]
+        return eval_product_basis(families, I, RV_samples, chunk_size)
+
 
 class ListCoefficientField(CoefficientField):
     """Expansion of a coefficient field according to EGSZ (1.2)."""
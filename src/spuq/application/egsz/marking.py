@@ -8,9 +8,10 @@ The marking is carried out with respect to the
 
 from __future__ import division
 from math import ceil
-from collections import defaultdict
 from operator import itemgetter
 
+import numpy as np
+
 from spuq.application.egsz.residual_estimator import ResidualEstimator
 from spuq.application.egsz.multi_vector import MultiVector
 from spuq.application.egsz.coefficient_field import CoefficientField
@@ -21,17 +22,53 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+
+def doerfler_indices(values, target):
+    """Return indices of a minimal set of largest values whose sum is at least target.
+
+    The set is determined by repeated partitioning with expected linear
+    complexity instead of sorting all values."""
+    values = np.asarray(values, dtype=float)
+    idx = np.arange(len(values))
+    selected = []
+    if target <= 0:
+        return idx[:0]
+    # invariant: all values in selected are larger than the ones in idx
+    while len(idx) > 1024:
+        k = len(idx) // 2
+        part = np.argpartition(-values[idx], k)
+        top = idx[part[:k]]
+        s = values[top].sum()
+        if s >= target:
+            idx = top
+        else:
+            selected.append(top)
+            target -= s
+            idx = idx[part[k:]]
+    # sort the remaining values and cut off with cumulative sums
+    idx = idx[np.argsort(-values[idx], kind="mergesort")]
+    n = np.searchsorted(np.cumsum(values[idx]), target) + 1
+    selected.append(idx[:n])
+    return np.concatenate(selected)
+
+
 class Marking(object):
     """EGSZ marking strategy for residual estimator."""
 
     @classmethod
-    @takes(anything, MultiVector, dict, list, callable)
-    def refine(cls, w, mesh_markers, new_multiindices, eval_vec):
-        """ """
+    @takes(anything, MultiVector, dict, list, callable, optional(anything))
+    def refine(cls, w, mesh_markers, new_multiindices, eval_vec, assembly_cache=None):
+        """Refine meshes of the marked cells and activate new multiindices.
+
+        Operators assembled on refined meshes are removed from ``assembly_cache`` (if given)."""
         # create new refined (and enlarged) multi vector
         for mu, cell_ids in mesh_markers.iteritems():
             logger.info("REFINE: refining %s of %s cells for mesh of mu %s", len(cell_ids), w[mu]._fefunc.function_space().mesh().num_cells(), mu)
+            if assembly_cache is not None and len(cell_ids) > 0:
+                assembly_cache.invalidate(w[mu].basis)
             w[mu] = w[mu].refine(cell_ids, with_prolongation=True)
+        if assembly_cache is not None:
+            logger.info("REFINE: assembly cache statistics %s", assembly_cache.stats)
 
         # determine current mesh sizes
         minh, maxh = 1e6, 0
@@ -44,7 +81,7 @@ class Marking(object):
                 maxh = maxH 
         logger.info("REFINE: current meshes minh = %s and maxh = %s", minh, maxh)
 
-        # add new multiindices to solution vector
+        # add new multiindices to solution vector (this also extends the neighbour tables of w.index_set)
         for mu in new_multiindices:
             logger.info("REFINE: adding new multiindex %s", mu)
             w[mu] = eval_vec()
@@ -101,20 +138,19 @@ class Marking(object):
         #            for mu, cellres in resind.iteritems():
         #                logger.debug("resind[%s] = %s", mu, cellres)
 
-        allresind = list()
-        for mu, resmu in resind.iteritems():
-            allresind = allresind + [(resmu.coeffs[i], i, mu) for i in range(len(resmu.coeffs))]
-        allresind = sorted(allresind, key=itemgetter(0), reverse=True)
-        global_res = sum([res[0] for res in allresind])
+        Lambda = resind.active_indices()
+        allresind = [np.asarray(resind[mu].coeffs) for mu in Lambda]
+        offsets = np.cumsum([0] + [len(resmu) for resmu in allresind])
+        allresind = np.concatenate(allresind)
+        global_res = allresind.sum()
         logger.info("(mark_residual) global residual is %f, want to mark for %f", global_res, theta_eta * global_res)
-        # setup marking sets
-        mesh_markers = defaultdict(set)
-        marked_res = 0.0
-        for res in allresind:
-            if marked_res >= theta_eta * global_res:
-                break
-            mesh_markers[res[2]].add(res[1])
-            marked_res += res[0]
+        # setup marking sets with cell indices for each mu
+        marked = np.sort(doerfler_indices(allresind, theta_eta * global_res))
+        bounds = np.searchsorted(marked, offsets)
+        mesh_markers = {}
+        for i, mu in enumerate(Lambda):
+            if bounds[i + 1] > bounds[i]:
+                mesh_markers[mu] = marked[bounds[i]:bounds[i + 1]] - offsets[i]
         logger.info("(mark_residual) MARKED elements: %s",
             [(mu, len(cell_ids)) for mu, cell_ids in mesh_markers.iteritems()])
         return mesh_markers
@@ -127,10 +163,9 @@ class Marking(object):
         # projection marking
         # ==================
         # setup marking sets
-        from numpy import sqrt
-        mesh_markers = defaultdict(set)
-        max_zeta1 = max([max(projind[mu].coeffs) for mu in projind.active_indices()])    # maximal element strategy
-        max_zeta2 = max([sqrt(sum(projind[mu].coeffs ** 2)) for mu in projind.active_indices()])     # maximal mesh strategy
+        mesh_markers = {}
+        max_zeta1 = max([np.max(projind[mu].coeffs) for mu in projind.active_indices()])    # maximal element strategy
+        max_zeta2 = max([np.linalg.norm(projind[mu].coeffs) for mu in projind.active_indices()])     # maximal mesh strategy
         if marking_strategy.upper().find('CELLPROJECTION') != -1:
             max_zeta = max_zeta1
         else:
@@ -143,8 +178,8 @@ class Marking(object):
 
         if max_zeta >= min_zeta:
             for mu, vec in projind.iteritems():
-                indmu = [i for i, p in enumerate(vec.coeffs) if p >= theta_zeta * max_zeta]
-                mesh_markers[mu] = mesh_markers[mu].union(set(indmu))
+                indmu = np.flatnonzero(np.asarray(vec.coeffs) >= theta_zeta * max_zeta)
+                mesh_markers[mu] = indmu
                 logger.debug("PROJ MARKING %i elements in %s", len(indmu), mu)
 
             logger.info("FINAL MARKED elements: %s",
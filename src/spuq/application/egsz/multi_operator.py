@@ -14,12 +14,16 @@ where the coefficients :math:`(\alpha^m_{n-1},\alpha^m_n,\alpha^m_{n+1})` are ob
 
 from spuq.linalg.basis import Basis
 from spuq.linalg.operator import Operator
+from spuq.linalg.sparse_solver import SparseSolver, SOLVER_TYPE
 from spuq.utils.type_check import takes, anything, optional
-from spuq.fem.fenics.fenics_utils import create_joint_mesh
 from spuq.application.egsz.coefficient_field import CoefficientField
-from spuq.application.egsz.multi_vector import MultiVector, MultiVectorWithProjection
+from spuq.application.egsz.multi_vector import MultiVector, MultiVectorWithProjection, _coeff_array, _set_coeffs
+from spuq.application.egsz.assembly_cache import AssemblyCache, basis_fingerprint, SOLVE_INDEX
 from spuq.utils.enum import Enum
 
+import numpy as np
+from collections import defaultdict
+
 import logging
 logger = logging.getLogger(__name__)
 
@@ -30,14 +34,33 @@ class MultiOperator(Operator):
     """Discrete operator according to EGSZ (2.6), generalised for spuq orthonormal polynomials."""
 
     @takes(anything, CoefficientField, callable, optional(callable), optional(Basis), optional(Basis))
-    def __init__(self, coeff_field, assemble_0, assemble_m=None, domain=None, codomain=None, assembly_type=ASSEMBLY_TYPE.JOINT_MU):
-        """Initialise discrete operator with FEM discretisation and coefficient field."""
+    def __init__(self, coeff_field, assemble_0, assemble_m=None, domain=None, codomain=None, assembly_type=ASSEMBLY_TYPE.JOINT_MU,
+                 assembly_cache=None):
+        """Initialise discrete operator with FEM discretisation and coefficient field.
+
+        Assembled operators are stored in ``assembly_cache`` (a new AssemblyCache by default)
+        and reused as long as the respective mesh is not refined."""
         self._assemble_0 = assemble_0
         self._assemble_m = assemble_m or assemble_0
         self._coeff_field = coeff_field
         self._domain = domain
         self._codomain = codomain
         self._assembly_type = assembly_type
+        if assembly_cache is None:
+            assembly_cache = AssemblyCache()
+        self._assembly_cache = assembly_cache
+
+    @property
+    def assembly_cache(self):
+        """Return the cache of assembled operators A_0 and A_m."""
+        return self._assembly_cache
+
+    def _get_A0(self, basis, depends=None):
+        return self._assembly_cache.assemble(self._assemble_0, basis, self._coeff_field.mean_func, depends=depends)
+
+    def _get_Am(self, basis, m, depends=None):
+        am_f, _ = self._coeff_field[m]
+        return self._assembly_cache.assemble(self._assemble_m, basis, am_f, m, depends=depends)
 
     @takes(any, MultiVector)
     def apply(self, w):
@@ -51,64 +74,71 @@ class MultiOperator(Operator):
                 len(self._coeff_field), maxm)
             maxm = len(self._coeff_field)
             #        assert self._coeff_field.length >= maxm        # ensure coeff_field expansion is sufficiently long
-        
-        # construct global joint mesh
+
+        # ids of the neighbours mu+e_m and mu-e_m (-1 if not active)
+        I = w.index_set
+        plus, minus = I.plus[:, :maxm], I.minus[:, :maxm]
+        betas = _get_betas(self._coeff_field, I, maxm)
+
+        # bases are retrieved only once since their fingerprints are required repeatedly
+        bases = dict((mu, w[mu].basis) for mu in Lambda)
+
+        # construct (or retrieve) global joint mesh
+        depends = None
         if self._assembly_type == ASSEMBLY_TYPE.JOINT_GLOBAL:
-            meshes = [w[m].basis.mesh for m in Lambda]
-            mesh = create_joint_mesh(meshes)
-            Vfine = w[Lambda[0]].basis.copy(mesh=mesh)
+            depends = [bases[m] for m in Lambda]
+            Vfine = self._assembly_cache.joint_basis(bases[Lambda[0]], depends)
         
         for mu in Lambda:
+            i = I.index(mu)
 
             if self._assembly_type != ASSEMBLY_TYPE.JOINT_GLOBAL:
                 # create joint mesh and basis
                 if (self._assembly_type == ASSEMBLY_TYPE.JOINT_MU
-                    and hasattr(w[mu].basis, "mesh")):
+                    and hasattr(bases[mu], "mesh")):
                     # identify active multi indices
-                    mus = set([mu])
-                    mus = mus.union([mu.inc(m) for m in range(maxm)])
-                    mus = mus.union([mu.dec(m) for m in range(maxm)])
-                    mus = mus.intersection(Lambda)
+                    ids = np.concatenate(([i], plus[i], minus[i]))
+                    mus = set(I[j] for j in ids[ids >= 0])
                     logger.debug("apply on mu = %s with joint mesh for %s",
                                  str(mu), str(mus))
 
-                    meshes = [w[m].basis.mesh for m in mus]
-                    mesh, _ = create_joint_mesh(meshes)
-                    Vfine = w[mu].basis.copy(mesh=mesh)
+                    # joint mesh and basis are reused until one of the meshes is refined
+                    depends = [bases[m] for m in mus]
+                    Vfine = self._assembly_cache.joint_basis(bases[mu], depends)
                 else:
-                    Vfine = w[mu].basis
+                    Vfine = bases[mu]
 
             # deterministic part
-            a0_f = self._coeff_field.mean_func
-            A0 = self._assemble_0(Vfine, a0_f)
-            cur_v = A0 * Vfine.project_onto(w[mu])
+            A0 = self._get_A0(Vfine, depends)
+            w_mu = Vfine.project_onto(w[mu])
+            cur_v = A0 * w_mu
 
             # iterate related multiindices
             for m in range(maxm):
                 logger.debug("with m = %i", m)
                 # assemble A for \mu and a_m
-                am_f, am_rv = self._coeff_field[m]
-                Am = self._assemble_m(Vfine, am_f)
+                Am = self._get_Am(Vfine, m, depends)
 
-                # prepare polynom coefficients
-                beta = am_rv.orth_polys.get_beta(mu[m])
+                # polynom coefficients
+                beta = betas[m][i]
 
                 # mu
-                cur_w = -beta[0] * Vfine.project_onto(w[mu])
+                cur_w = -beta[0] * w_mu
 
                 # mu+1
-                mu1 = mu.inc(m)
-                if mu1 in Lambda:
-                    cur_w += beta[1] * Vfine.project_onto(w[mu1])
+                j = plus[i, m]
+                if j >= 0:
+                    cur_w += beta[1] * Vfine.project_onto(w[I[j]])
 
                 # mu-1
-                mu2 = mu.dec(m)
-                if mu2 in Lambda:
-                    cur_w += beta[-1] * Vfine.project_onto(w[mu2])
+                j = minus[i, m]
+                if j >= 0:
+                    cur_w += beta[-1] * Vfine.project_onto(w[I[j]])
 
                 # apply discrete operator
                 cur_v += Am * cur_w
-            v[mu] = w[mu].basis.project_onto(cur_v)
+            v[mu] = bases[mu].project_onto(cur_v)
+        logger.debug("apply finished with %s", self._assembly_cache)
         return v
 
     @takes(any, MultiVectorWithProjection)
@@ -122,33 +152,35 @@ class MultiOperator(Operator):
                 len(self._coeff_field), maxm)
             maxm = len(self._coeff_field)
             #        assert self._coeff_field.length >= maxm        # ensure coeff_field expansion is sufficiently long
+        I = w.index_set
+        plus, minus = I.plus, I.minus
+        betas = _get_betas(self._coeff_field, I, maxm)
         for mu in Lambda:
             logger.debug("apply on mu = %s", str(mu))
+            i = I.index(mu)
             # deterministic part
-            a0_f = self._coeff_field.mean_func
-            A0 = self._assemble_0(w[mu].basis, a0_f)
+            A0 = self._get_A0(w[mu].basis)
             v[mu] = A0 * w[mu]
             for m in range(maxm):
                 logger.debug("with m = %i", m)
                 # assemble A for \mu and a_m
-                am_f, am_rv = self._coeff_field[m]
-                Am = self._assemble_m(w[mu].basis, am_f)
+                Am = self._get_Am(w[mu].basis, m)
 
-                # prepare polynom coefficients
-                beta = am_rv.orth_polys.get_beta(mu[m])
+                # polynom coefficients
+                beta = betas[m][i]
 
                 # mu
                 cur_w = -beta[0] * w[mu]
 
                 # mu+1
-                mu1 = mu.inc(m)
-                if mu1 in Lambda:
-                    cur_w += beta[1] * w.get_projection(mu1, mu)
+                j = plus[i, m]
+                if j >= 0:
+                    cur_w += beta[1] * w.get_projection(I[j], mu)
 
                 # mu-1
-                mu2 = mu.dec(m)
-                if mu2 in Lambda:
-                    cur_w += beta[-1] * w.get_projection(mu2, mu)
+                j = minus[i, m]
+                if j >= 0:
+                    cur_w += beta[-1] * w.get_projection(I[j], mu)
 
                 # apply discrete operator
                 v[mu] += Am * cur_w
@@ -165,32 +197,72 @@ class MultiOperator(Operator):
         return self._codomain
 
 
+def _get_betas(coeff_field, index_set, maxm):
+    """Return the triples beta of all multiindices (by id) for m < maxm."""
+    betas = []
+    for m in range(maxm):
+        _, am_rv = coeff_field[m]
+        beta = am_rv.orth_polys.get_beta(index_set.arr[:, m])
+        # python floats such that scalar * vector is handled by the vector classes
+        betas.append(zip(beta[0].tolist(), beta[1].tolist(), beta[2].tolist()))
+    return betas
+
+
 class PreconditioningOperator(Operator):
-    """Preconditioning operator according to EGSZ section 7.1."""
+    """Preconditioning operator according to EGSZ section 7.1.
+
+    The mean operator is factorized once per distinct mesh (see
+    `SparseSolver`) and applied to all multiindices sharing this mesh by
+    one solve with multiple right-hand sides. With ``solver_type=None``
+    the solve operators returned by ``assemble_solver`` are applied
+    directly."""
 
     @takes(anything, anything, callable, optional(Basis), optional(Basis))
-    def __init__(self, mean_func, assemble_solver, domain=None, codomain=None):
+    def __init__(self, mean_func, assemble_solver, domain=None, codomain=None, solver_type=SOLVER_TYPE.LU,
+                 assembly_cache=None):
         """Initialise operator with FEM discretisation and
         mean diffusion coefficient"""
         self._assemble_solver = assemble_solver
         self._mean_func = mean_func
         self._domain = domain
         self._codomain = codomain
+        self._solver_type = solver_type
+        if assembly_cache is None:
+            assembly_cache = AssemblyCache()
+        self._assembly_cache = assembly_cache
+
+    def _factorize(self, basis, coeff):
+        op = self._assemble_solver(basis, coeff)
+        if self._solver_type is None or not hasattr(op, "as_scipy_operator"):
+            return op
+        solver = SparseSolver(op.as_scipy_operator().matrix, self._solver_type)
+        # factorize now so that the cache knows the memory used
+        solver.factor
+        return solver
+
+    def _get_solver(self, basis):
+        return self._assembly_cache.assemble(self._factorize, basis, self._mean_func, SOLVE_INDEX)
 
     @takes(any, MultiVector)
     def apply(self, w):
         """Apply operator to vector which has to live in the same domain."""
-        v = 0 * w
-        Delta = w.active_indices()
-
-        for mu in Delta:
-            a0_f = self._mean_func
-            A0 = self._assemble_solver(w[mu].basis, a0_f)
-            if False:
-                mat = A0._matrix
-                M = mat.array()
-                M2 = 0.5 * (M + M.T)
-            v[mu] = A0 * w[mu]
+        v = w.copy()
+        # group multiindices by mesh
+        groups = defaultdict(list)
+        for mu in w.active_indices():
+            fp = basis_fingerprint(w[mu].basis)
+            groups[fp if fp is not None else mu].append(mu)
+
+        for Delta in groups.itervalues():
+            solver = self._get_solver(w[Delta[0]].basis)
+            if isinstance(solver, SparseSolver):
+                X = np.column_stack([_coeff_array(w[mu]) for mu in Delta])
+                Y = solver.solve(X)
+                for j, mu in enumerate(Delta):
+                    _set_coeffs(v[mu], Y[:, j])
+            else:
+                for mu in Delta:
+                    v[mu] = solver * w[mu]
         return v
 
     @property
@@ -10,35 +10,165 @@ where the coefficients :math:`(\alpha^m_{n-1},\alpha^m_n,\alpha^m_{n+1})` are ob
         \alpha_{n-1} &:= c_n/b_n \\
         \alpha_n &:= a_n/b_n \\
         \alpha_{n+1} &:= 1/b_n
+
+Since all multiindices share one FE basis, the operator is also the sum of
+Kronecker products
+
+.. math:: A = I\otimes\overline{A} + \sum_{m=1}^M K_m\otimes A_m
+
+with sparse stochastic matrices :math:`K_m` (row :math:`\mu` holds the
+coefficients :math:`-\alpha^m_{\mu_m}` and :math:`\alpha^m_{\mu_m\pm1}`
+of the terms above). With ``apply_type=APPLY_TYPE.GLOBAL`` this matrix is
+assembled as one sparse matrix, with ``APPLY_TYPE.TENSOR`` the operator is
+applied to the matrix :math:`W` of coefficient vectors (one column per
+multiindex) as :math:`\overline{A}W + \sum_m A_m W K_m^T`.
 """
 
-from spuq.linalg.basis import Basis
+import numpy as np
+import scipy.sparse as sps
+
+from spuq.linalg.basis import Basis, CanonicalBasis
 from spuq.linalg.operator import Operator
+from spuq.linalg.scipy_operator import ScipyOperator
+from spuq.linalg.tensor_operator import TensorOperator
 from spuq.utils.type_check import takes, anything, optional
 from spuq.application.egsz.coefficient_field import CoefficientField
 from spuq.application.egsz.multi_vector import MultiVector, MultiVectorSharedBasis
+from spuq.application.egsz.multi_operator import _get_betas, _coeff_array, _set_coeffs
+from spuq.application.egsz.assembly_cache import basis_fingerprint
 from spuq.utils.enum import Enum
 
 import logging
 logger = logging.getLogger(__name__)
 
+APPLY_TYPE = Enum('MU', 'GLOBAL', 'TENSOR')
+
 
 class MultiOperator(Operator):
     """Discrete operator according to EGSZ (2.6) but with just a single spatial grid, generalised for spuq orthonormal polynomials."""
 
     @takes(anything, CoefficientField, callable, optional(callable), optional(Basis), optional(Basis))
-    def __init__(self, coeff_field, assemble_0, assemble_m=None, domain=None, codomain=None):
-        """Initialise discrete operator with FEM discretisation and coefficient field."""
+    def __init__(self, coeff_field, assemble_0, assemble_m=None, domain=None, codomain=None, apply_type=APPLY_TYPE.MU):
+        """Initialise discrete operator with FEM discretisation and coefficient field.
+
+        With ``apply_type`` GLOBAL or TENSOR the operator is applied by
+        sparse matrix products for all multiindices at once (see module
+        documentation) instead of by a loop over multiindices and m."""
         self._assemble_0 = assemble_0
         self._assemble_m = assemble_m or assemble_0
         self._coeff_field = coeff_field
         self._domain = domain
         self._codomain = codomain
+        self._apply_type = apply_type
+        # matrices of the last application (see _get_matrices)
+        self._spatial = None
+        self._stochastic = None
+        self._global = None
+
+    def _maxm(self, w):
+        maxm = w.max_order
+        if len(self._coeff_field) < maxm:
+            logger.warning("insufficient length of coefficient field for MultiVector (%i instead of %i",
+                len(self._coeff_field), maxm)
+            maxm = len(self._coeff_field)
+        return maxm
+
+    def spatial_matrices(self, basis, maxm, func_first=False):
+        """Return the sparse matrices of the mean operator and of A_m for m < maxm on ``basis``.
+
+        The assemblers are called as ``(basis, func)`` as in `apply` or, with
+        ``func_first``, as ``(func, basis)`` as in `apply_A`. The matrices
+        are reused for bases with the same fingerprint (the same basis
+        object if it has none)."""
+        def assemble(assembler, func):
+            return assembler(func, basis) if func_first else assembler(basis, func)
+        fp = basis_fingerprint(basis)
+        if self._spatial is None:
+            same_basis = False
+        elif fp is None:
+            same_basis = self._spatial[0] is basis
+        else:
+            same_basis = self._spatial[1] == fp
+        if not same_basis or self._spatial[2] != func_first or len(self._spatial[3]) <= maxm:
+            mats = [_sparse_matrix(assemble(self._assemble_0, self._coeff_field.mean_func))]
+            for m in range(maxm):
+                am_f, _ = self._coeff_field[m]
+                mats.append(_sparse_matrix(assemble(self._assemble_m, am_f)))
+            self._spatial = (basis, fp, func_first, mats)
+            self._global = None
+        return self._spatial[3][:maxm + 1]
+
+    def stochastic_matrices(self, index_set, maxm):
+        """Return the sparse matrices K_m for m < maxm of the multiindices
+        of the `IndexedMultiindexSet` ``index_set`` (rows and columns by id)."""
+        key = (tuple(index_set.multiindices), maxm)
+        if self._stochastic is None or self._stochastic[0] != key:
+            n = len(index_set)
+            ids = np.arange(n)
+            betas = _get_betas(self._coeff_field, index_set, maxm)
+            mats = []
+            for m in range(maxm):
+                beta = np.array(betas[m], dtype=float).reshape(n, 3)
+                plus, minus = index_set.plus[:, m], index_set.minus[:, m]
+                p, q = plus >= 0, minus >= 0
+                rows = np.concatenate((ids, ids[p], ids[q]))
+                cols = np.concatenate((ids, plus[p], minus[q]))
+                vals = np.concatenate((-beta[:, 0], beta[p, 1], beta[q, 2]))
+                mats.append(sps.csr_matrix((vals, (rows, cols)), shape=(n, n)))
+            self._stochastic = (key, mats)
+            self._global = None
+        return self._stochastic[1]
+
+    def _get_matrices(self, w, func_first=False):
+        maxm = self._maxm(w)
+        I = w.index_set
+        basis = w[I[0]].basis
+        return I, self.spatial_matrices(basis, maxm, func_first), self.stochastic_matrices(I, maxm)
+
+    def global_matrix(self, w, func_first=False):
+        """Return the Galerkin matrix for the multiindices of ``w`` as one
+        sparse matrix (blocks of the multiindices in the order of the ids
+        of w.index_set)."""
+        I, A, K = self._get_matrices(w, func_first)
+        if self._global is None:
+            G = sps.kron(sps.identity(len(I), format="csr"), A[0], format="csr")
+            for Km, Am in zip(K, A[1:]):
+                G = G + sps.kron(Km, Am, format="csr")
+            self._global = G
+        return self._global
+
+    def tensor_operator(self, w, func_first=False):
+        """Return the Galerkin operator for the multiindices of ``w`` as
+        `TensorOperator` acting on the matrix of coefficient vectors."""
+        I, A, K = self._get_matrices(w, func_first)
+        n = A[0].shape[0]
+        B = [sps.identity(len(I), format="csr")] + K
+        A = [ScipyOperator(Am, domain=CanonicalBasis(n), codomain=CanonicalBasis(n)) for Am in A]
+        B = [ScipyOperator(Km, domain=CanonicalBasis(len(I)), codomain=CanonicalBasis(len(I))) for Km in B]
+        return TensorOperator(A, B)
+
+    def _apply_global(self, w, func_first=False):
+        I, A, K = self._get_matrices(w, func_first)
+        W = np.column_stack([_coeff_array(w[I[i]]) for i in range(len(I))])
+        if self._apply_type == APPLY_TYPE.GLOBAL:
+            G = self.global_matrix(w, func_first)
+            V = (G * W.ravel(order="F")).reshape(W.shape, order="F")
+        else:
+            V = A[0] * W
+            for Km, Am in zip(K, A[1:]):
+                # A_m W K_m^T with two sparse matrix products
+                V += (Km * (Am * W).T).T
+        v = 0 * w
+        for i in range(len(I)):
+            _set_coeffs(v[I[i]], V[:, i])
+        return v
 
     @takes(any, MultiVector)
     def apply(self, w):
         """Apply operator to vector which has to live in the same domain."""
-        
+        if self._apply_type != APPLY_TYPE.MU:
+            return self._apply_global(w)
+
         v = 0 * w
         Lambda = w.active_indices()
         maxm = w.max_order
@@ -86,6 +216,9 @@ class MultiOperator(Operator):
     @takes(any, MultiVectorSharedBasis)
     def apply_A(self, w):
         """Apply operator to vector which has to live in the same domain."""
+        if self._apply_type != APPLY_TYPE.MU:
+            # the assemblers are called as (func, basis) here
+            return self._apply_global(w, func_first=True)
         v = 0 * w
         Lambda = w.active_indices()
         maxm = w.max_order
@@ -136,6 +269,22 @@ class MultiOperator(Operator):
         return self._codomain
 
 
+def _sparse_matrix(op):
+    """Return the sparse matrix of an assembled spatial operator."""
+    if sps.issparse(op):
+        return op.tocsr()
+    if hasattr(op, "as_scipy_operator"):
+        M = sps.csr_matrix(op.as_scipy_operator().matrix)
+    else:
+        M = sps.csr_matrix(op.as_matrix())
+    # operators on the inner dofs are masked before and after the product
+    mask = getattr(op, "_mask", None)
+    if mask is not None:
+        D = sps.diags(np.asarray(mask, dtype=float), 0)
+        M = (D * M * D).tocsr()
+    return M
+
+
 class PreconditioningOperator(Operator):
     """Preconditioning operator according to EGSZ section 7.1."""
 
@@ -1,11 +1,11 @@
 from __future__ import division
 
 from spuq.fem.fenics.fenics_vector import FEniCSVector
-from spuq.linalg.vector import Scalar, Vector, FlatVector, inner
+from spuq.linalg.vector import Scalar, Vector, FlatVector, inner, array_axpy, array_axpby
 from spuq.linalg.basis import Basis
 from spuq.linalg.operator import BaseOperator
 from spuq.math_utils.multiindex import Multiindex
-from spuq.math_utils.multiindex_set import MultiindexSet
+from spuq.math_utils.multiindex_set import MultiindexSet, IndexedMultiindexSet
 from spuq.utils.type_check import takes, anything, optional
 from spuq.utils import strclass
 
@@ -20,6 +20,19 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _coeff_array(vec):
+    coeffs = vec.coeffs
+    return coeffs if isinstance(coeffs, np.ndarray) else coeffs.array()
+
+
+def _set_coeffs(vec, x):
+    if isinstance(vec.coeffs, np.ndarray):
+        vec.coeffs[:] = x
+    else:
+        # dolfin vectors require contiguous arrays (x may be a column slice)
+        vec.coeffs = np.ascontiguousarray(x)
+
+
 # support for set of multiindices
 def supp(Lambda):
     s = [set(mu.supp) for mu in Lambda]
@@ -32,7 +45,27 @@ class MultiVector(Vector):
     This class manages a set of Vectors associated to MultiindexSet instances.
     A Vector contains a coefficient vector and the respespective basis.
     Note that the type of the second value of the tuple is not restricted to
-    anything specific."""
+    anything specific.
+
+    After calling `pack` the coefficients of all vectors are stored in one
+    contiguous buffer and the vectors are views into it. Then additions,
+    scaling, inner products and flattening act on the whole buffer at once.
+    The contiguous storage is given up when a vector of different dimension
+    or a new multiindex is set. Packing is only supported for vectors with
+    external coefficient storage (`FlatVector`); multivectors of
+    `FEniCSVector` keep their per-multiindex dolfin vectors since dolfin
+    vectors own their storage and cannot be views into a numpy buffer.
+    `pcg` packs its iterates.
+
+    The active multiindices are also available as `IndexedMultiindexSet`
+    (see index_set) whose neighbour tables are extended when new
+    multiindices are set."""
+
+    # contiguous storage (see pack)
+    _buffer = None
+    _offsets = None
+    # active multiindices with neighbour tables (see index_set)
+    _index_set = None
 
     @takes(anything, optional(callable))
     def __init__(self, on_modify=lambda: None, multivector=None):
@@ -57,6 +90,8 @@ class MultiVector(Vector):
 
     def flatten(self):
         """Return flattened (Euclidian) vector."""
+        if self.is_contiguous:
+            return FlatVector(self._buffer)
         F = self.to_euclidian_operator
         return F.apply(self)
 
@@ -80,6 +115,8 @@ class MultiVector(Vector):
     @takes(anything, Multiindex, Vector)
     def __setitem__(self, mi, val):
         self.on_modify()
+        val = self._update_storage(mi, val)
+        self._update_index_set(mi)
         self.mi2vec[mi] = val
 
     def __len__(self):
@@ -97,12 +134,121 @@ class MultiVector(Vector):
     def active_indices(self):
         return sorted(self.keys())
 
+    @property
+    def index_set(self):
+        """Return the active multiindices as `IndexedMultiindexSet`.
+
+        It is created on first access with ids in the order of
+        active_indices and updated when new multiindices are set."""
+        if self._index_set is None:
+            self._index_set = IndexedMultiindexSet(self.active_indices())
+        return self._index_set
+
+    def _update_index_set(self, mi):
+        if self._index_set is not None:
+            self._index_set.add(mi)
+
     def copy(self):
         mv = self.__class__()
+        if self._index_set is not None:
+            mv._index_set = self._index_set.copy()
+        if self.is_contiguous:
+            mv._copy_contiguous(self)
+            return mv
         for mi in self.keys():
             mv[mi] = self[mi].copy()
         return mv
 
+    def as_array(self):
+        """Return the coefficients of all vectors (in the order of
+        active_indices) as one array. This is a view into the contiguous
+        buffer if the vector is packed and a copy otherwise."""
+        if self.is_contiguous:
+            return self._buffer
+        return np.concatenate([_coeff_array(self[mu]) for mu in self.active_indices()])
+
+    def from_array(self, x):
+        """Return a copy of this vector with the coefficients x (in the
+        layout of as_array). The new vector uses x as its buffer without
+        copying if this vector is packed."""
+        if self.is_contiguous:
+            mv = self.__class__()
+            if self._index_set is not None:
+                mv._index_set = self._index_set.copy()
+            mv._copy_contiguous(self, np.asarray(x, dtype=self._buffer.dtype))
+            return mv
+        mv = self.copy()
+        start = 0
+        for mu in mv.active_indices():
+            dim = mv[mu].dim
+            _set_coeffs(mv[mu], x[start:start + dim])
+            start += dim
+        return mv
+
+    @property
+    def is_contiguous(self):
+        """True if all coefficients are stored in one contiguous buffer."""
+        return self._buffer is not None
+
+    def pack(self):
+        """Move the coefficients of all vectors into one contiguous buffer.
+
+        The vectors are rebound to views into the buffer which requires
+        them to implement ``_rebind_coeffs`` (as `FlatVector` does).
+        Returns True on success and False if some vector does not support
+        external storage (e.g. `FEniCSVector`)."""
+        if self.is_contiguous:
+            return True
+        if not len(self) or not all(hasattr(vec, "_rebind_coeffs") for vec in self.values()):
+            return False
+        offsets = {}
+        start = 0
+        for mu in self.active_indices():
+            dim = self[mu].dim
+            offsets[mu] = (start, start + dim)
+            start += dim
+        dtype = np.result_type(*[vec.coeffs.dtype for vec in self.values()])
+        buf = np.empty(start, dtype=dtype)
+        for mu, (start, stop) in offsets.iteritems():
+            self[mu]._rebind_coeffs(buf[start:stop])
+        self._buffer = buf
+        self._offsets = offsets
+        return True
+
+    def _unpack(self):
+        # vectors keep their views into the (now private) buffer
+        self._buffer = None
+        self._offsets = None
+
+    def _update_storage(self, mi, val):
+        # return the vector to be stored for mi; the caller's vector is
+        # never rebound since it may still be in use (e.g. in another
+        # packed multivector)
+        if not self.is_contiguous:
+            return val
+        old = self.mi2vec.get(mi)
+        if old is None or old.dim != val.dim or not hasattr(val, "_rebind_coeffs"):
+            self._unpack()
+            return val
+        if old is val:
+            return val
+        start, stop = self._offsets[mi]
+        coeffs = self._buffer[start:stop]
+        coeffs[:] = val.coeffs
+        return val._create_copy(coeffs)
+
+    def _copy_contiguous(self, other, buf=None):
+        if buf is None:
+            buf = other._buffer.copy()
+        for mu, (start, stop) in other._offsets.iteritems():
+            self.mi2vec[mu] = other[mu]._create_copy(buf[start:stop])
+        self._buffer = buf
+        self._offsets = dict(other._offsets)
+
+    def _same_layout(self, other):
+        return (self.is_contiguous and getattr(other, "is_contiguous", False) and
+                self._offsets == other._offsets)
+
     @takes(anything, MultiindexSet, Vector)
     def set_defaults(self, multiindex_set, init_vector):
         self.on_modify()
@@ -110,6 +256,9 @@ class MultiVector(Vector):
             self[Multiindex(mi)] = init_vector.copy()
 
     def set_zero(self):
+        if self.is_contiguous:
+            self._buffer[:] = 0
+            return
         for mu in self.active_indices():
             self[mu].set_zero()
 
@@ -119,11 +268,18 @@ class MultiVector(Vector):
 
     def __neg__(self):
         new = self.copy()
+        if new.is_contiguous:
+            np.negative(new._buffer, new._buffer)
+            return new
         for mi in self.active_indices():
             new[mi] = -self[mi]
         return new
 
     def __iadd__(self, other):
+        if self._same_layout(other):
+            self.on_modify()
+            self._buffer += other._buffer
+            return self
         assert self.active_indices() == other.active_indices()
         self.on_modify()
         for mi in self.active_indices():
@@ -131,6 +287,10 @@ class MultiVector(Vector):
         return self
 
     def __isub__(self, other):
+        if self._same_layout(other):
+            self.on_modify()
+            self._buffer -= other._buffer
+            return self
         assert self.active_indices() == other.active_indices()
         self.on_modify()
         for mi in self.active_indices():
@@ -140,17 +300,50 @@ class MultiVector(Vector):
     def __imul__(self, other):
         assert isinstance(other, Scalar)
         self.on_modify()
+        if self.is_contiguous:
+            self._buffer *= other
+            return self
         for mi in self.keys():
             self[mi] *= other
         return self
 
+    def axpy(self, a, x):
+        """Compute self += a * x in place and return self."""
+        self.on_modify()
+        if self._same_layout(x):
+            array_axpy(a, x._buffer, self._buffer)
+            return self
+        assert self.active_indices() == x.active_indices()
+        for mi in self.active_indices():
+            self[mi].axpy(a, x[mi])
+        return self
+
+    def axpby(self, a, x, b):
+        """Compute self = a * x + b * self in place and return self."""
+        self.on_modify()
+        if self._same_layout(x):
+            array_axpby(a, x._buffer, b, self._buffer)
+            return self
+        assert self.active_indices() == x.active_indices()
+        for mi in self.active_indices():
+            self[mi].axpby(a, x[mi], b)
+        return self
+
     def __inner__(self, other):
         assert isinstance(other, MultiVector)
+        if self._same_layout(other):
+            return float(np.dot(self._buffer, other._buffer))
         s = 0.0
         for mi in self.keys():
             s += inner(self[mi], other[mi])
         return s
 
+    def norm(self):
+        """Return Euclidian norm of the coefficients."""
+        if self.is_contiguous:
+            return float(np.linalg.norm(self._buffer))
+        return np.sqrt(self.__inner__(self))
+
     def __repr__(self):
         return "<%s keys=%s>" % (strclass(self.__class__), self.mi2vec.keys())
 
@@ -158,11 +351,19 @@ class MultiVector(Vector):
         # pickling preparation
         odict = self.__dict__.copy() # copy the dict since we change it
         del odict['on_modify']
+        # views are not preserved by pickling, the buffer is rebuilt on restore
+        odict.pop('_buffer', None)
+        odict.pop('_offsets', None)
+        odict.pop('_index_set', None)
+        odict['_packed'] = self.is_contiguous
         return odict
     
     def __setstate__(self, d):
         # pickling restore
+        packed = d.pop('_packed', False)
         self.__dict__.update(d)
+        if packed:
+            self.pack()
     
 
 class MultiVectorWithProjection(MultiVector):
@@ -191,6 +392,11 @@ class MultiVectorWithProjection(MultiVector):
         mv.project = self.project
         return mv
 
+    def from_array(self, x):
+        mv = MultiVector.from_array(self, x)
+        mv.project = self.project
+        return mv
+
     def __eq__(self, other):
         return (MultiVector.__eq__(self, other) and
                 self.project == other.project)
@@ -347,16 +553,15 @@ class MultiVectorWithProjection(MultiVector):
 
     def __getstate__(self):
         # pickling preparation
-        odict = self.__dict__.copy() # copy the dict since we change it
+        odict = MultiVector.__getstate__(self)
         odict['_proj_cache'] = defaultdict(dict)
         odict['_back_cache'] = {}
-        del odict['on_modify']
         del odict['project']
         return odict
     
     def __setstate__(self, d):
         # pickling restore
-        self.__dict__.update(d)
+        MultiVector.__setstate__(self, d)
         # NOTE: this sets default projection and does not restore any other projection type! 
         self.project = MultiVectorWithProjection.default_project
 
@@ -387,6 +592,10 @@ class MultiVectorOperator(BaseOperator):
 
     def _multivec_to_euclidian(self, vec):
         assert vec.dim == self._dim
+        if vec.is_contiguous and [mu for mu, _ in sorted(vec._offsets.items(), key=lambda x: x[1])] == \
+                list(self._basis.active_indices()):
+            # no copy required
+            return FlatVector(vec._buffer)
         if not self._last_vec:
             new_vec = FlatVector(np.empty(self._dimsum))
             self._last_vec = new_vec
@@ -454,6 +663,8 @@ class MultiVectorSharedBasis(MultiVector):
         self.on_modify()
         if len(self) > 0:
             assert val.basis == self[self.active_indices()[0]].basis
+        val = self._update_storage(mi, val)
+        self._update_index_set(mi)
         self.mi2vec[mi] = val
 
     def keys(self):
@@ -467,6 +678,11 @@ class MultiVectorSharedBasis(MultiVector):
 
     def copy(self):
         mv = self.__class__()
+        if self._index_set is not None:
+            mv._index_set = self._index_set.copy()
+        if self.is_contiguous:
+            mv._copy_contiguous(self)
+            return mv
         for mi in self.keys():
             mv[mi] = self[mi].copy()
         return mv
@@ -501,16 +717,6 @@ class MultiVectorSharedBasis(MultiVector):
         for mi in multiindex_set:
             self[Multiindex(mi)] = init_vector.copy()
 
-    def __getstate__(self):
-        # pickling preparation
-        odict = self.__dict__.copy() # copy the dict since we change it
-        del odict['on_modify']
-        return odict
-    
-    def __setstate__(self, d):
-        # pickling restore
-        self.__dict__.update(d)
-
 
 class MultiVectorBasis(object):
     def __init__(self, multivec, single_basis=False):
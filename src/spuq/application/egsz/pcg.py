@@ -4,50 +4,52 @@ from spuq.utils.type_check import takes, optional, returns, tuple_of
 
 from spuq.linalg.operator import Operator
 from spuq.linalg.vector import Vector, inner
-from spuq.utils.forgetful_vector import ForgetfulVector
 
 __all__ = ["pcg"]
 
 import logging
 logger = logging.getLogger(__name__)
 
+def _pack(*vecs):
+    for vec in vecs:
+        if hasattr(vec, "pack"):
+            vec.pack()
+
+
 @takes(Operator, Vector, Operator, Vector, optional(float), optional(int))
 def pcg(A, f, P, w0, eps=1e-4, maxiter=100):
-    # for most quantities in PCG (except zeta) only the most recent 
-    # values needs to be kept in memory
-    w = ForgetfulVector(1)
-    rho = ForgetfulVector(1)
-    s = ForgetfulVector(1)
-    v = ForgetfulVector(1)
-    z = ForgetfulVector(1)
-    alpha = ForgetfulVector(1)
-    zeta = ForgetfulVector(2)
-
-    w[0] = w0
-    rho[0] = f - A * w[0]
-    s[0] = P * rho[0]
-    v[0] = s[0]
-    zeta[0] = inner(rho[0], s[0])
+    # the iterates w, rho and v are updated in place by the fused vector
+    # operations, only the applications of A and P create new vectors
+    w = w0.copy()
+    rho = f - A * w
+    s = P * rho
+    v = s.copy()
+    # multivectors of FlatVectors are updated on one contiguous buffer
+    # (multivectors of FEniCSVectors keep their dolfin vectors, see MultiVector.pack)
+    _pack(w, rho, v)
+    zeta = inner(rho, s)
+    rho2 = inner(rho, rho)
     for i in xrange(1, maxiter):
-        logger.info("pcg iter: %s -> zeta=%s, rho^2=%s" % (i, zeta[i - 1], inner(rho[i - 1], rho[i - 1])))
-        if zeta[i - 1] < 0:
-            for mu in rho[i - 1].active_indices():
-                print i, mu, inner(rho[i - 1][mu], s[i - 1][mu])
-            raise Exception("Preconditioner for PCG is not positive definite (%s)" % zeta[i - 1])
-        if zeta[i - 1] <= eps ** 2:
-            return (w[i - 1], zeta[i - 1], i)
-
-        z[i - 1] = A * v[i - 1]
-        alpha[i - 1] = inner(z[i - 1], v[i - 1])
-        if alpha[i - 1] == 0:
-            raise Exception("Matrix for PCG is singular (%s)" % alpha[i - 1])
-        elif alpha[i - 1] < 0:
-            raise Exception("Matrix for PCG is not positive definite (%s)" % alpha[i - 1])
-
-        w[i] = w[i - 1] + zeta[i - 1] / alpha[i - 1] * v[i - 1]
-        rho[i] = rho[i - 1] - zeta[i - 1] / alpha[i - 1] * z[i - 1]
-        s[i] = P * rho[i]
-        zeta[i] = inner(rho[i], s[i])
-        v[i] = s[i] + zeta[i] / zeta[i - 1] * v[i - 1]
+        logger.info("pcg iter: %s -> zeta=%s, rho^2=%s" % (i, zeta, rho2))
+        if zeta < 0:
+            for mu in rho.active_indices():
+                print i, mu, inner(rho[mu], s[mu])
+            raise Exception("Preconditioner for PCG is not positive definite (%s)" % zeta)
+        if zeta <= eps ** 2:
+            return (w, zeta, i)
+
+        z = A * v
+        alpha = inner(z, v)
+        if alpha == 0:
+            raise Exception("Matrix for PCG is singular (%s)" % alpha)
+        elif alpha < 0:
+            raise Exception("Matrix for PCG is not positive definite (%s)" % alpha)
+
+        w.axpy(zeta / alpha, v)
+        rho2 = rho.axpy_inner(-zeta / alpha, z)
+        s = P * rho
+        zeta_new = inner(rho, s)
+        v.xpay(s, zeta_new / zeta)
+        zeta = zeta_new
 
     raise Exception("PCG did not converge")
@@ -44,6 +44,7 @@ from spuq.linalg.vector import FlatVector
 from spuq.math_utils.multiindex import Multiindex
 from spuq.utils.type_check import takes, anything, list_of, optional
 from spuq.utils.timing import timing
+from spuq.utils.parallel import fork_map
 
 import logging
 logger = logging.getLogger(__name__)
@@ -52,13 +53,16 @@ class ResidualEstimator(object):
     """Evaluation of the residual error estimator which consists of volume/edge terms and the projection error between different FE meshes.
 
     Note: In order to reduce computational costs, projected vectors are stored and reused at the expense of memory.
+    The indicators of the multiindices can be evaluated in parallel by ``processes`` forked worker processes
+    (see `spuq.utils.parallel.fork_map`); projections cached by the workers are not transferred back.
     fenics/dolfin implementation is based on
     https://answers.launchpad.net/dolfin/+question/177108
     """
 
     @classmethod
-    @takes(anything, MultiVector, CoefficientField, anything, anything, float, float, float, float, int, optional(float), optional(int), optional(int), optional(int))
-    def evaluateError(cls, w, coeff_field, pde, f, zeta, gamma, ceta, cQ, newmi_add_maxm, maxh=0.1, quadrature_degree= -1, projection_degree_increase=1, refine_projection_mesh=1):
+    @takes(anything, MultiVector, CoefficientField, anything, anything, float, float, float, float, int, optional(float), optional(int), optional(int), optional(int), optional(int))
+    def evaluateError(cls, w, coeff_field, pde, f, zeta, gamma, ceta, cQ, newmi_add_maxm, maxh=0.1, quadrature_degree= -1, projection_degree_increase=1, refine_projection_mesh=1,
+                      processes=1):
         """Evaluate EGSZ Error (7.5)."""
         logger.debug("starting evaluateError")
 
@@ -69,11 +73,12 @@ class ResidualEstimator(object):
 
         timing_stats = {}
         with timing(msg="ResidualEstimator.evaluateResidualEstimator", logfunc=logger.info, store_func=partial(_store_stats, key="TIME-RESIDUAL", stats=timing_stats)):
-            resind, reserror = ResidualEstimator.evaluateResidualEstimator(w, coeff_field, pde, f, quadrature_degree)
+            resind, reserror = ResidualEstimator.evaluateResidualEstimator(w, coeff_field, pde, f, quadrature_degree, processes)
 
         logger.debug("starting evaluateProjectionEstimator")
         with timing(msg="ResidualEstimator.evaluateProjectionError", logfunc=logger.info, store_func=partial(_store_stats, key="TIME-PROJECTION", stats=timing_stats)):
-            projind, projerror = ResidualEstimator.evaluateProjectionError(w, coeff_field, pde, maxh, True, projection_degree_increase, refine_projection_mesh)
+            projind, projerror = ResidualEstimator.evaluateProjectionError(w, coeff_field, pde, maxh, True, projection_degree_increase, refine_projection_mesh,
+                                                                           processes)
 
         logger.debug("starting evaluateInactiveProjectionError")
         with timing(msg="ResidualEstimator.evaluateInactiveMIProjectionError", logfunc=logger.info, store_func=partial(_store_stats, key="TIME-INACTIVE-MI", stats=timing_stats)):
@@ -94,14 +99,18 @@ class ResidualEstimator(object):
 
 
     @classmethod
-    @takes(anything, MultiVectorWithProjection, CoefficientField, anything, anything, optional(int))
-    def evaluateResidualEstimator(cls, w, coeff_field, pde, f, quadrature_degree= -1):
+    @takes(anything, MultiVectorWithProjection, CoefficientField, anything, anything, optional(int), optional(int))
+    def evaluateResidualEstimator(cls, w, coeff_field, pde, f, quadrature_degree= -1, processes=1):
         """Evaluate residual estimator EGSZ (5.7) for all active mu of w."""
         # evaluate residual estimator for all multi indices
+        Lambda = w.active_indices()
+        w.index_set     # create neighbour tables before the workers are forked
+        results = fork_map(lambda mu: cls._evaluateResidualEstimator(mu, w, coeff_field, pde, f, quadrature_degree),
+                           Lambda, processes)
         eta = MultiVector()
         global_error = {}
-        for mu in w.active_indices():
-            eta[mu], global_error[mu] = cls._evaluateResidualEstimator(mu, w, coeff_field, pde, f, quadrature_degree)
+        for mu, (eta_mu, error_mu) in zip(Lambda, results):
+            eta[mu], global_error[mu] = eta_mu, error_mu
         return (eta, global_error)
 
 
@@ -147,7 +156,8 @@ class ResidualEstimator(object):
         R_Nb = r_Nb(a0_f, w[mu]._fefunc, nu, mesh, homogeneous=homogeneousNBC)
 
         # iterate m
-        Lambda = w.active_indices()
+        I = w.index_set
+        i = I.index(mu)
         maxm = w.max_order
         if len(coeff_field) < maxm:
             logger.warning("insufficient length of coefficient field for MultiVector (%i < %i)", len(coeff_field), maxm)
@@ -163,15 +173,15 @@ class ResidualEstimator(object):
             res = -beta[0] * w[mu]
 
             # mu+1
-            mu1 = mu.inc(m)
-            if mu1 in Lambda:
-                w_mu1 = w.get_projection(mu1, mu)
+            j = I.plus[i, m]
+            if j >= 0:
+                w_mu1 = w.get_projection(I[j], mu)
                 res += beta[1] * w_mu1
 
             # mu-1
-            mu2 = mu.dec(m)
-            if mu2 in Lambda:
-                w_mu2 = w.get_projection(mu2, mu)
+            j = I.minus[i, m]
+            if j >= 0:
+                w_mu2 = w.get_projection(I[j], mu)
                 res += beta[-1] * w_mu2
 
             # add volume contribution for m
@@ -240,8 +250,8 @@ class ResidualEstimator(object):
 
 
     @classmethod
-    @takes(anything, MultiVectorWithProjection, CoefficientField, anything, optional(float), optional(bool), optional(int))
-    def evaluateProjectionError(cls, w, coeff_field, pde, maxh=0.0, local=True, projection_degree_increase=1, refine_mesh=1):
+    @takes(anything, MultiVectorWithProjection, CoefficientField, anything, optional(float), optional(bool), optional(int), optional(int), optional(int))
+    def evaluateProjectionError(cls, w, coeff_field, pde, maxh=0.0, local=True, projection_degree_increase=1, refine_mesh=1, processes=1):
         """Evaluate the projection error according to EGSZ (4.8).
 
         The global projection error
@@ -266,14 +276,16 @@ class ResidualEstimator(object):
             proj_error = {}
         Lambda = w.active_indices()
         if len(Lambda) > 1:
-            for mu in Lambda:
-                maxm = w.max_order
-                if len(coeff_field) < maxm:
-                    logger.warning("insufficient length of coefficient field for MultiVector (%i < %i)",
-                        len(coeff_field), maxm)
-                    maxm = len(coeff_field)
-                zeta_mu = [cls.evaluateLocalProjectionError(w, mu, m, coeff_field, pde, Lambda, maxh, local, projection_degree_increase, refine_mesh)
-                                for m in range(maxm)]
+            maxm = w.max_order
+            if len(coeff_field) < maxm:
+                logger.warning("insufficient length of coefficient field for MultiVector (%i < %i)",
+                    len(coeff_field), maxm)
+                maxm = len(coeff_field)
+            zeta = fork_map(lambda mu: [cls.evaluateLocalProjectionError(w, mu, m, coeff_field, pde, Lambda, maxh, local,
+                                                                         projection_degree_increase, refine_mesh)
+                                        for m in range(maxm)],
+                            Lambda, processes)
+            for mu, zeta_mu in zip(Lambda, zeta):
                 dmu = sum(zeta_mu)
                 if local:
                     proj_error[mu] = FlatVector(dmu)
@@ -478,15 +490,17 @@ class ResidualEstimator(object):
         Lambda = w.active_indices()
         M = min(w.max_order + add_maxm, len(coeff_field))
         ainfty = prepare_ainfty(Lambda, M)
+        I = w.index_set
         for mu in Lambda:
+            i = I.index(mu)
             # evaluate energy norm of w[mu]
             norm_w = energynorm(w[mu]._fefunc)
             logger.debug("NEW MI with mu = %s    norm(w) = %s", mu, norm_w)
             # iterate multiindex extensions
             for m in range(M):
-                mu1 = mu.inc(m)
-                if mu1 in Lambda:
+                if m < I.M and I.plus[i, m] >= 0:
                     continue
+                mu1 = mu.inc(m)
                 _, am_rv = coeff_field[m]
                 beta = am_rv.orth_polys.get_beta(mu1[m])
 
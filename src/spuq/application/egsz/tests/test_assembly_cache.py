@@ -0,0 +1,88 @@
+import numpy as np
+
+from spuq.application.egsz.assembly_cache import AssemblyCache
+from spuq.linalg.basis import CanonicalBasis
+from spuq.linalg.operator import DiagonalMatrixOperator
+from spuq.utils.testing import assert_equal, assert_true, skip_if, test_main
+
+try:
+    from dolfin import FunctionSpace, UnitSquare
+    from spuq.fem.fenics.fenics_basis import FEniCSBasis
+    HAVE_FENICS = True
+except:
+    HAVE_FENICS = False
+
+
+class FingerprintBasis(CanonicalBasis):
+    def __init__(self, dim, fingerprint):
+        CanonicalBasis.__init__(self, dim)
+        self.fingerprint = fingerprint
+
+
+def count_assemble():
+    calls = []
+    def assemble(basis, coeff):
+        calls.append((basis, coeff))
+        return DiagonalMatrixOperator(coeff * np.ones(basis.dim), domain=basis, codomain=basis)
+    return assemble, calls
+
+
+def test_hits_misses():
+    assemble, calls = count_assemble()
+    cache = AssemblyCache()
+    B1 = FingerprintBasis(3, "mesh1")
+    B2 = FingerprintBasis(3, "mesh1")
+    A0 = cache.assemble(assemble, B1, 2.0)
+    assert_true(cache.assemble(assemble, B2, 2.0) is A0)
+    cache.assemble(assemble, B1, 3.0, 0)
+    cache.assemble(assemble, B1, 3.0, 0)
+    assert_equal(len(calls), 2)
+    assert_equal(cache.stats["hits"], 2)
+    assert_equal(cache.stats["misses"], 2)
+    assert_equal(cache.nbytes, 2 * 3 * 8)
+
+
+def test_no_fingerprint():
+    assemble, calls = count_assemble()
+    cache = AssemblyCache()
+    B = CanonicalBasis(3)
+    cache.assemble(assemble, B, 2.0)
+    cache.assemble(assemble, B, 2.0)
+    assert_equal(len(calls), 2)
+    assert_equal(len(cache), 0)
+
+
+def test_invalidate():
+    assemble, calls = count_assemble()
+    cache = AssemblyCache()
+    B1 = FingerprintBasis(3, "mesh1")
+    B2 = FingerprintBasis(4, "mesh2")
+    Bj = FingerprintBasis(5, "joint")
+    cache.assemble(assemble, B1, 2.0)
+    cache.assemble(assemble, B2, 2.0)
+    cache.assemble(assemble, Bj, 2.0, depends=[B1, B2])
+    assert_equal(len(cache), 3)
+    cache.invalidate(B2)
+    assert_equal(len(cache), 1)
+    cache.assemble(assemble, B1, 2.0)
+    assert_equal(len(calls), 3)
+    cache.invalidate()
+    assert_equal(len(cache), 0)
+    assert_equal(cache.nbytes, 0)
+
+
+@skip_if(not HAVE_FENICS)
+def test_joint_basis():
+    cache = AssemblyCache()
+    B1 = FEniCSBasis(FunctionSpace(UnitSquare(3, 3), "CG", 1))
+    B2 = FEniCSBasis(FunctionSpace(UnitSquare(5, 5), "CG", 1))
+    V1 = cache.joint_basis(B1, [B1, B2])
+    V2 = cache.joint_basis(B2, [B2, B1])
+    assert_true(V1 is V2)
+    assert_equal(cache.stats["joint_misses"], 1)
+    assert_equal(cache.stats["joint_hits"], 1)
+    cache.invalidate(B1)
+    assert_equal(cache.stats["joint_entries"], 0)
+
+
+test_main()
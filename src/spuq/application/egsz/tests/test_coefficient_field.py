@@ -3,6 +3,7 @@ import numpy as np
 from spuq.utils.testing import *
 from spuq.linalg.function import ConstFunction, SimpleFunction
 from spuq.stochastics.random_variable import NormalRV, UniformRV, ArcsineRV
+from spuq.math_utils.multiindex import Multiindex
 from spuq.application.egsz.coefficient_field import ListCoefficientField, ParametricCoefficientField
 
 
@@ -76,5 +77,27 @@ def test_parametric():
     assert_equal(cf[17], (csf, nrv))
 
 
+def test_eval_basis():
+    a1 = [SimpleFunction(np.sin), SimpleFunction(np.cos), SimpleFunction(np.sin)]
+    rvs = [UniformRV(), ArcsineRV(), UniformRV(a=0, b=2)]
+    cf = ListCoefficientField(ConstFunction(1), a1, rvs)
+    Lambda = [Multiindex(), Multiindex([2]), Multiindex([1, 3]), Multiindex([0, 1, 2])]
+    X = np.random.uniform(-1, 1, (7, 3))
+    values = cf.eval_basis(Lambda, X, chunk_size=3)
+    assert_equal(values.shape, (4, 7))
+    for i, mu in enumerate(Lambda):
+        for j in range(7):
+            ref = np.prod([rvs[m].orth_polys[mu[m]](X[j, m]) for m in range(len(mu))])
+            assert_almost_equal(values[i, j], ref)
+    sample_map, _ = cf.sample_realization(Lambda, list(X[0]))
+    for i, mu in enumerate(Lambda):
+        assert_almost_equal(sample_map[mu], values[i, 0])
+    # empty sets of multiindices
+    assert_equal(cf.eval_basis([], X).shape, (0, 7))
+    sample_map, RV_samples = cf.sample_realization([], list(X[0]))
+    assert_equal(sample_map, {})
+    assert_equal(RV_samples, list(X[0]))
+
+
 test_main()
 
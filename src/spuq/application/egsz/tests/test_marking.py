@@ -0,0 +1,55 @@
+import numpy as np
+
+from spuq.utils.testing import *
+from spuq.application.egsz.marking import Marking, doerfler_indices
+from spuq.application.egsz.multi_vector import MultiVector
+from spuq.linalg.vector import FlatVector
+from spuq.math_utils.multiindex import Multiindex
+
+
+def doerfler_sorted(values, target):
+    # reference implementation: walk through the sorted values
+    idx = np.argsort(-values, kind="mergesort")
+    marked, s = [], 0.0
+    for i in idx:
+        if s >= target:
+            break
+        marked.append(i)
+        s += values[i]
+    return marked
+
+
+def test_doerfler_indices():
+    values = np.random.random(5000)
+    for theta in [0.0, 0.1, 0.5, 0.9, 1.0]:
+        target = theta * values.sum()
+        ind = doerfler_indices(values, target)
+        assert_equal(sorted(ind), sorted(doerfler_sorted(values, target)))
+    assert_equal(len(doerfler_indices(np.array([1.0, 3.0, 2.0]), 3.5)), 2)
+
+
+def test_mark_residual():
+    resind = MultiVector()
+    mu0, mu1 = Multiindex(), Multiindex([1])
+    resind[mu0] = FlatVector([4.0, 1.0, 0.5])
+    resind[mu1] = FlatVector([0.1, 3.0])
+    markers = Marking.mark_residual(resind, 0.5)
+    assert_true(sorted(markers.keys()) == [mu0, mu1])
+    assert_equal(list(markers[mu0]), [0])
+    assert_equal(list(markers[mu1]), [1])
+    markers = Marking.mark_residual(resind, 0.4)
+    assert_true(markers.keys() == [mu0])
+
+
+def test_mark_projection():
+    projind = MultiVector()
+    mu0, mu1 = Multiindex(), Multiindex([1])
+    projind[mu0] = FlatVector([4.0, 1.0, 0.5])
+    projind[mu1] = FlatVector([0.1, 3.0])
+    markers, max_zeta = Marking.mark_projection(projind, 0.5)
+    assert_equal(max_zeta, 4.0)
+    assert_equal(list(markers[mu0]), [0])
+    assert_equal(list(markers[mu1]), [1])
+
+
+test_main()
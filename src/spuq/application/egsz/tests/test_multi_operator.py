@@ -1,13 +1,15 @@
 from __future__ import division
 import numpy as np
+import scipy.sparse as sps
 import logging
 
 from spuq.application.egsz.multi_vector import MultiVector, MultiVectorWithProjection
-from spuq.application.egsz.multi_operator import MultiOperator
+from spuq.application.egsz.multi_operator import MultiOperator, PreconditioningOperator
 from spuq.application.egsz.coefficient_field import CoefficientField, ListCoefficientField
 from spuq.linalg.basis import CanonicalBasis
 from spuq.linalg.vector import FlatVector
 from spuq.linalg.operator import DiagonalMatrixOperator, MultiplicationOperator, evaluate_operator_matrix
+from spuq.linalg.scipy_operator import ScipySolveOperator
 from spuq.linalg.function import ConstFunction, SimpleFunction
 from spuq.stochastics.random_variable import NormalRV, UniformRV
 from spuq.polyquad.polynomials import LegendrePolynomials, StochasticHermitePolynomials
@@ -241,5 +243,35 @@ def test_matrixization():
     A_mat = evaluate_operator_matrix(A_linear)
 #    print A_mat
 
+def test_preconditioner():
+    N = 5
+    mats = []
+
+    class FingerprintBasis(CanonicalBasis):
+        fingerprint = "mesh"
+
+    class LaplaceSolveOperator(object):
+        def __init__(self, basis, coeff):
+            self.basis = basis
+            self.matrix = coeff * sps.diags([-np.ones(N - 1), 2 * np.ones(N), -np.ones(N - 1)], [-1, 0, 1])
+            mats.append(self.matrix)
+
+        def as_scipy_operator(self):
+            return ScipySolveOperator(self.matrix.tocsr(), self.basis, self.basis)
+
+    basis = FingerprintBasis(N)
+    w = MultiVector()
+    mis = [Multiindex(), Multiindex([1]), Multiindex([0, 2])]
+    for mu in mis:
+        w[mu] = FlatVector(np.random.random(N), basis)
+
+    P = PreconditioningOperator(2.0, LaplaceSolveOperator)
+    v = P * w
+    v = P * w
+    # one factorization for all multiindices and applications
+    assert_equal(len(mats), 1)
+    for mu in mis:
+        assert_almost_equal(mats[0] * v[mu].coeffs, w[mu].coeffs)
+
 
 test_main()
@@ -0,0 +1,143 @@
+from __future__ import division
+import numpy as np
+import scipy.sparse as sps
+import scipy.sparse.linalg as spsla
+
+from spuq.application.egsz.multi_vector import MultiVectorSharedBasis
+from spuq.application.egsz.multi_operator2 import MultiOperator, APPLY_TYPE
+from spuq.application.egsz.coefficient_field import ListCoefficientField
+from spuq.linalg.basis import CanonicalBasis
+from spuq.linalg.vector import FlatVector
+from spuq.linalg.scipy_operator import ScipyOperator
+from spuq.linalg.scipy_adapter import as_linear_operator
+from spuq.linalg.tt_operator import TTOperator
+from spuq.linalg.function import ConstFunction
+from spuq.stochastics.random_variable import UniformRV, BetaRV
+from spuq.utils.testing import *
+from spuq.math_utils.multiindex import Multiindex
+
+
+N = 5
+_matrices = {}
+
+
+def scipy_assemble(basis, func):
+    # fixed random sparse matrix per coefficient function
+    if func not in _matrices:
+        _matrices[func] = sps.rand(N, N, density=0.5, format="csr", random_state=len(_matrices)) + sps.eye(N)
+    M = _matrices[func]
+    return ScipyOperator(M, domain=basis, codomain=basis)
+
+
+def scipy_assemble_A(func, basis):
+    # argument order of the assemblers used by apply_A
+    return scipy_assemble(basis, func)
+
+
+def _setup():
+    a = [ConstFunction(3.0), ConstFunction(4.0)]
+    rvs = [UniformRV(), BetaRV(alpha=2, beta=3)]
+    coeff_field = ListCoefficientField(ConstFunction(2.0), a, rvs)
+    mis = [Multiindex(), Multiindex([1]), Multiindex([0, 1]), Multiindex([2]), Multiindex([1, 1])]
+    basis = CanonicalBasis(N)
+    w = MultiVectorSharedBasis()
+    for mu in mis:
+        w[mu] = FlatVector(np.random.random(N), basis)
+    return coeff_field, w
+
+
+def _apply_loop(coeff_field, w):
+    A0 = _matrices[coeff_field.mean_func]
+    v = {}
+    for mu in w.active_indices():
+        cur_v = A0 * w[mu].coeffs
+        for m in range(len(coeff_field)):
+            am_f, am_rv = coeff_field[m]
+            beta = am_rv.orth_polys.get_beta(mu[m])
+            cur_w = -beta[0] * w[mu].coeffs
+            if mu.inc(m) in w.keys():
+                cur_w += beta[1] * w[mu.inc(m)].coeffs
+            if mu.dec(m) is not None and mu.dec(m) in w.keys():
+                cur_w += beta[-1] * w[mu.dec(m)].coeffs
+            cur_v += _matrices[am_f] * cur_w
+        v[mu] = cur_v
+    return v
+
+
+def test_apply_global():
+    coeff_field, w = _setup()
+    for apply_type in [APPLY_TYPE.GLOBAL, APPLY_TYPE.TENSOR]:
+        A = MultiOperator(coeff_field, scipy_assemble, apply_type=apply_type)
+        v = A.apply(w)
+        v_ex = _apply_loop(coeff_field, w)
+        for mu in w.active_indices():
+            assert_array_almost_equal(v[mu].coeffs, v_ex[mu])
+        A = MultiOperator(coeff_field, scipy_assemble_A, apply_type=apply_type)
+        assert_array_almost_equal(A.apply_A(w)[Multiindex([1])].coeffs, v_ex[Multiindex([1])])
+
+
+def test_global_matrix():
+    coeff_field, w = _setup()
+    A = MultiOperator(coeff_field, scipy_assemble, apply_type=APPLY_TYPE.GLOBAL)
+    G = A.global_matrix(w)
+    assert_equal(G.shape, (len(w) * N, len(w) * N))
+    assert_true(A.global_matrix(w) is G)
+    K = A.stochastic_matrices(w.index_set, 2)
+    assert_equal(len(K), 2)
+    # symmetric for orthonormal polynomials
+    assert_array_almost_equal(K[1].toarray(), K[1].toarray().T)
+    # tensor operator acts on the matrix of coefficients
+    T = A.tensor_operator(w)
+    assert_equal(T.dim, (N, len(w), 3))
+    # bases with the same fingerprint share the assembled matrices
+    class FingerprintBasis(CanonicalBasis):
+        fingerprint = ("canonical", N)
+    calls = []
+    def counting_assemble(basis, func):
+        calls.append(func)
+        return scipy_assemble(basis, func)
+    A = MultiOperator(coeff_field, counting_assemble, apply_type=APPLY_TYPE.GLOBAL)
+    mats = A.spatial_matrices(FingerprintBasis(N), 2)
+    assert_equal(len(calls), 3)
+    assert_true(A.spatial_matrices(FingerprintBasis(N), 2)[0] is mats[0])
+    assert_equal(len(calls), 3)
+
+
+def test_tt_operator():
+    coeff_field, _ = _setup()
+    degrees = [2, 1]
+    basis = CanonicalBasis(N)
+    w = MultiVectorSharedBasis()
+    for mu in np.ndindex(*[d + 1 for d in degrees]):
+        w[Multiindex(list(mu))] = FlatVector(np.zeros(N), basis)
+    A = MultiOperator(coeff_field, scipy_assemble, apply_type=APPLY_TYPE.GLOBAL)
+    G = A.global_matrix(w).toarray()
+    mats = [scipy_assemble(basis, coeff_field.mean_func).matrix]
+    mats += [scipy_assemble(basis, coeff_field[m][0]).matrix for m in range(2)]
+    polysys = [coeff_field[m][1].orth_polys for m in range(2)]
+    T = TTOperator.from_triples(mats, polysys, degrees)
+    # global matrix: blocks of multiindices by id, TT: spatial index first
+    I = w.index_set
+    perm = [np.ravel_multi_index((i, I[j][0], I[j][1]), (N, 3, 2)) for j in range(len(I)) for i in range(N)]
+    assert_array_almost_equal(T.as_matrix().toarray()[np.ix_(perm, perm)], G)
+
+
+def test_linear_operator():
+    coeff_field, w = _setup()
+    A = MultiOperator(coeff_field, scipy_assemble, apply_type=APPLY_TYPE.GLOBAL)
+    L = as_linear_operator(A, w)
+    assert_equal(L.shape, (len(w) * N, len(w) * N))
+    x = w.as_array()
+    # as_array is ordered by active_indices, global_matrix by the ids of index_set
+    I = w.index_set
+    perm = np.concatenate([I.index(mu) * N + np.arange(N) for mu in w.active_indices()])
+    G = A.global_matrix(w)[perm][:, perm]
+    assert_array_almost_equal(L.matvec(x), G * x)
+    b = np.random.random(len(w) * N)
+    x, info = spsla.gmres(L, b, tol=1e-12, restart=len(b))
+    assert_equal(info, 0)
+    v = L.to_vector(x)
+    assert_array_almost_equal(A.apply(v).as_array(), b)
+
+
+test_main()
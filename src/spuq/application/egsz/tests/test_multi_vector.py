@@ -2,10 +2,10 @@ import numpy as np
 import logging
 
 from spuq.utils.testing import *
-from spuq.application.egsz.multi_vector import MultiVector, MultiVectorWithProjection
+from spuq.application.egsz.multi_vector import MultiVector, MultiVectorWithProjection, MultiVectorSharedBasis
 from spuq.math_utils.multiindex import Multiindex
 from spuq.math_utils.multiindex_set import MultiindexSet
-from spuq.linalg.vector import FlatVector
+from spuq.linalg.vector import FlatVector, inner
 
 # setup logging
 logging.basicConfig(filename=__file__[:-2] + 'log', level=logging.INFO)
@@ -166,4 +166,150 @@ def test_mvwp_project():
 
     # TODO: clearing of the cache needs to tested
 
+
+def test_pack():
+    mv1 = MultiVector()
+    mv2 = MultiVector()
+    mis1 = MultiindexSet.createCompleteOrderSet(3, 4)
+    mv1.set_defaults(mis1, FlatVector([3, 4, 5]))
+    mv2.set_defaults(mis1, FlatVector([6, 8, 10]))
+    ref = mv1 + mv2
+    assert_true(mv1.pack())
+    assert_true(mv2.pack())
+    assert_true(mv1.is_contiguous)
+    # vectors are views into the buffer
+    mu = Multiindex([1, 2, 1])
+    mv1[mu].coeffs[0] = 7
+    assert_equal(mv1.flatten().coeffs[mv1._offsets[mu][0]], 7)
+    mv1[mu].coeffs[0] = 3
+    assert_true(mv1 + mv2 == ref)
+    assert_true((mv1 + mv2).is_contiguous)
+    assert_almost_equal(inner(mv1, mv2), 2 * 50 * len(mis1))
+    assert_almost_equal(mv1.norm(), np.sqrt(50 * len(mis1)))
+    assert_true(-mv1 == -1 * mv2 * 0.5)
+    # flattening does not copy
+    F = mv1.flatten()
+    assert_true(F.coeffs is mv1._buffer)
+    # copies have their own buffer
+    mv3 = mv1.copy()
+    mv3 *= 2
+    assert_true(mv3 == mv2)
+    assert_equal(mv1[mu], FlatVector([3, 4, 5]))
+    # setting a vector of the same dimension keeps contiguity
+    mv1[mu] = FlatVector([1, 1, 1])
+    assert_true(mv1.is_contiguous)
+    assert_equal(mv1[mu], FlatVector([1, 1, 1]))
+    mv1[mu].coeffs[0] = 2
+    assert_equal(mv1.flatten().coeffs[mv1._offsets[mu][0]], 2)
+    # new multiindices give up contiguity
+    mv1[Multiindex([5])] = FlatVector([1, 1, 1])
+    assert_false(mv1.is_contiguous)
+    assert_equal(mv1[mu], FlatVector([2, 1, 1]))
+
+
+def test_pack_assign():
+    mis = MultiindexSet.createCompleteOrderSet(1, 1)
+    m0 = Multiindex()
+    w1 = MultiVector()
+    w2 = MultiVector()
+    w1.set_defaults(mis, FlatVector([1, 2]))
+    w1[Multiindex([1])] = FlatVector([3, 4])
+    w2.set_defaults(mis, FlatVector([5, 6]))
+    assert_true(w1.pack())
+    assert_true(w2.pack())
+    # assigning a vector of a packed multivector copies its coefficients
+    v = w1[m0]
+    w2[m0] = v
+    assert_true(w1[m0] is v)
+    assert_true(w2[m0] is not v)
+    assert_true(w2.is_contiguous)
+    assert_array_equal(w2.as_array(), [1, 2, 5, 6])
+    w1[m0].coeffs[:] = 7
+    assert_array_equal(w1.as_array(), [7, 7, 3, 4])
+    assert_equal(w1.copy()[m0], FlatVector([7, 7]))
+    assert_equal(w2[m0], FlatVector([1, 2]))
+    # the stored vector is backed by the buffer
+    w2[m0].coeffs[0] = 8
+    assert_array_equal(w2.as_array(), [8, 2, 5, 6])
+
+
+def test_pack_assign_shared_basis():
+    m0 = Multiindex()
+    w = MultiVectorSharedBasis()
+    w[m0] = FlatVector([1, 2])
+    w[Multiindex([1])] = FlatVector([3, 4])
+    assert_true(w.pack())
+    v = FlatVector([5, 6])
+    w[m0] = v
+    assert_true(w.is_contiguous)
+    assert_true(w[m0] is not v)
+    # the stored vector is backed by the buffer
+    w *= 2
+    assert_array_equal(w.as_array(), [10, 12, 6, 8])
+    assert_equal(w[m0], FlatVector([10, 12]))
+    assert_equal(v, FlatVector([5, 6]))
+
+
+def test_index_set():
+    mv = MultiVector()
+    mv.set_defaults(MultiindexSet.createCompleteOrderSet(2, 1), FlatVector([1, 2]))
+    I = mv.index_set
+    assert_equal(len(I), 3)
+    assert_equal(I.plus[I.index(Multiindex())].tolist(), [I.index(Multiindex([1])), I.index(Multiindex([0, 1]))])
+    # new multiindices extend the neighbour tables
+    mv[Multiindex([1, 1])] = FlatVector([3, 4])
+    assert_true(mv.index_set is I)
+    i = I.index(Multiindex([1, 1]))
+    assert_equal(I.minus[i].tolist(), [I.index(Multiindex([0, 1])), I.index(Multiindex([1]))])
+    assert_equal(I.plus[I.index(Multiindex([1]))].tolist(), [-1, i])
+    # copies have their own tables
+    mv2 = mv.copy()
+    mv2[Multiindex([2])] = FlatVector([3, 4])
+    assert_equal(len(mv2.index_set), 5)
+    assert_equal(len(I), 4)
+
+
+def test_axpy():
+    mis1 = MultiindexSet.createCompleteOrderSet(3, 4)
+    for packed in [False, True]:
+        mv1 = MultiVector()
+        mv2 = MultiVector()
+        mv1.set_defaults(mis1, FlatVector([3, 4, 5]))
+        mv2.set_defaults(mis1, FlatVector([6, 8, 10]))
+        if packed:
+            mv1.pack()
+            mv2.pack()
+        mu = Multiindex([1, 2, 1])
+        coeffs = mv1[mu].coeffs
+        assert_true(mv1.axpy(2, mv2) is mv1)
+        assert_equal(mv1[mu], FlatVector([15, 20, 25]))
+        assert_true(mv1[mu].coeffs is coeffs)
+        mv1.axpby(1, mv2, -1)
+        assert_equal(mv1[mu], FlatVector([-9, -12, -15]))
+        mv1.xpay(mv2, 0.5)
+        assert_equal(mv1[mu], FlatVector([1.5, 2, 2.5]))
+        assert_almost_equal(mv1.axpy_inner(-1, mv1, mv2), 0)
+        assert_equal(mv1.is_contiguous, packed)
+
+
+def test_as_array():
+    mv = MultiVector()
+    mv.set_defaults(MultiindexSet.createCompleteOrderSet(2, 1), FlatVector([1, 2]))
+    mv[Multiindex([1])] = FlatVector([3, 4])
+    x = mv.as_array()
+    assert_array_equal(x, [1, 2, 1, 2, 3, 4])
+    # flattening does not pack the vector
+    assert_false(mv.is_contiguous)
+    assert_true(x is not mv.as_array())
+    # packed vectors share the array in both directions
+    assert_true(mv.pack())
+    x = mv.as_array()
+    assert_true(x is mv.as_array())
+    y = 2 * x
+    mv2 = mv.from_array(y)
+    assert_true(mv2.as_array() is y)
+    assert_equal(mv2[Multiindex([1])], FlatVector([6, 8]))
+    assert_true(mv2.index_set is not mv.index_set)
+
+
 test_main()
@@ -4,6 +4,8 @@ import numpy as np
 from spuq.utils.testing import *
 
 from spuq.application.egsz.pcg import pcg
+from spuq.application.egsz.multi_vector import MultiVector
+from spuq.math_utils.multiindex import Multiindex
 from spuq.linalg.operator import MatrixOperator, MatrixSolveOperator, MultiplicationOperator, DiagonalMatrixOperator
 from spuq.linalg.vector import FlatVector, inner
 from spuq.linalg.basis import CanonicalBasis
@@ -47,6 +49,36 @@ def test_pcg_matrix():
     #print x_ap
 
 
+def test_pcg_inplace():
+    rand = np.random.mtrand.RandomState(1234).random_sample
+
+    N = 7
+    A = DiagonalMatrixOperator(1 + rand((N,)))
+    P = MultiplicationOperator(1, CanonicalBasis(N))
+    x = FlatVector(rand((N,)))
+    b = A * x
+    w0 = 0 * x
+    x_ap, zeta, iter = pcg(A, b, P, w0, eps=1e-8)
+    assert_array_almost_equal(x.coeffs, x_ap.coeffs)
+    # the initial guess is not modified
+    assert_array_almost_equal(w0.coeffs, np.zeros(N))
+
+
+def test_pcg_multivector():
+    rand = np.random.mtrand.RandomState(1234).random_sample
+
+    N = 3
+    A = MultiplicationOperator(2, CanonicalBasis(N))
+    P = MultiplicationOperator(1, CanonicalBasis(N))
+    b = MultiVector()
+    for mu in [Multiindex(), Multiindex([1]), Multiindex([0, 1])]:
+        b[mu] = FlatVector(rand((N,)))
+    x_ap, zeta, iter = pcg(A, b, P, 0 * b, eps=1e-8)
+    # the iterates are stored in one contiguous buffer
+    assert_true(x_ap.is_contiguous)
+    assert_array_almost_equal(x_ap.as_array(), 0.5 * b.as_array())
+
+
 logger = logging.getLogger("spuq")
 logger.setLevel(logging.WARNING)
 
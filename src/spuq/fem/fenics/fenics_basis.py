@@ -1,9 +1,13 @@
-from dolfin import FunctionSpace, VectorFunctionSpace, FunctionSpaceBase, Function, TestFunction, TrialFunction, CellFunction, assemble, dx, refine, cells, nabla_grad
+from dolfin import FunctionSpace, VectorFunctionSpace, FunctionSpaceBase, Function, TestFunction, TrialFunction, CellFunction, assemble, dx, refine, cells, nabla_grad, inner, Cell, Point
 import dolfin
 import numpy as np
+import scipy.sparse as sps
+import scipy.sparse.linalg as spsla
+from hashlib import sha1
 
 from spuq.utils.type_check import takes, anything, optional
 from spuq.utils.enum import Enum
+from spuq.utils.lru_cache import LRUCache, nbytes_of
 from spuq.linalg.operator import MatrixOperator
 from spuq.fem.fem_basis import FEMBasis
 from spuq.linalg.basis import CanonicalBasis
@@ -13,12 +17,124 @@ dolfin.parameters["allow_extrapolation"] = True
 
 PROJECTION = Enum('INTERPOLATION', 'L2PROJECTION')
 
+# element families with point evaluation dofs, for which transfer matrices can be set up
+NODAL_FAMILIES = ("Lagrange", "Discontinuous Lagrange")
+
+# point location and element evaluation changed with FEniCS 1.3 (bounding box trees and
+# vertex coordinates instead of the intersection operator and ufc cells), both are supported
+HAVE_BOUNDING_BOX_TREE = hasattr(dolfin.Mesh, "bounding_box_tree") and hasattr(Cell, "get_vertex_coordinates")
+HAVE_TRANSFER_MATRICES = HAVE_BOUNDING_BOX_TREE or hasattr(dolfin.Mesh, "intersection_operator")
+
+
+def _as_scipy_matrix(A):
+    rows, cols, values = A.data()
+    return sps.csr_matrix((values, cols, rows))
+
+
+def _sub_spaces(V):
+    if V.num_sub_spaces() > 0:
+        return [V.sub(i) for i in range(V.num_sub_spaces())]
+    else:
+        return [V]
+
+
+def _cell_locator(mesh):
+    """Return a function mapping points to the index of the containing (or
+    else the closest) cell of mesh."""
+    if HAVE_BOUNDING_BOX_TREE:
+        bbt = mesh.bounding_box_tree()
+        def locate(p):
+            cid = bbt.compute_first_entity_collision(p)
+            if cid >= mesh.num_cells():
+                cid = bbt.compute_closest_entity(p)[0]
+            return cid
+    else:
+        intersection = mesh.intersection_operator()
+        def locate(p):
+            cid = intersection.any_intersected_entity(p)
+            if cid < 0:
+                cid = intersection.closest_cell(p)
+            return cid
+    return locate
+
+
+def _evaluate_basis_all(element, values, x, cell):
+    if HAVE_BOUNDING_BOX_TREE:
+        element.evaluate_basis_all(values, x, cell.get_vertex_coordinates(), 0)
+    else:
+        element.evaluate_basis_all(values, x, dolfin.cpp.UFCCell(cell))
+
+
+def interpolation_matrix(Vsrc, Vdest, tol=1e-14):
+    """Return the nodal interpolation from Vsrc onto Vdest as sparse (CSR) matrix.
+
+    The entries are the values of the source basis functions at the dof
+    coordinates of Vdest. Points outside of the source mesh are
+    extrapolated from the closest cell."""
+    mesh = Vsrc.mesh()
+    locate = _cell_locator(mesh)
+    rows, cols, vals = [], [], []
+    for Vs, Vd in zip(_sub_spaces(Vsrc), _sub_spaces(Vdest)):
+        element = Vs.element()
+        dofmap_s, dofmap_d = Vs.dofmap(), Vd.dofmap()
+        values = np.zeros(element.space_dimension())
+        visited = set()
+        for c in cells(Vd.mesh()):
+            dofs = dofmap_d.cell_dofs(c.index())
+            coords = dofmap_d.tabulate_coordinates(c)
+            for j, x in zip(dofs, coords):
+                if j in visited:
+                    continue
+                visited.add(j)
+                cid = locate(Point(*x))
+                _evaluate_basis_all(element, values, x, Cell(mesh, cid))
+                rows.extend([j] * len(values))
+                cols.extend(dofmap_s.cell_dofs(cid))
+                vals.extend(values)
+    vals = np.array(vals)
+    vals[np.abs(vals) < tol] = 0
+    T = sps.csr_matrix((vals, (rows, cols)), shape=(Vdest.dim(), Vsrc.dim()))
+    T.eliminate_zeros()
+    return T
+
+
+def l2_projection_transfer(Vsrc, Vdest):
+    """Return the L2 projection from Vsrc onto Vdest as pair (B, lu) such that
+    the projection of coefficients x is lu.solve(B * x).
+
+    As with dolfin.project, the source function is represented on the cells of
+    the destination mesh by the discontinuous version of its element."""
+    ufl = Vsrc.ufl_element()
+    if Vsrc.num_sub_spaces() > 0:
+        Q = VectorFunctionSpace(Vdest.mesh(), "DG", ufl.degree())
+    else:
+        Q = FunctionSpace(Vdest.mesh(), "DG", ufl.degree())
+    IQ = interpolation_matrix(Vsrc, Q)
+    B = _as_scipy_matrix(assemble(inner(TrialFunction(Q), TestFunction(Vdest)) * dx))
+    M = _as_scipy_matrix(assemble(inner(TrialFunction(Vdest), TestFunction(Vdest)) * dx))
+    return (B * IQ).tocsr(), spsla.splu(M.tocsc())
+
+
+def _transfer_nbytes(T):
+    if isinstance(T, tuple):
+        B, lu = T
+        return nbytes_of(B) + nbytes_of(getattr(lu, "L", None)) + nbytes_of(getattr(lu, "U", None))
+    return nbytes_of(T)
+
+
+# marker for the transfer between identical bases
+IDENTITY_TRANSFER = object()
+
+# process-wide cache of transfer matrices between pairs of bases
+TRANSFER_CACHE = LRUCache(max_nbytes=512 * 2 ** 20, sizeof=_transfer_nbytes)
+
 class FEniCSBasis(FEMBasis):
 
     @takes(anything, FunctionSpaceBase, optional(anything))
     def __init__(self, fefs, ptype=PROJECTION.INTERPOLATION):
         self._fefs = fefs
         self._ptype = ptype
+        self._fingerprint = None
 
     def copy(self, degree=None, mesh=None):
         """Make a copy of self. The degree may be overriden optionally."""
@@ -69,7 +185,7 @@ class FEniCSBasis(FEMBasis):
         else:
             cell_markers.set_all(False)
             for cid in cell_ids:
-                cell_markers[cid] = True
+                cell_markers[int(cid)] = True
         new_mesh = refine(mesh, cell_markers)
 #        if isinstance(self._fefs, VectorFunctionSpace):
         if self._fefs.num_sub_spaces() > 1:
@@ -115,17 +231,80 @@ class FEniCSBasis(FEMBasis):
         import spuq.fem.fenics.fenics_vector as FV          # this circumvents circular inclusions
         if ptype is None:
             ptype = self._ptype
+        T = self.transfer_matrix(vec.basis, ptype)
+        if T is not None:
+            new_fefunc = Function(self._fefs)
+            new_fefunc.vector()[:] = self._apply_transfer(T, vec.array)
+        else:
+            new_fefunc = self._project_function(vec._fefunc, ptype)
+        new_vec = FV.FEniCSVector(new_fefunc)
+        new_vec._basis = self
+        return new_vec
+
+    @takes(anything, "FEniCSBasis", np.ndarray, anything)
+    def project_coeffs(self, src_basis, X, ptype=None):
+        """Project coefficients ``X`` of functions in ``src_basis`` onto this basis.
+
+        ``X`` is either a coefficient vector or a (dim x k) block of k coefficient vectors."""
+        if ptype is None:
+            ptype = self._ptype
+        assert X.shape[0] == src_basis.dim
+        T = self.transfer_matrix(src_basis, ptype)
+        if T is IDENTITY_TRANSFER:
+            return X.copy()
+        elif T is not None:
+            return self._apply_transfer(T, X)
+        # project coefficient vectors one by one
+        f = Function(src_basis._fefs)
+        Y = np.empty((self.dim,) + X.shape[1:])
+        for j in np.ndindex(X.shape[1:]):
+            f.vector()[:] = np.ascontiguousarray(X[(slice(None),) + j])
+            Y[(slice(None),) + j] = self._project_function(f, ptype).vector().array()
+        return Y
+
+    def _project_function(self, fefunc, ptype):
+        """Project a dolfin function onto this basis without transfer matrix."""
         if ptype == PROJECTION.INTERPOLATION:
-#            print "fenics_basis::project_onto"
-#            print vec._fefunc.value_size()
-#            print "sub spaces", self.num_sub_spaces
-#            print type(self._fefs)
-            new_fefunc = dolfin.interpolate(vec._fefunc, self._fefs)
+            return dolfin.interpolate(fefunc, self._fefs)
         elif ptype == PROJECTION.L2PROJECTION:
-            new_fefunc = dolfin.project(vec._fefunc, self._fefs)
+            return dolfin.project(fefunc, self._fefs)
         else:
             raise AttributeError
-        return FV.FEniCSVector(new_fefunc)
+
+    def transfer_matrix(self, src_basis, ptype=None):
+        """Return (cached) transfer from ``src_basis`` onto this basis, the identity
+        if both bases coincide or None if the elements (or the FEniCS version) do
+        not support transfer matrices."""
+        if ptype is None:
+            ptype = self._ptype
+        src_fp, dest_fp = src_basis.fingerprint, self.fingerprint
+        if src_fp == dest_fp:
+            return IDENTITY_TRANSFER
+        if not HAVE_TRANSFER_MATRICES:
+            return None
+        if src_basis.family not in NODAL_FAMILIES or self.family not in NODAL_FAMILIES:
+            return None
+        key = (src_fp, dest_fp, ptype)
+        T = TRANSFER_CACHE.get(key)
+        if T is None:
+            if ptype == PROJECTION.INTERPOLATION:
+                T = interpolation_matrix(src_basis._fefs, self._fefs)
+            elif ptype == PROJECTION.L2PROJECTION:
+                T = l2_projection_transfer(src_basis._fefs, self._fefs)
+            else:
+                raise AttributeError
+            TRANSFER_CACHE[key] = T
+        return T
+
+    @staticmethod
+    def _apply_transfer(T, X):
+        if T is IDENTITY_TRANSFER:
+            return X
+        elif isinstance(T, tuple):
+            B, lu = T
+            return lu.solve(B * X)
+        else:
+            return T * X
 
     @property
     def dim(self):
@@ -139,6 +318,16 @@ class FEniCSBasis(FEMBasis):
     def mesh(self):
         return self._fefs.mesh()
 
+    @property
+    def fingerprint(self):
+        """Hashable key identifying mesh and finite element of this basis."""
+        if self._fingerprint is None:
+            mesh = self.mesh
+            h = sha1(np.ascontiguousarray(mesh.coordinates()))
+            h.update(np.ascontiguousarray(mesh.cells()))
+            self._fingerprint = (h.hexdigest(), self.family, self.degree, self.num_sub_spaces)
+        return self._fingerprint
+
     @property
     def maxh(self):
         return self.mesh.hmax()
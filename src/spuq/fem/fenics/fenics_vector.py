@@ -6,6 +6,7 @@ from spuq.linalg.basis import check_basis
 from spuq.fem.fenics.fenics_basis import FEniCSBasis
 from spuq.fem.fem_vector import FEMVector
 
+import numpy as np
 import pickle
 import os
 import logging
@@ -20,6 +21,7 @@ class FEniCSVector(FEMVector):
     def __init__(self, fefunc):
         '''Initialise with coefficient vector and Function.'''
         self._fefunc = fefunc
+        self._basis = None
 
     @classmethod
     @takes(anything, FEniCSBasis)
@@ -40,7 +42,10 @@ class FEniCSVector(FEMVector):
     @property
     def basis(self):
         '''Return FEniCSBasis.'''
-        return FEniCSBasis(self._fefunc.function_space())
+        # the basis is kept since its fingerprint is used for caching projections
+        if self._basis is None:
+            self._basis = FEniCSBasis(self._fefunc.function_space())
+        return self._basis
 
     @property
     def dim(self):
@@ -81,9 +86,11 @@ class FEniCSVector(FEMVector):
     def _create_copy(self, coeffs):
         # TODO: remove create_copy and retain only copy()
         new_fefunc = Function(self._fefunc.function_space(), coeffs)
-        return self.__class__(new_fefunc)
+        new_vec = self.__class__(new_fefunc)
+        new_vec._basis = self._basis
+        return new_vec
 
-    @takes(anything, (set_of(int), sequence_of(int)))
+    @takes(anything, (set_of(int), sequence_of(int), np.ndarray))
     def refine(self, cell_ids=None, with_prolongation=False):
         (new_basis, prolongate, _) = self.basis.refine(cell_ids)
         if with_prolongation:
@@ -135,6 +142,20 @@ class FEniCSVector(FEMVector):
         self.coeffs *= other
         return self
 
+    @takes(anything, Scalar, "FEniCSVector")
+    def axpy(self, a, x):
+        check_basis(self.basis, x.basis)
+        self.coeffs.axpy(a, x.coeffs)
+        return self
+
+    @takes(anything, Scalar, "FEniCSVector", Scalar)
+    def axpby(self, a, x, b):
+        check_basis(self.basis, x.basis)
+        if b != 1:
+            self.coeffs *= b
+        self.coeffs.axpy(a, x.coeffs)
+        return self
+
     @takes(anything, "FEniCSVector")
     def __inner__(self, other):
         v1 = self._fefunc.vector()
@@ -210,3 +231,4 @@ class FEniCSVector(FEMVector):
         v = Function(V)
         v.vector()[:] = d['array']
         self._fefunc = v
+        self._basis = None
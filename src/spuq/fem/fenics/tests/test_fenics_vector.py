@@ -1,14 +1,16 @@
 import numpy as np
+import scipy.sparse as sps
 
 from spuq.utils.testing import *
 
 try:
     from dolfin import UnitSquare, FunctionSpace, Expression, interpolate, Function
-    from spuq.fem.fenics.fenics_basis import FEniCSBasis
+    from spuq.fem.fenics.fenics_basis import FEniCSBasis, HAVE_TRANSFER_MATRICES, TRANSFER_CACHE
     from spuq.fem.fenics.fenics_vector import FEniCSVector
     HAVE_FENICS = True
 except:
     HAVE_FENICS = False
+    HAVE_TRANSFER_MATRICES = False
 
 @skip_if(not HAVE_FENICS)
 def test_fenics_basis():
@@ -131,4 +133,28 @@ def test_fenics_vector_inner():
     assert_equal(vec.__inner__(vec), 1240)
 
 
+@skip_if(not HAVE_FENICS or not HAVE_TRANSFER_MATRICES)
+def test_fenics_transfer_matrix():
+    mesh1 = UnitSquare(3, 3)
+    mesh2 = UnitSquare(5, 4)
+    basis1 = FEniCSBasis(FunctionSpace(mesh1, "CG", 2))
+    basis2 = FEniCSBasis(FunctionSpace(mesh2, "CG", 1))
+    ex = Expression("1.+x[0]*x[1]")
+    vec1 = FEniCSVector(interpolate(ex, basis1._fefs))
+    vec2 = basis2.project_onto(vec1)
+    assert_equal(vec2.basis, basis2)
+    assert_almost_equal(vec2.array, interpolate(ex, basis2._fefs).vector().array())
+    # transfer matrix is cached and applicable to blocks of coefficient vectors
+    T = basis2.transfer_matrix(basis1)
+    assert_true(sps.isspmatrix(T))
+    assert_equal(T.shape, (basis2.dim, basis1.dim))
+    hits = TRANSFER_CACHE.hits
+    assert_true(basis2.transfer_matrix(basis1) is T)
+    assert_equal(TRANSFER_CACHE.hits, hits + 1)
+    X = np.column_stack([vec1.array, 2 * vec1.array])
+    Y = basis2.project_coeffs(basis1, X)
+    assert_almost_equal(Y[:, 0], vec2.array)
+    assert_almost_equal(Y[:, 1], 2 * vec2.array)
+
+
 test_main(True)
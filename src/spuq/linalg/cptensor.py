@@ -1,3 +1,16 @@
+"""Tensors in canonical polyadic (CP) format.
+
+A `CPTensor` of order 2 and rank r represents the matrix U V^T with
+factors U (I x r) and V (J x r). Sums concatenate the factors, hence the
+rank grows with every addition. Tensors created with a rounding
+tolerance ``tol`` and/or a ``max_rank`` are rounded automatically after
+additions and operator applications (see `round`), which keeps the memory
+of iterative solvers at O(r (I + J)).
+
+Inner products and norms are computed from the Gram matrices of the
+factors and never form the full tensor.
+"""
+
 import numpy as np
 from spuq.linalg.vector import Scalar
 from spuq.linalg.operator import ComponentOperator
@@ -7,15 +20,38 @@ from spuq.utils.type_check import takes, sequence_of, anything
 
 
 class CPTensor(TensorVector):
-    def __init__(self, X, basis):
+    # rounding is done with Gram matrices if the rank is smaller than
+    # this fraction of the dimensions
+    GRAM_RATIO = 0.1
+
+    def __init__(self, X, basis, tol=None, max_rank=None):
         super(CPTensor, self).__init__(basis)
         self._X = X
+        self._tol = tol
+        self._max_rank = max_rank
+
+    @property
+    def tol(self):
+        """Relative tolerance of the automatic rounding (None for no rounding)."""
+        return self._tol
+
+    @property
+    def max_rank(self):
+        """Maximum rank of the automatic rounding (None for no limit)."""
+        return self._max_rank
+
+    @property
+    def auto_round(self):
+        return self._tol is not None or self._max_rank is not None
+
+    def _new(self, X):
+        return self.__class__(X, self._basis, self._tol, self._max_rank)
 
     @takes(anything, ComponentOperator, int)
     def apply_to_dim(self, A, axis):
         Y = [x for x in self._X]
         Y[axis] = A.apply_to_matrix(self._X[axis])
-        return self.__class__(Y, self._basis)
+        return self._new(Y)
 
     def __eq__(self, other):  # pragma: no cover
         """Test whether vectors are equal."""
@@ -30,11 +66,13 @@ class CPTensor(TensorVector):
         """Compute the negative of this vector."""
         Y = [x for x in self._X]
         Y[0] = -Y[0]
-        return CPTensor(Y, self.basis)
+        return self._new(Y)
 
     def __iadd__(self, other):  # pragma: no cover
-        """Add another vector to this one."""
+        """Add another vector to this one (and round if auto_round is set)."""
         self._X = [np.hstack([x1, x2]) for x1, x2 in zip(self._X, other._X)]
+        if self.auto_round:
+            self._X = self.round()._X
         return self
 
     def __imul__(self, other):  # pragma: no cover
@@ -46,10 +84,18 @@ class CPTensor(TensorVector):
             raise TypeError
 
     def __inner__(self, other):
-        assert self.order == 2
-        X = self._X
-        Y = other._X
-        return np.sum(np.dot(X[0].T, Y[0]) * np.dot(X[1].T, Y[1]))
+        if not isinstance(other, CPTensor):
+            return NotImplemented
+        assert self.order == other.order
+        # Hadamard product of the Gram matrices of the factors
+        G = np.dot(self._X[0].T, other._X[0])
+        for x, y in zip(self._X[1:], other._X[1:]):
+            G *= np.dot(x.T, y)
+        return np.sum(G)
+
+    def norm(self):
+        """Return the Frobenius norm computed from the Gram matrices."""
+        return np.sqrt(max(self.__inner__(self), 0.0))
 
     @property
     def order(self):
@@ -59,17 +105,39 @@ class CPTensor(TensorVector):
     def rank(self):
         return self._X[0].shape[1]
 
-    def truncate(self, R):
+    def round(self, tol=None, max_rank=None):
+        """Return the tensor with the smallest rank (at most max_rank)
+        which approximates this tensor up to the relative tolerance tol
+        in the Frobenius norm (defaults are the rounding parameters of
+        the tensor). The singular values are put into the first factor.
+
+        Factors are orthogonalised by QR decompositions or, if the rank
+        is much smaller than the dimensions, from the eigendecompositions
+        of their Gram matrices."""
         assert self.order == 2
-        R = min(R, self.rank)
-        Q1, R1 = np.linalg.qr(self._X[0])
-        Q2, R2 = np.linalg.qr(self._X[1])
-        U, s, V_T = np.linalg.svd(np.dot(R1, R2.T), full_matrices=False)
-        V = V_T.T
-        U = np.dot(U, np.diag(s))
-        X1 = np.dot(Q1, U)[:, :R]
-        X2 = np.dot(Q2, V)[:, :R]
-        return CPTensor([X1, X2], self.basis)
+        tol = self._tol if tol is None else tol
+        max_rank = self._max_rank if max_rank is None else max_rank
+        U, V = self._X
+        r = self.rank
+        if r < self.GRAM_RATIO * min(U.shape[0], V.shape[0]):
+            (Q1, R1), (Q2, R2) = _gram_orth(U), _gram_orth(V)
+        else:
+            (Q1, R1), (Q2, R2) = np.linalg.qr(U), np.linalg.qr(V)
+        P, s, W_T = np.linalg.svd(np.dot(R1, R2.T), full_matrices=False)
+        k = len(s)
+        if tol:
+            # smallest k with || s[k:] || <= tol * || s ||
+            tail = np.sqrt(np.cumsum(s[::-1] ** 2))[::-1]
+            k = int(np.sum(tail > tol * tail[0])) if len(s) and tail[0] > 0 else 0
+        if max_rank is not None:
+            k = min(k, max_rank)
+        k = max(k, 1)
+        X1 = np.dot(Q1, P[:, :k] * s[:k])
+        X2 = np.dot(Q2, W_T[:k].T)
+        return self._new([X1, X2])
+
+    def truncate(self, R):
+        return self.round(tol=0, max_rank=R)
 
     def flatten(self):
         # TODO: implement for higher-order tensors
@@ -79,3 +147,16 @@ class CPTensor(TensorVector):
 
     def to_full(self):
         return self.flatten()
+
+
+def _gram_orth(X):
+    """Return Q, R with X = Q R and orthonormal columns Q from the
+    eigendecomposition of the Gram matrix X^T X (directions with
+    negligible eigenvalues are dropped)."""
+    d, E = np.linalg.eigh(np.dot(X.T, X))
+    keep = d > max(d.max(), 0.0) * 1e-14 * len(d)
+    if not keep.any():
+        keep[-1] = True
+        d[-1] = 1.0
+    d, E = np.sqrt(d[keep]), E[:, keep]
+    return np.dot(X, E / d), (E * d).T
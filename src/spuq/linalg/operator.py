@@ -2,6 +2,7 @@ from abc import ABCMeta, abstractproperty, abstractmethod
 import time
 
 import numpy as np
+import scipy.sparse as sps
 
 from spuq.utils import with_equality
 from spuq.utils.type_check import takes, returns, anything, optional, list_of
@@ -84,6 +85,15 @@ class Operator(object):
         """Return the operator in matrix form"""
         raise NotImplementedError
 
+    def _fusion_matrix(self):
+        """Return the sparse matrix of the operator if terms of this type
+        can be pre-added in a `SummedOperator`, None otherwise"""
+        return None
+
+    def _with_matrix(self, M):  # pragma: no cover
+        """Return an operator of this type with the matrix M (see _fusion_matrix)"""
+        raise NotImplementedError
+
     @takes(anything, (Scalar, Vector, "Operator"))
     def __mul__(self, other):
         """Multiply the operator with a scalar, with another operator,
@@ -157,11 +167,52 @@ class BaseOperator(Operator):
         return self._domain.dim
 
 
+def _expand_sum(op, factor, terms):
+    """Append the terms (factor, operator) of op to terms, expanding
+    nested sums."""
+    if isinstance(op, SummedOperator):
+        for i, op2 in enumerate(op.operators):
+            f = op.factors[i] if op.factors else 1
+            _expand_sum(op2, factor * f, terms)
+    else:
+        terms.append((factor, op))
+
+
+def _expand_composition(op, chain):
+    """Append the operators of op in the order of application to chain."""
+    if isinstance(op, ComposedOperator):
+        _expand_composition(op.op1, chain)
+        _expand_composition(op.op2, chain)
+    else:
+        chain.append(op)
+
+
+def _add_matrices(mats):
+    """Return the sum of the scaled sparse matrices [(f, M), ...]. If all
+    matrices have the same sparsity pattern only the values are added."""
+    mats = [(f, sps.csr_matrix(M)) for f, M in mats]
+    M0 = mats[0][1]
+    if all(M.shape == M0.shape and np.array_equal(M.indptr, M0.indptr) and
+           np.array_equal(M.indices, M0.indices) for _, M in mats[1:]):
+        data = sum(f * M.data for f, M in mats)
+        return sps.csr_matrix((data, M0.indices.copy(), M0.indptr.copy()), shape=M0.shape)
+    return sum(f * M for f, M in mats).tocsr()
+
+
 class ComposedOperator(Operator):
     """Wrapper class for linear operators that are composed of other
     linear operators
+
+    Nested compositions are applied as one chain, consecutive
+    `ComponentOperator` stages act directly on the coefficients of flat
+    vectors without creating intermediate vectors. The chain is set up on
+    first application and rebuilt when op1 or op2 are reassigned; changes
+    to nested compositions after that are not seen.
     """
 
+    # operators in the order of application (see apply)
+    _chain = None
+
     def __init__(self, op1, op2, trans=None, inv=None, invtrans=None):
         """Takes two operators and returns the composition of those
         operators"""
@@ -175,6 +226,24 @@ class ComposedOperator(Operator):
         self.inv = inv
         self.invtrans = invtrans
 
+    @property
+    def op1(self):
+        return self._op1
+
+    @op1.setter
+    def op1(self, op1):
+        self._op1 = op1
+        self._chain = None
+
+    @property
+    def op2(self):
+        return self._op2
+
+    @op2.setter
+    def op2(self, op2):
+        self._op2 = op2
+        self._chain = None
+
     @property
     def domain(self):
         """Return the basis of the domain"""
@@ -198,11 +267,26 @@ class ComposedOperator(Operator):
 
     def apply(self, vec):
         """Apply operator to vector which should be in the domain of operator"""
-        #        print "COMPOSITE", type(self.op1), type(self.op2)
-        r = self.op1.apply(vec)
-        #        print "\tCOMPOSITE intermediate", type(r)
-        r = self.op2.apply(r)
-        #        print "\tCOMPOSITE ", type(r), " --> ", type(vec)
+        if self._chain is None:
+            self._chain = []
+            _expand_composition(self, self._chain)
+        chain = self._chain
+        r = vec
+        i = 0
+        while i < len(chain):
+            # run of component operators acting on the coefficients
+            j = i
+            while j < len(chain) and isinstance(chain[j], ComponentOperator):
+                j += 1
+            if j - i > 1 and isinstance(r, FlatVector):
+                X = r.coeffs
+                for op in chain[i:j]:
+                    X = np.asarray(op.apply_to_matrix(X))
+                r = type(r)(X, chain[j - 1].codomain)
+                i = j
+            else:
+                r = chain[i].apply(r)
+                i += 1
         return r
 
     def can_transpose(self):
@@ -249,8 +333,19 @@ class ComposedOperator(Operator):
 
 class SummedOperator(Operator):
     """Wrapper class for linear operators adding two operators
+
+    On first application nested sums are expanded into one list of
+    terms and terms with sparse matrices (see `_fusion_matrix`) of the
+    same type, domain and codomain are pre-added into one matrix. The
+    results of the remaining terms are accumulated in place into the
+    result of the first term. The terms are rebuilt when operators or
+    factors are reassigned; changes to nested sums or to the lists in
+    place after the first application are not seen.
     """
 
+    # list of terms (factor, operator) (see apply)
+    _fused = None
+
     def __init__(self, operators, factors=None,
                  trans=None, inv=None, invtrans=None):
         """Takes two operators and returns the sum of those operators"""
@@ -264,26 +359,69 @@ class SummedOperator(Operator):
         self.inv = inv
         self.invtrans = invtrans
 
+    @property
+    def operators(self):
+        return self._operators
+
+    @operators.setter
+    def operators(self, operators):
+        self._operators = operators
+        self._fused = None
+
+    @property
+    def factors(self):
+        return self._factors
+
+    @factors.setter
+    def factors(self, factors):
+        self._factors = factors
+        self._fused = None
+
+    @property
     def domain(self):
         """Returns the basis of the domain"""
         return self.operators[0].domain
 
+    @property
     def codomain(self):
         """Returns the basis of the codomain"""
         return self.operators[0].codomain
 
+    def _fuse(self):
+        terms = []
+        _expand_sum(self, 1, terms)
+        fused = []
+        for f, op in terms:
+            M = op._fusion_matrix()
+            if M is None:
+                fused.append((f, op, None))
+                continue
+            for _, op2, mats in fused:
+                if (mats is not None and type(op2) is type(op) and
+                        op2.domain == op.domain and op2.codomain == op.codomain):
+                    mats.append((f, M))
+                    break
+            else:
+                fused.append((f, op, [(f, M)]))
+        for k, (f, op, mats) in enumerate(fused):
+            if mats is not None and len(mats) > 1:
+                fused[k] = (1, op._with_matrix(_add_matrices(mats)), None)
+        return [(f, op) for f, op, _ in fused]
+
     def apply(self, vec):
         """Apply operator to vec which should be in the domain of operator"""
         # TODO: implement zero vector
+        if self._fused is None:
+            self._fused = self._fuse()
         r = None
-        for i, op in enumerate(self.operators):
+        for f, op in self._fused:
             r1 = op.apply(vec)
-            if self.factors and self.factors[i] != 1.0:
-                r1 = self.factors[i] * r1
             if r is None:
-                r = r1
-            else:
+                r = r1 if f == 1 else f * r1
+            elif f == 1:
                 r += r1
+            else:
+                r.axpy(f, r1)
         return r
 
     def can_transpose(self):
@@ -367,6 +505,10 @@ class MatrixOperator(BaseOperator, ComponentOperator):
         self._check_basis(vec)
         return type(vec)(np.dot(self._arr, vec.coeffs), self.codomain)
 
+    @takes(anything, np.ndarray)
+    def apply_to_matrix(self, X):
+        return np.dot(self._arr, X)
+
     def as_matrix(self):
         return np.asmatrix(self._arr)
 
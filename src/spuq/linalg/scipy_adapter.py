@@ -0,0 +1,114 @@
+"""Adapter exposing spuq operators as scipy LinearOperators.
+
+With `as_linear_operator` every spuq `Operator` (e.g. `MultiOperator`,
+`TensorOperator`, composed and summed operators) can be passed to the
+Krylov solvers of scipy.sparse.linalg (cg, minres, gmres, ...). The
+operator acts on the flattened coefficients of a template vector:
+
+  * `FlatVector`: the coefficient array,
+  * `FullTensor`: the coefficient tensor in C order,
+  * vectors with ``as_array``/``from_array`` (e.g. `MultiVector`): the
+    layout defined by these methods.
+
+Vectors are wrapped around the arrays passed in by the solver, so for
+contiguous storage (packed MultiVectors, FullTensors) no coefficients
+are copied when converting between the two representations.
+"""
+
+import numpy as np
+import scipy.sparse.linalg as spsla
+
+from spuq.linalg.vector import Vector, FlatVector
+from spuq.linalg.operator import Operator
+from spuq.linalg.tensor_vector import FullTensor
+from spuq.utils.type_check import takes, optional
+
+__all__ = ["SpuqLinearOperator", "as_linear_operator", "vector_to_array", "array_to_vector"]
+
+
+def vector_to_array(vec):
+    """Return the flattened coefficients of vec (a view if possible)."""
+    if isinstance(vec, FullTensor):
+        return np.asarray(vec.as_array()).ravel()
+    elif isinstance(vec, FlatVector):
+        return vec.coeffs
+    elif hasattr(vec, "as_array"):
+        return np.asarray(vec.as_array()).ravel()
+    raise TypeError("vector of type %s cannot be flattened" % type(vec).__name__)
+
+
+def array_to_vector(x, template):
+    """Return a vector of the type and basis of template with the
+    flattened coefficients x (x is used as storage if possible)."""
+    if isinstance(template, FullTensor):
+        return FullTensor(x.reshape(np.shape(template.as_array())), template.basis)
+    elif isinstance(template, FlatVector):
+        return template._create_copy(x)
+    elif hasattr(template, "from_array"):
+        return template.from_array(x)
+    raise TypeError("vector of type %s cannot be created from an array" % type(template).__name__)
+
+
+def _can_transpose(op):
+    # can_transpose is a property of Operator but a method of the composed
+    # and summed operators
+    ct = op.can_transpose
+    return ct() if callable(ct) else ct
+
+
+class SpuqLinearOperator(spsla.LinearOperator):
+    """LinearOperator applying a spuq operator to flattened coefficients."""
+
+    def __init__(self, op, domain_vec, codomain_vec=None):
+        if codomain_vec is None:
+            codomain_vec = domain_vec
+        self._op = op
+        self._domain_vec = domain_vec
+        self._codomain_vec = codomain_vec
+        n = len(vector_to_array(domain_vec))
+        m = len(vector_to_array(codomain_vec))
+        super(SpuqLinearOperator, self).__init__(np.dtype(float), (m, n))
+
+    @property
+    def operator(self):
+        return self._op
+
+    def to_vector(self, x):
+        """Return the domain vector with the flattened coefficients x."""
+        return array_to_vector(np.asarray(x, dtype=float).ravel(), self._domain_vec)
+
+    def _apply_flat(self, op, X):
+        # component operators (e.g. ScipyOperator) act on coefficient matrices directly
+        if isinstance(self._domain_vec, FlatVector) and hasattr(op, "apply_to_matrix"):
+            return np.asarray(op.apply_to_matrix(X))
+        return None
+
+    def _matvec(self, x):
+        x = np.asarray(x, dtype=float).ravel()
+        y = self._apply_flat(self._op, x)
+        if y is not None:
+            return y
+        return vector_to_array(self._op.apply(array_to_vector(x, self._domain_vec)))
+
+    def _matmat(self, X):
+        Y = self._apply_flat(self._op, np.asarray(X, dtype=float))
+        if Y is not None:
+            return Y
+        return np.column_stack([self._matvec(X[:, j]) for j in xrange(X.shape[1])])
+
+    def _rmatvec(self, x):
+        if not _can_transpose(self._op):
+            raise NotImplementedError("operator cannot be transposed")
+        x = np.asarray(x, dtype=float).ravel()
+        op_T = self._op.transpose()
+        y = self._apply_flat(op_T, x)
+        if y is not None:
+            return y
+        return vector_to_array(op_T.apply(array_to_vector(x, self._codomain_vec)))
+
+
+@takes(Operator, Vector, optional(Vector))
+def as_linear_operator(op, domain_vec, codomain_vec=None):
+    """Return a scipy LinearOperator for op acting on the flattened
+    coefficients of vectors like domain_vec (and codomain_vec)."""
+    return SpuqLinearOperator(op, domain_vec, codomain_vec)
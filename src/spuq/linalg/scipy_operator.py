@@ -2,12 +2,11 @@ import logging
 
 import numpy as np
 import scipy.sparse as sps
-import scipy.linalg as la
-import scipy.sparse.linalg as spsla
 
 from spuq.linalg.basis import Basis
-from spuq.linalg.vector import Vector
+from spuq.linalg.vector import Vector, FlatVector
 from spuq.linalg.operator import Operator, BaseOperator, ComponentOperator
+from spuq.linalg.sparse_solver import SparseSolver, SOLVER_TYPE
 from spuq.utils.type_check import takes, anything
 
 logger = logging.getLogger(__name__)
@@ -28,6 +27,8 @@ class ScipyOperator(ScipyOperatorBase):
     @takes(anything, Vector)
     def apply(self, vec):
         # TODO: check basis
+        if isinstance(vec, FlatVector):
+            return type(vec)(self._matrix * vec.coeffs, self.codomain)
         new_vec = vec.copy()
         new_vec.coeffs = self._matrix * new_vec.coeffs
         return new_vec
@@ -35,27 +36,45 @@ class ScipyOperator(ScipyOperatorBase):
     def as_matrix(self):
         return self._matrix
 
+    def _fusion_matrix(self):
+        return self._matrix
+
+    def _with_matrix(self, M):
+        return ScipyOperator(M, domain=self.domain, codomain=self.codomain)
+
     @takes(anything, np.ndarray)
     def apply_to_matrix(self, X):
         return self._matrix * X
 
 
 class ScipySolveOperator(ScipyOperatorBase):
+    """Operator applying the inverse of a sparse matrix.
+
+    The matrix is factorized on first use by a `SparseSolver` (LU,
+    Cholesky or preconditioned CG, see `SOLVER_TYPE`) and the factor is
+    kept, so that further applications only need back substitutions."""
+
+    def __init__(self, matrix, domain, codomain, solver_type=SOLVER_TYPE.LU, tol=1e-12, maxiter=None):
+        super(ScipySolveOperator, self).__init__(matrix, domain, codomain)
+        self._solver = SparseSolver(matrix, solver_type, tol=tol, maxiter=maxiter)
+
+    @property
+    def solver(self):
+        return self._solver
+
     @takes(anything, Vector)
     def apply(self, vec):
         # TODO: check basis
         new_vec = vec.copy()
-        new_vec.coeffs = spsla.spsolve(self._matrix, vec.coeffs)
+        new_vec.coeffs = self._solver.solve(vec.coeffs)
         return new_vec
 
     def as_matrix(self):
         # TODO: compute inverse (issue warning?)
         logger.warning("computing the inverse of a sparse matrix")
-        return la.inv(self._matrix.toarray())
+        return self._solver.solve(np.eye(self._matrix.shape[0]))
 
     @takes(anything, np.ndarray)
     def apply_to_matrix(self, X):
-        Y = np.zeros_like(X)
-        for i in range(X.shape[1]):
-            Y[:,i] = spsla.spsolve(self._matrix, X[:,i])[:,np.newaxis]
-        return Y
+        """Solve for all columns of X at once with the stored factorization."""
+        return self._solver.solve(X)
@@ -0,0 +1,117 @@
+"""Reusable solvers for sparse linear systems.
+
+A `SparseSolver` factorizes a sparse matrix once, on first use, and then
+solves for one or several right-hand sides (given as columns of a
+matrix) by back substitution. The factorization is a sparse LU
+decomposition or, for symmetric positive definite matrices, a Cholesky
+decomposition (requires scikits.sparse). For large matrices an iterative
+CG solver can be used instead. It is preconditioned with smoothed
+aggregation AMG if pyamg is installed and with an incomplete LU
+decomposition otherwise.
+"""
+
+import logging
+
+import numpy as np
+import scipy.sparse as sps
+import scipy.sparse.linalg as spsla
+
+from spuq.utils.enum import Enum
+from spuq.utils.lru_cache import nbytes_of
+
+try:
+    from sksparse.cholmod import cholesky
+    HAVE_CHOLMOD = True
+except ImportError:
+    try:
+        from scikits.sparse.cholmod import cholesky
+        HAVE_CHOLMOD = True
+    except ImportError:
+        HAVE_CHOLMOD = False
+
+try:
+    import pyamg
+    HAVE_PYAMG = True
+except ImportError:
+    HAVE_PYAMG = False
+
+__all__ = ["SparseSolver", "SOLVER_TYPE"]
+
+logger = logging.getLogger(__name__)
+
+SOLVER_TYPE = Enum('LU', 'CHOLESKY', 'CG')
+
+
+class SparseSolver(object):
+    """Solver for A X = B with a fixed sparse matrix A."""
+
+    def __init__(self, matrix, solver_type=SOLVER_TYPE.LU, tol=1e-12, maxiter=None):
+        if solver_type == SOLVER_TYPE.CHOLESKY and not HAVE_CHOLMOD:
+            logger.warning("scikits.sparse not available, using LU instead of Cholesky decomposition")
+            solver_type = SOLVER_TYPE.LU
+        self._matrix = matrix
+        self._solver_type = solver_type
+        self._tol = tol
+        self._maxiter = maxiter
+        self._factor = None
+
+    @property
+    def matrix(self):
+        return self._matrix
+
+    @property
+    def solver_type(self):
+        return self._solver_type
+
+    @property
+    def factor(self):
+        """Return the factorization (or the preconditioner for CG), computing it if required."""
+        if self._factor is None:
+            self._factor = self._factorize()
+        return self._factor
+
+    def _factorize(self):
+        if self._solver_type == SOLVER_TYPE.LU:
+            return spsla.splu(sps.csc_matrix(self._matrix))
+        elif self._solver_type == SOLVER_TYPE.CHOLESKY:
+            return cholesky(sps.csc_matrix(self._matrix))
+        A = sps.csr_matrix(self._matrix)
+        if HAVE_PYAMG:
+            return pyamg.smoothed_aggregation_solver(A).aspreconditioner(cycle='V')
+        ilu = spsla.spilu(sps.csc_matrix(A))
+        return spsla.LinearOperator(A.shape, matvec=ilu.solve)
+
+    def solve(self, B):
+        """Solve for a right-hand side vector or for all columns of a matrix B."""
+        B = np.asarray(B, dtype=float)
+        if self._solver_type == SOLVER_TYPE.LU:
+            return self.factor.solve(B)
+        elif self._solver_type == SOLVER_TYPE.CHOLESKY:
+            return self.factor(B)
+        if B.ndim == 1:
+            return self._solve_cg(B)
+        X = np.empty_like(B)
+        for i in xrange(B.shape[1]):
+            X[:, i] = self._solve_cg(B[:, i])
+        return X
+
+    def _solve_cg(self, b):
+        x, info = spsla.cg(self._matrix, b, tol=self._tol, maxiter=self._maxiter, M=self.factor)
+        if info > 0:
+            logger.warning("CG did not converge within %i iterations", info)
+        return x
+
+    @property
+    def nbytes(self):
+        """Estimated memory of the factorization in bytes (0 before factorization)."""
+        if self._factor is None:
+            return 0
+        if self._solver_type == SOLVER_TYPE.LU:
+            # values (double) plus row indices (int)
+            return 12 * self._factor.nnz
+        elif self._solver_type == SOLVER_TYPE.CHOLESKY:
+            return 12 * self._factor.L().nnz
+        return nbytes_of(self._matrix)
+
+    def __repr__(self):
+        return "<SparseSolver type=%s dim=%i>" % (self._solver_type, self._matrix.shape[0])
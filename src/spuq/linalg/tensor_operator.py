@@ -1,5 +1,6 @@
 import logging
 import numpy as np
+import scipy.sparse as sps
 
 from spuq.linalg.operator import Operator, ComponentOperator
 from spuq.utils.type_check import takes, anything, sequence_of
@@ -28,27 +29,20 @@ class TensorOperator(Operator):
         self._domain = domain
         self._codomain = codomain
         self.I, self.J, self.M = self.A[0].domain.dim, self.B[0].domain.dim, len(A)
+        # matrices of the B_i stacked vertically (see _stacked_B)
+        self._B_stack = None
 
     @property
     def dim(self):
         return self.I, self.J, self.M
 
     def as_matrix(self):
-        """Return matrix of operator if all included operators support this."""
-        import itertools as iter
-        I, J = self.I, self.J
-        AB = np.ndarray((I*J, I*J))
-        # TODO: contruct large matrix in i,j,value format
-        for m in range(self.M):
-            A = self.A[m].as_matrix().toarray()
-            B = self.B[m].as_matrix().toarray()
-            for xi, yi in iter.product(range(self.I), repeat=2):
-                # add together
-#                import ipdb; ipdb.set_trace()
-                if m == 0:
-                    AB[xi * J:(xi + 1) * J, yi * J:(yi + 1) * J] = A[xi, yi] * B
-                else:
-                    AB[xi * J:(xi + 1) * J, yi * J:(yi + 1) * J] += A[xi, yi] * B
+        """Return sparse matrix of operator (the sum of the Kronecker
+        products of the matrices of A_i and B_i) if all included
+        operators support this."""
+        AB = sps.csr_matrix((self.I * self.J, self.I * self.J))
+        for A, B in zip(self.A, self.B):
+            AB = AB + sps.kron(A.as_matrix(), B.as_matrix(), format="csr")
         return AB
 
     def old_apply(self, vec):
@@ -62,22 +56,47 @@ class TensorOperator(Operator):
             Y = AXB if m == 0 else Y + AXB
         return vec.__class__(Y)
 
-    @takes(anything, TensorVector)
-    def apply(self, vec):  # pragma: no cover
-        """Apply operator to vector."""
-        X = vec
-        for m in range(self.M):
-            # apply A
-            AX = X.apply_to_dim(self.A[m], 0)
-            # apply B
-            ABX = AX.apply_to_dim(self.B[m], 1)
-            # add together
-            if m == 0:
-                Y = ABX
+    def _stacked_B(self):
+        """Return the sparse matrices of all B_i stacked vertically (None
+        if some B_i has no sparse matrix, e.g. a `ScipySolveOperator`
+        whose matrix would be the dense inverse)."""
+        if self._B_stack is None:
+            mats = [getattr(B, "_fusion_matrix", lambda: None)() for B in self.B]
+            if all(M is not None and sps.issparse(M) for M in mats):
+                self._B_stack = sps.vstack(mats, format="csr")
             else:
-                Y += ABX
-        return Y
+                self._B_stack = False
+        return self._B_stack if self._B_stack is not False else None
+
+    @takes(anything, TensorVector)
+    def apply(self, vec):
+        """Apply operator to vector, i.e. compute \sum_i A_i X B_i^T for
+        the coefficient matrix X of vec.
 
+        Tensors in other formats are transformed in their dimensions and
+        summed (CP tensors with rounding are rounded after each sum)."""
+        if not isinstance(vec, FullTensor):
+            for i, (A, B) in enumerate(zip(self.A, self.B)):
+                ABX = vec.apply_to_dim(A, 0).apply_to_dim(B, 1)
+                if i == 0:
+                    Y = ABX
+                else:
+                    Y += ABX
+            return Y
+        X = np.asarray(vec.as_matrix())
+        Bs = self._stacked_B()
+        if Bs is not None:
+            # B_i X^T for all i with one product, rows i*J:(i+1)*J
+            BX = Bs * X.T
+        J = self.J
+        Y = np.zeros((X.shape[0], J))
+        for i, A in enumerate(self.A):
+            if Bs is not None:
+                XB = BX[i * J:(i + 1) * J].T
+            else:
+                XB = np.asarray(self.B[i].apply_to_matrix(X.T)).T
+            Y += np.asarray(A.apply_to_matrix(np.ascontiguousarray(XB)))
+        return FullTensor(Y, vec.basis)
 
     def __call__(self, arg):
         """Operators have call semantics."""
@@ -1,4 +1,5 @@
 import numpy as np
+import scipy.sparse as sps
 
 from spuq.linalg.basis import CanonicalBasis
 from spuq.linalg.vector import FlatVector
@@ -6,7 +7,7 @@ from spuq.utils.testing import assert_equal, assert_almost_equal
 
 __all__ = ["FooBasis", "BarBasis", "FooVector",
        "assert_vector_almost_equal",
-       "assert_operator_is_consistent"]
+       "assert_operator_is_consistent", "laplace_matrix"]
 
 
 class FooBasis(CanonicalBasis):
@@ -24,6 +25,10 @@ class FooVector(FlatVector):
     respect vector classes."""
     pass
 
+def laplace_matrix(N):
+    """Return the sparse (CSR) matrix of the 1D finite difference Laplacian."""
+    return sps.diags([-np.ones(N - 1), 2 * np.ones(N), -np.ones(N - 1)], [-1, 0, 1]).tocsr()
+
 def assert_vector_almost_equal(vec1, vec2):
     assert_equal(type(vec1), type(vec2))
     assert_almost_equal(vec1.coeffs, vec2.coeffs)
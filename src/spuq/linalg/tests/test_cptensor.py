@@ -110,4 +110,50 @@ def test_cptensor_inner():
 
     assert_equal(inner(cpta, cptb), inner(cpta.flatten(), cptb.flatten()))
 
+def test_cptensor_norm():
+    X1 = np.random.random([4, 3])
+    X2 = np.random.random([5, 3])
+    cpt = CPTensor([X1, X2], TensorBasis([CanonicalBasis(4), CanonicalBasis(5)]))
+    assert_almost_equal(cpt.norm(), np.linalg.norm(np.dot(X1, X2.T)))
+    assert_almost_equal(inner(cpt, 2 * cpt), 2 * cpt.norm() ** 2)
+
+def test_cptensor_round():
+    basis = TensorBasis([CanonicalBasis(40), CanonicalBasis(50)])
+    X1 = np.random.random([40, 3])
+    X2 = np.random.random([50, 3])
+    cpt = CPTensor([X1, X2], basis)
+    # exact rank is recovered with Gram matrices (rank << dims) and QR
+    for s in [cpt + cpt - 0.5 * cpt, CPTensor([np.hstack([X1] * 5), np.hstack([X2] * 5)], basis)]:
+        r = s.round(1e-10)
+        assert_equal(r.rank, 3)
+        assert_array_almost_equal(r.flatten().as_array(), s.flatten().as_array())
+    # relative tolerance
+    X1 = np.random.random([8, 6])
+    X2 = np.random.random([7, 6])
+    cpt = CPTensor([X1, X2], TensorBasis([CanonicalBasis(8), CanonicalBasis(7)]))
+    r = cpt.round(0.1)
+    assert_true(r.rank < 6)
+    assert_true((cpt - r).norm() <= 0.1 * cpt.norm())
+    assert_equal(cpt.truncate(2).rank, 2)
+
+def test_cptensor_auto_round():
+    from spuq.linalg.scipy_operator import ScipyOperator
+    from spuq.linalg.tensor_operator import TensorOperator
+    import scipy.sparse as sps
+    basis = TensorBasis([CanonicalBasis(40), CanonicalBasis(50)])
+    X1 = np.random.random([40, 2])
+    X2 = np.random.random([50, 2])
+    cpt = CPTensor([X1, X2], basis, tol=1e-10)
+    for _ in range(5):
+        cpt += CPTensor([X1, X2], basis)
+    assert_equal(cpt.rank, 2)
+    assert_almost_equal(cpt.norm(), 6 * np.linalg.norm(np.dot(X1, X2.T)))
+    # rounded after application of a tensor operator
+    A = [ScipyOperator(sps.eye(40, format="csr") * (i + 1), domain=basis[0], codomain=basis[0]) for i in range(3)]
+    B = [ScipyOperator(sps.eye(50, format="csr"), domain=basis[1], codomain=basis[1]) for i in range(3)]
+    y = TensorOperator(A, B) * cpt
+    assert_equal(y.rank, 2)
+    assert_almost_equal(y.norm(), 6 * cpt.norm())
+    assert_equal(CPTensor([X1, X2], basis, max_rank=1).round().rank, 1)
+
 test_main(True)
@@ -1,10 +1,12 @@
 import numpy as np
+import scipy.sparse as sps
 
 from spuq.utils.type_check import InputParameterError
 from spuq.utils.testing import *
 from spuq.linalg.basis import *
 from spuq.linalg.vector import *
 from spuq.linalg.operator import *
+from spuq.linalg.scipy_operator import ScipyOperator
 from spuq.linalg.test_support import *
 import spuq.linalg.test_support as foo
 
@@ -109,6 +111,50 @@ def test_add_sub_operators():
     assert_equal((A * 25) * x, 25 * (A * x))
 
 
+def test_sum_fusion():
+    N = 6
+    M = sps.rand(N, N, density=0.5, format="csr", random_state=0)
+    # same sparsity pattern with different values
+    mats = [M.copy() for _ in range(4)]
+    for k, A in enumerate(mats):
+        A.data = rand(A.nnz) + k
+    A = [ScipyOperator(A, CanonicalBasis(N), CanonicalBasis(N)) for A in mats]
+    D = MatrixOperator(rand(N, N))
+    S = A[0] + 0.5 * A[1] + (A[2] - D) - 2 * A[3]
+    x = FlatVector(rand(N))
+    y = S * x
+    y_ex = mats[0] * x.coeffs + 0.5 * (mats[1] * x.coeffs) + mats[2] * x.coeffs - \
+        np.dot(D.as_matrix(), x.coeffs).A1 - 2 * (mats[3] * x.coeffs)
+    assert_array_almost_equal(y.coeffs, y_ex)
+    # the sparse terms are pre-added into one matrix with the same pattern
+    assert_equal(len(S._fused), 2)
+    f, F = S._fused[0]
+    assert_equal(f, 1)
+    assert_equal(F.matrix.nnz, M.nnz)
+    assert_true(S._fused[1][1] is D)
+    # reassigning the terms rebuilds them
+    S.operators = [A[0], D]
+    S.factors = [1, -1]
+    assert_array_almost_equal((S * x).coeffs, mats[0] * x.coeffs - np.dot(D.as_matrix(), x.coeffs).A1)
+
+
+def test_compose_chain():
+    A = MatrixOperator(1 + rand(3, 5))
+    B = MatrixOperator(1 + rand(4, 3))
+    C = MatrixOperator(1 + rand(2, 4))
+    x = FlatVector(rand(5))
+    D = C * (B * A)
+    y = D * x
+    assert_equal(len(D._chain), 3)
+    assert_equal(y, C * (B * (A * x)))
+    assert_equal(y.basis, C.codomain)
+    # reassigning an operator rebuilds the chain
+    E = MatrixOperator(1 + rand(3, 4))
+    D.op2 = E
+    assert_equal(D * x, E * (B * (A * x)))
+    assert_equal(len(D._chain), 3)
+
+
 def test_diag_operator_apply():
     diag = np.array([1, 2, 3])
     x = FlatVector([3, 4, 5])
@@ -0,0 +1,66 @@
+import numpy as np
+import scipy.sparse as sps
+import scipy.sparse.linalg as spsla
+
+from spuq.utils.testing import *
+from spuq.linalg.test_support import laplace_matrix
+from spuq.linalg.basis import CanonicalBasis
+from spuq.linalg.vector import FlatVector
+from spuq.linalg.scipy_operator import ScipyOperator, ScipySolveOperator
+from spuq.linalg.tensor_basis import TensorBasis
+from spuq.linalg.tensor_vector import FullTensor
+from spuq.linalg.tensor_operator import TensorOperator
+from spuq.linalg.scipy_adapter import as_linear_operator, vector_to_array, array_to_vector
+
+
+def _scipy_op(M):
+    basis = CanonicalBasis(M.shape[0])
+    return ScipyOperator(M, domain=basis, codomain=basis)
+
+
+def test_vector_views():
+    X = np.random.random((4, 3))
+    T = FullTensor(X, TensorBasis([CanonicalBasis(4), CanonicalBasis(3)]))
+    x = vector_to_array(T)
+    assert_array_equal(x, X.ravel())
+    # no copies in both directions
+    x[0] = 7.0
+    assert_equal(X[0, 0], 7.0)
+    S = array_to_vector(x, T)
+    assert_true(isinstance(S, FullTensor))
+    assert_true(np.may_share_memory(S.as_array(), x))
+    v = FlatVector(np.random.random(5))
+    assert_true(vector_to_array(v) is v.coeffs)
+
+
+def test_tensor_operator_cg():
+    # A x I + I x B is symmetric positive definite
+    I, J = 6, 4
+    A = [_scipy_op(laplace_matrix(I)), _scipy_op(sps.identity(I, format="csr"))]
+    B = [_scipy_op(sps.identity(J, format="csr")), _scipy_op(laplace_matrix(J))]
+    T = TensorOperator(A, B)
+    w = FullTensor(np.zeros((I, J)), TensorBasis([CanonicalBasis(I), CanonicalBasis(J)]))
+    L = as_linear_operator(T, w)
+    assert_equal(L.shape, (I * J, I * J))
+    X = np.random.random((I * J, 3))
+    assert_array_almost_equal(L.matmat(X), T.as_matrix() * X)
+    b = np.random.random(I * J)
+    x, info = spsla.cg(L, b, tol=1e-12)
+    assert_equal(info, 0)
+    assert_array_almost_equal(T.as_matrix() * x, b)
+    assert_true(isinstance(L.to_vector(x), FullTensor))
+
+
+def test_component_operator():
+    N = 10
+    M = laplace_matrix(N)
+    basis = CanonicalBasis(N)
+    L = as_linear_operator(ScipySolveOperator(M, basis, basis), FlatVector(np.zeros(N)))
+    B = np.random.random((N, 3))
+    assert_array_almost_equal(M * L.matmat(B), B)
+    assert_array_almost_equal(M * L.matvec(B[:, 0]), B[:, 0])
+    x, info = spsla.minres(as_linear_operator(_scipy_op(M), FlatVector(np.zeros(N))), B[:, 0], tol=1e-12)
+    assert_array_almost_equal(M * x, B[:, 0])
+
+
+test_main()
@@ -0,0 +1,26 @@
+import numpy as np
+
+from spuq.utils.testing import *
+from spuq.linalg.test_support import laplace_matrix
+from spuq.linalg.basis import CanonicalBasis
+from spuq.linalg.scipy_operator import ScipySolveOperator
+from spuq.linalg.sparse_solver import SOLVER_TYPE
+
+
+def test_solve_operator():
+    N = 15
+    A = laplace_matrix(N)
+    basis = CanonicalBasis(N)
+    X = np.random.random((N, 4))
+    for solver_type in SOLVER_TYPE:
+        S = ScipySolveOperator(A, basis, basis, solver_type=solver_type, tol=1e-14)
+        # factorized lazily and only once
+        assert_equal(S.solver.nbytes, 0)
+        assert_array_almost_equal(S.apply_to_matrix(A * X), X)
+        F = S.solver.factor
+        assert_array_almost_equal(S.apply_to_matrix(A * X[:, 0]), X[:, 0])
+        assert_true(S.solver.factor is F)
+    assert_array_almost_equal(S.as_matrix(), np.linalg.inv(A.toarray()))
+
+
+test_main()
@@ -0,0 +1,28 @@
+import numpy as np
+
+from spuq.utils.testing import *
+from spuq.linalg.test_support import laplace_matrix
+from spuq.linalg.sparse_solver import SparseSolver, SOLVER_TYPE
+
+
+def test_solve():
+    N = 20
+    A = laplace_matrix(N)
+    X = np.random.random((N, 3))
+    B = A * X
+    for solver_type in SOLVER_TYPE:
+        S = SparseSolver(A, solver_type, tol=1e-14)
+        assert_equal(S.nbytes, 0)
+        assert_array_almost_equal(S.solve(B), X)
+        assert_array_almost_equal(S.solve(B[:, 1]), X[:, 1])
+        assert_true(S.nbytes > 0)
+
+
+def test_lazy_factorization():
+    S = SparseSolver(laplace_matrix(10))
+    F = S.factor
+    S.solve(np.ones(10))
+    assert_true(S.factor is F)
+
+
+test_main()
@@ -0,0 +1,60 @@
+import numpy as np
+import scipy.sparse as sps
+
+from spuq.utils.testing import *
+from spuq.linalg.basis import CanonicalBasis
+from spuq.linalg.scipy_operator import ScipyOperator, ScipySolveOperator
+from spuq.linalg.tensor_basis import TensorBasis
+from spuq.linalg.tensor_vector import FullTensor
+from spuq.linalg.tensor_operator import TensorOperator
+
+
+def _sparse_operator(n, seed):
+    M = sps.rand(n, n, density=0.4, format="csr", random_state=seed)
+    return ScipyOperator(M, domain=CanonicalBasis(n), codomain=CanonicalBasis(n))
+
+
+def _setup(I=4, J=3, M=3):
+    A = [_sparse_operator(I, m) for m in range(M)]
+    B = [_sparse_operator(J, 10 + m) for m in range(M)]
+    X = np.random.random((I, J))
+    basis = TensorBasis([CanonicalBasis(I), CanonicalBasis(J)])
+    return TensorOperator(A, B), FullTensor(X, basis)
+
+
+def test_as_matrix():
+    T, _ = _setup()
+    AB = T.as_matrix()
+    assert_true(sps.issparse(AB))
+    AB_ex = sum(np.kron(A.as_matrix().toarray(), B.as_matrix().toarray()) for A, B in zip(T.A, T.B))
+    assert_array_almost_equal(AB.toarray(), AB_ex)
+
+
+def test_apply():
+    T, X = _setup()
+    Y = T.apply(X)
+    assert_true(isinstance(Y, FullTensor))
+    Y_ex = sum(A.as_matrix() * (B.as_matrix() * X.as_matrix().T).T for A, B in zip(T.A, T.B))
+    assert_array_almost_equal(Y.as_matrix(), Y_ex)
+    # consistent with the matrix of the operator (row major flattening)
+    assert_array_almost_equal(Y.as_matrix().ravel(), T.as_matrix() * X.as_matrix().ravel())
+    assert_array_almost_equal((T * X).as_matrix(), Y_ex)
+
+    assert_true(sps.issparse(T._stacked_B()))
+
+
+def test_apply_solve():
+    # B_i without sparse matrix are applied to the coefficients and not stacked
+    T, X = _setup()
+    J = T.J
+    M = sps.identity(J, format="csr") * 3 + sps.rand(J, J, density=0.4, format="csr", random_state=5)
+    S = ScipySolveOperator(M, CanonicalBasis(J), CanonicalBasis(J))
+    T = TensorOperator(T.A, [S] + T.B[1:])
+    assert_true(T._stacked_B() is None)
+    Y = T.apply(X)
+    Bs = [np.linalg.inv(M.toarray())] + [B.as_matrix().toarray() for B in T.B[1:]]
+    Y_ex = sum(np.dot(A.as_matrix().toarray(), np.dot(B, X.as_matrix().T).T) for A, B in zip(T.A, Bs))
+    assert_array_almost_equal(Y.as_matrix(), Y_ex)
+
+
+test_main()
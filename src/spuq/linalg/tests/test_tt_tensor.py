@@ -0,0 +1,105 @@
+import numpy as np
+import scipy.sparse as sps
+
+from spuq.utils.testing import *
+from spuq.linalg.vector import inner
+from spuq.linalg.tt_tensor import TTTensor
+from spuq.linalg.tt_operator import TTOperator
+from spuq.polyquad.polynomials import LegendrePolynomials, JacobiPolynomials
+
+
+def _low_rank(dims, r):
+    # sum of r elementary tensors
+    X = np.zeros(dims)
+    for _ in range(r):
+        T = np.ones(())
+        for n in dims:
+            T = np.multiply.outer(T, np.random.random(n))
+        X += T
+    return X
+
+
+def test_tt_svd():
+    X = np.random.random((3, 4, 5, 2))
+    T = TTTensor.from_full(X)
+    assert_equal(T.order, 4)
+    assert_equal(T.dims, (3, 4, 5, 2))
+    assert_array_almost_equal(T.full(), X)
+    assert_almost_equal(T.entry((1, 2, 3, 1)), X[1, 2, 3, 1])
+    assert_array_almost_equal(T.flatten().as_array(), X)
+    # exact ranks of low rank tensors are recovered
+    T = TTTensor.from_full(_low_rank((4, 5, 6), 2))
+    assert_equal(T.ranks, (1, 2, 2, 1))
+
+
+def test_tt_inner_norm():
+    X = np.random.random((3, 4, 5))
+    Y = np.random.random((3, 4, 5))
+    S, T = TTTensor.from_full(X), TTTensor.from_full(Y)
+    assert_almost_equal(inner(S, T), np.sum(X * Y))
+    assert_almost_equal(S.norm(), np.linalg.norm(X))
+
+
+def test_tt_add_mul():
+    X = np.random.random((3, 4, 5))
+    Y = np.random.random((3, 4, 5))
+    S, T = TTTensor.from_full(X), TTTensor.from_full(Y)
+    U = S + T
+    assert_array_almost_equal(U.full(), X + Y)
+    assert_equal(U.ranks, (1,) + tuple(r + s for r, s in zip(S.ranks[1:-1], T.ranks[1:-1])) + (1,))
+    assert_array_almost_equal((S - T).full(), X - Y)
+    assert_array_almost_equal((2.5 * S).full(), 2.5 * X)
+    assert_array_almost_equal((-S).full(), -X)
+
+
+def test_tt_round():
+    X = _low_rank((4, 5, 6, 3), 2)
+    T = TTTensor.from_full(X)
+    U = T + T + T
+    assert_equal(U.ranks, (1, 6, 6, 6, 1))
+    V = U.round(1e-12)
+    assert_equal(V.ranks, (1, 2, 2, 2, 1))
+    assert_array_almost_equal(V.full(), 3 * X)
+    # truncation to rank one with error bound
+    W = U.truncate(1)
+    assert_equal(W.ranks, (1, 1, 1, 1, 1))
+    assert_true((W - U).norm() <= U.norm())
+    # automatic rounding
+    T = TTTensor(TTTensor.from_full(X).cores, tol=1e-12)
+    T += T.copy()
+    assert_equal(T.ranks, (1, 2, 2, 2, 1))
+    assert_array_almost_equal(T.full(), 2 * X)
+
+
+def test_tt_operator_apply():
+    A = [[sps.rand(4, 4, density=0.5, format="csr", random_state=k), np.random.random((3, 3)),
+          np.random.random((5, 5))] for k in range(3)]
+    T = TTOperator.from_kronecker_sum(A)
+    assert_equal(T.ranks, (1, 3, 3, 1))
+    M = T.as_matrix()
+    M_ex = sum(np.kron(np.kron(a[0].toarray(), a[1]), a[2]) for a in A)
+    assert_array_almost_equal(M.toarray(), M_ex)
+    X = TTTensor.from_full(np.random.random((4, 3, 5)))
+    Y = T * X
+    assert_array_almost_equal(Y.full().ravel(), M_ex.dot(X.full().ravel()))
+
+
+def test_tt_operator_triples():
+    N = 5
+    A = [sps.rand(N, N, density=0.5, format="csr", random_state=m) + sps.eye(N) for m in range(4)]
+    polysys = [LegendrePolynomials(), JacobiPolynomials(1.0, 2.0), LegendrePolynomials()]
+    T = TTOperator.from_triples(A, polysys, [3, 2, 4])
+    assert_equal(T.ranks, (1, 4, 3, 2, 1))
+    K = [T.cores[m + 1][0][-1].toarray() for m in range(3)]
+    eye = [np.eye(k.shape[0]) for k in K]
+    M_ex = np.kron(np.kron(np.kron(A[0].toarray(), eye[0]), eye[1]), eye[2])
+    for m in range(3):
+        factors = list(eye)
+        factors[m] = K[m]
+        M_ex += np.kron(np.kron(np.kron(A[m + 1].toarray(), factors[0]), factors[1]), factors[2])
+    assert_array_almost_equal(T.as_matrix().toarray(), M_ex)
+    X = TTTensor.from_full(np.random.random((N, 4, 3, 5)), tol=1e-12)
+    assert_array_almost_equal((T * X).full().ravel(), M_ex.dot(X.full().ravel()))
+
+
+test_main()
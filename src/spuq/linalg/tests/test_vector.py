@@ -106,6 +106,22 @@ def test_flatvec_mul():
     assert_equal(2 * fv4, fv5)
 
 
+def test_flatvec_axpy():
+    fv1 = FlatVector(np.array([1.0, 2, 3]))
+    fv2 = FlatVector(np.array([7.0, 2, 5]))
+    coeffs = fv1.coeffs
+    assert_true(fv1.axpy(2, fv2) is fv1)
+    assert_true(fv1.coeffs is coeffs)
+    assert_array_almost_equal(fv1.coeffs, [15, 6, 13])
+    fv1.axpby(1, fv2, 0.5)
+    assert_array_almost_equal(fv1.coeffs, [14.5, 5, 11.5])
+    fv1.xpay(fv2, 0)
+    assert_array_almost_equal(fv1.coeffs, [7, 2, 5])
+    assert_almost_equal(fv1.axpy_inner(-1, fv2), 0)
+    assert_almost_equal(fv1.axpy_inner(1, fv2, fv2), 78)
+    assert_raises(BasisMismatchError, lambda: fv1.axpy(1, FlatVector([1, 2])))
+
+
 def test_flatvec_repr():
     fv1 = FlatVector(np.array([1.0, 2, 3]))
     assert_equal(str(fv1),
@@ -0,0 +1,180 @@
+"""Operators in tensor train (TT) format.
+
+A `TTOperator` stores cores C_k, each an (R_{k-1} x R_k) array of
+(m_k x n_k) matrices (dense, scipy.sparse or None for zero blocks) with
+R_0 = R_d = 1, such that the operator is
+
+    sum_{a_1, ..., a_{d-1}} C_1[0, a_1] x C_2[a_1, a_2] x ... x C_d[a_{d-1}, 0]
+
+(x the Kronecker product). Blocks are only ever multiplied with the
+cores of `TTTensor` vectors, so sparse spatial matrices stay sparse.
+"""
+
+import numpy as np
+import scipy.sparse as sps
+
+from spuq.linalg.basis import CanonicalBasis
+from spuq.linalg.operator import Operator
+from spuq.linalg.tensor_basis import TensorBasis
+from spuq.linalg.tt_tensor import TTTensor
+from spuq.utils.type_check import takes, anything
+
+__all__ = ["TTOperator"]
+
+
+def _recurrence_matrix(p, deg):
+    """Return the sparse matrix of multiplication by x on the degrees
+    0, ..., deg of p, i.e. row n holds -beta[0], beta[1] and beta[-1]
+    of p.get_beta(n) in the columns n, n + 1 and n - 1."""
+    beta = np.array([p.get_beta(n) for n in range(deg + 1)], dtype=float).reshape(deg + 1, 3)
+    ids = np.arange(deg + 1)
+    rows = np.concatenate((ids, ids[:-1], ids[1:]))
+    cols = np.concatenate((ids, ids[1:], ids[:-1]))
+    vals = np.concatenate((-beta[:, 0], beta[:-1, 1], beta[1:, 2]))
+    return sps.csr_matrix((vals, (rows, cols)), shape=(deg + 1, deg + 1))
+
+
+class TTOperator(Operator):
+    """Linear operator in TT format acting on `TTTensor` vectors."""
+
+    def __init__(self, cores, domain=None, codomain=None):
+        assert len(cores[0]) == 1 and len(cores[-1][0]) == 1
+        assert all(len(C1[0]) == len(C2) for C1, C2 in zip(cores[:-1], cores[1:]))
+        self._cores = cores
+        shapes = [_block_shape(C) for C in cores]
+        if domain is None:
+            domain = TensorBasis([CanonicalBasis(n) for _, n in shapes])
+        if codomain is None:
+            codomain = TensorBasis([CanonicalBasis(m) for m, _ in shapes])
+        self._domain = domain
+        self._codomain = codomain
+
+    @classmethod
+    def from_kronecker_sum(cls, terms, domain=None, codomain=None):
+        """Create operator sum_t A_{t,1} x ... x A_{t,d} from the list of
+        terms [A_{t,1}, ..., A_{t,d}] (TT ranks equal to the number of terms)."""
+        T = len(terms)
+        d = len(terms[0])
+        cores = []
+        for k in range(d):
+            if d == 1:
+                C = [[_sum([terms[t][0] for t in range(T)])]]
+            elif k == 0:
+                C = [[terms[t][0] for t in range(T)]]
+            elif k == d - 1:
+                C = [[terms[t][k]] for t in range(T)]
+            else:
+                C = [[terms[t][k] if t == u else None for u in range(T)] for t in range(T)]
+            cores.append(C)
+        return cls(cores, domain, codomain)
+
+    @classmethod
+    def from_affine_sum(cls, A, K, domain=None, codomain=None):
+        """Create the stochastic Galerkin operator
+
+            A_0 x I x ... x I + sum_{m=1}^M A_m x I x ... x K_m x ... x I
+
+        on (spatial dimension) x (polynomial degrees of M random
+        variables), where K_m acts on dimension m (e.g. the recurrence
+        matrices of `from_triples`). Finished terms share one rank channel, hence the TT
+        ranks decrease from M + 1 to 2."""
+        M = len(K)
+        assert len(A) == M + 1
+        ident = [sps.identity(Km.shape[0], format="csr") for Km in K]
+        # rank channels before stochastic dimension m: terms m, ..., M-1 and "done"
+        cores = [[[A[m + 1] for m in range(M)] + [A[0]]]]
+        for m in range(M):
+            C = [[None] * (M - m) for _ in range(M - m + 1)]
+            for t in range(M - m):
+                # channel of term m + t, the first one is finished here
+                if t == 0:
+                    C[t][-1] = K[m]
+                else:
+                    C[t][t - 1] = ident[m]
+            C[-1][-1] = ident[m]
+            cores.append(C)
+        return cls(cores, domain, codomain)
+
+    @classmethod
+    def from_triples(cls, A, polysys, degrees, domain=None, codomain=None):
+        """Create the operator of `from_affine_sum` on the full tensor
+        product of the degrees 0, ..., degrees[m] of the polynomial
+        systems polysys[m]. K_m holds the three term recurrence
+        coefficients of polysys[m] as in
+        `multi_operator2.MultiOperator.stochastic_matrices`."""
+        K = [_recurrence_matrix(p, deg) for p, deg in zip(polysys, degrees)]
+        return cls.from_affine_sum(A, K, domain, codomain)
+
+    @property
+    def cores(self):
+        return self._cores
+
+    @property
+    def ranks(self):
+        return (1,) + tuple(len(C[0]) for C in self._cores)
+
+    @property
+    def domain(self):
+        """Return the basis of the domain."""
+        return self._domain
+
+    @property
+    def codomain(self):
+        """Return the basis of the codomain."""
+        return self._codomain
+
+    def as_matrix(self):
+        """Return the sparse matrix of the operator (only feasible for small operators)."""
+        blocks = [sps.csr_matrix(np.ones((1, 1)))]
+        for C in self._cores:
+            m, n = _block_shape(C)
+            new = []
+            for b in range(len(C[0])):
+                S = None
+                for a in range(len(C)):
+                    if C[a][b] is None:
+                        continue
+                    K = sps.kron(blocks[a], C[a][b], format="csr")
+                    S = K if S is None else S + K
+                if S is None:
+                    S = sps.csr_matrix((blocks[0].shape[0] * m, blocks[0].shape[1] * n))
+                new.append(S)
+            blocks = new
+        return blocks[0]
+
+    @takes(anything, TTTensor)
+    def apply(self, vec):
+        """Apply operator to TT tensor; the TT ranks multiply (the result
+        is rounded if the tensor has rounding parameters)."""
+        cores = []
+        for C, G in zip(self._cores, vec.cores):
+            r, n, s = G.shape
+            R, S = len(C), len(C[0])
+            m, _ = _block_shape(C)
+            X = G.transpose(1, 0, 2).reshape(n, r * s)
+            Y = np.zeros((R * r, m, S * s))
+            for a in range(R):
+                for b in range(S):
+                    if C[a][b] is not None:
+                        Z = np.asarray(C[a][b].dot(X)).reshape(m, r, s)
+                        Y[a * r:(a + 1) * r, :, b * s:(b + 1) * s] = Z.transpose(1, 0, 2)
+            cores.append(Y)
+        y = TTTensor(cores, self._codomain, vec.tol, vec.max_rank)
+        if y.auto_round:
+            y = y.round()
+        return y
+
+
+def _block_shape(C):
+    for row in C:
+        for block in row:
+            if block is not None:
+                return block.shape
+    raise ValueError("TT operator core without nonzero blocks")
+
+
+def _sum(mats):
+    S = mats[0]
+    for A in mats[1:]:
+        S = S + A
+    return S
@@ -0,0 +1,211 @@
+"""Tensors in tensor train (TT) format.
+
+A `TTTensor` of order d stores cores G_k of shape (r_{k-1}, n_k, r_k)
+with r_0 = r_d = 1, such that
+
+    X[i_1, ..., i_d] = G_1[:, i_1, :] G_2[:, i_2, :] ... G_d[:, i_d, :]
+
+The memory is O(d n r^2) instead of O(n^d). Sums concatenate the cores
+(the ranks add up); tensors created with a rounding tolerance ``tol``
+and/or a ``max_rank`` are rounded automatically after additions and
+operator applications (see `round`). Inner products and norms are
+computed by contracting the cores and never form the full tensor.
+"""
+
+import numpy as np
+
+from spuq.linalg.vector import Scalar
+from spuq.linalg.basis import CanonicalBasis
+from spuq.linalg.operator import ComponentOperator
+from spuq.linalg.tensor_basis import TensorBasis
+from spuq.linalg.tensor_vector import FullTensor, TensorVector
+from spuq.utils.type_check import takes, anything
+
+__all__ = ["TTTensor"]
+
+
+def _truncation_rank(s, delta, max_rank):
+    """Return the smallest rank k with ||s[k:]|| <= delta (at most max_rank, at least 1)."""
+    tail = np.sqrt(np.cumsum(s[::-1] ** 2))[::-1]
+    k = int(np.sum(tail > delta))
+    if max_rank is not None:
+        k = min(k, max_rank)
+    return max(k, 1)
+
+
+class TTTensor(TensorVector):
+    def __init__(self, cores, basis=None, tol=None, max_rank=None):
+        assert cores[0].shape[0] == 1 and cores[-1].shape[2] == 1
+        assert all(c1.shape[2] == c2.shape[0] for c1, c2 in zip(cores[:-1], cores[1:]))
+        if basis is None:
+            basis = TensorBasis([CanonicalBasis(c.shape[1]) for c in cores])
+        super(TTTensor, self).__init__(basis)
+        self._cores = list(cores)
+        self._tol = tol
+        self._max_rank = max_rank
+
+    @classmethod
+    def from_full(cls, X, tol=1e-14, max_rank=None, basis=None):
+        """Create TT tensor from the full array X by successive truncated
+        SVDs (TT-SVD) with relative accuracy tol in the Frobenius norm."""
+        X = np.asarray(X, dtype=float)
+        dims = X.shape
+        d = len(dims)
+        delta = tol * np.linalg.norm(X) / np.sqrt(max(d - 1, 1))
+        cores = []
+        r = 1
+        C = X.reshape(r * dims[0], -1)
+        for k in range(d - 1):
+            U, s, V_T = np.linalg.svd(C, full_matrices=False)
+            rk = _truncation_rank(s, delta, max_rank)
+            cores.append(U[:, :rk].reshape(r, dims[k], rk))
+            C = (s[:rk, np.newaxis] * V_T[:rk]).reshape(rk * dims[k + 1], -1)
+            r = rk
+        cores.append(C.reshape(r, dims[-1], 1))
+        return cls(cores, basis)
+
+    @property
+    def cores(self):
+        return self._cores
+
+    @property
+    def order(self):
+        return len(self._cores)
+
+    @property
+    def dims(self):
+        return tuple(c.shape[1] for c in self._cores)
+
+    @property
+    def ranks(self):
+        """Return the TT ranks (r_0, ..., r_d)."""
+        return (1,) + tuple(c.shape[2] for c in self._cores)
+
+    @property
+    def tol(self):
+        """Relative tolerance of the automatic rounding (None for no rounding)."""
+        return self._tol
+
+    @property
+    def max_rank(self):
+        """Maximum rank of the automatic rounding (None for no limit)."""
+        return self._max_rank
+
+    @property
+    def auto_round(self):
+        return self._tol is not None or self._max_rank is not None
+
+    def _new(self, cores):
+        return self.__class__(cores, self._basis, self._tol, self._max_rank)
+
+    def full(self):
+        """Return the full array (only feasible for small tensors)."""
+        X = self._cores[0].reshape(-1, self._cores[0].shape[2])
+        for G in self._cores[1:]:
+            X = np.dot(X, G.reshape(G.shape[0], -1)).reshape(-1, G.shape[2])
+        return X.reshape(self.dims)
+
+    def flatten(self):
+        return FullTensor(self.full(), self._basis)
+
+    def entry(self, index):
+        """Return the entry of the tensor at the given index tuple."""
+        v = np.ones((1, 1))
+        for G, i in zip(self._cores, index):
+            v = np.dot(v, G[:, i, :])
+        return float(v)
+
+    @takes(anything, ComponentOperator, int)
+    def apply_to_dim(self, A, axis):
+        G = self._cores[axis]
+        r, n, s = G.shape
+        X = G.transpose(1, 0, 2).reshape(n, r * s)
+        Y = np.asarray(A.apply_to_matrix(X))
+        cores = list(self._cores)
+        cores[axis] = Y.reshape(-1, r, s).transpose(1, 0, 2)
+        return self._new(cores)
+
+    def __eq__(self, other):  # pragma: no cover
+        """Test whether vectors are equal (have equal cores)."""
+        return (type(self) is type(other) and
+                self._basis == other._basis and
+                len(self._cores) == len(other._cores) and
+                all(np.array_equal(G, H) for G, H in zip(self._cores, other._cores)))
+
+    def __neg__(self):  # pragma: no cover
+        """Compute the negative of this vector."""
+        cores = list(self._cores)
+        cores[0] = -cores[0]
+        return self._new(cores)
+
+    def __iadd__(self, other):  # pragma: no cover
+        """Add another vector to this one (and round if auto_round is set)."""
+        assert self.dims == other.dims
+        if self.order == 1:
+            self._cores = [self._cores[0] + other._cores[0]]
+            return self
+        cores = [np.concatenate((self._cores[0], other._cores[0]), axis=2)]
+        for G, H in zip(self._cores[1:-1], other._cores[1:-1]):
+            (r1, n, s1), (r2, _, s2) = G.shape, H.shape
+            C = np.zeros((r1 + r2, n, s1 + s2))
+            C[:r1, :, :s1] = G
+            C[r1:, :, s1:] = H
+            cores.append(C)
+        cores.append(np.concatenate((self._cores[-1], other._cores[-1]), axis=0))
+        self._cores = cores
+        if self.auto_round:
+            self._cores = self.round()._cores
+        return self
+
+    def __imul__(self, other):  # pragma: no cover
+        """Multiply this vector with a scalar."""
+        if isinstance(other, Scalar):
+            self._cores[0] = other * self._cores[0]
+            return self
+        else:
+            raise TypeError
+
+    def __inner__(self, other):
+        if not isinstance(other, TTTensor):
+            return NotImplemented
+        assert self.dims == other.dims
+        v = np.ones((1, 1))
+        for G, H in zip(self._cores, other._cores):
+            # v[i, j] G[i, n, k] H[j, n, l] -> v[k, l]
+            v = np.tensordot(np.tensordot(v, G, axes=(0, 0)), H, axes=([0, 1], [0, 1]))
+        return float(v)
+
+    def norm(self):
+        """Return the Frobenius norm computed from the cores."""
+        return np.sqrt(max(self.__inner__(self), 0.0))
+
+    def _orthogonalise_right(self):
+        """Return cores with all but the first core right orthogonal."""
+        cores = list(self._cores)
+        for k in range(len(cores) - 1, 0, -1):
+            r, n, s = cores[k].shape
+            Q, R = np.linalg.qr(cores[k].reshape(r, n * s).T)
+            cores[k] = Q.T.reshape(-1, n, s)
+            cores[k - 1] = np.tensordot(cores[k - 1], R.T, axes=(2, 0))
+        return cores
+
+    def round(self, tol=None, max_rank=None):
+        """Return the tensor with smallest ranks (at most max_rank) which
+        approximates this tensor up to the relative tolerance tol in the
+        Frobenius norm (defaults are the rounding parameters of the tensor)."""
+        tol = self._tol if tol is None else tol
+        max_rank = self._max_rank if max_rank is None else max_rank
+        cores = self._orthogonalise_right()
+        d = len(cores)
+        # the norm of the tensor is the norm of the first core now
+        delta = (tol or 0.0) * np.linalg.norm(cores[0]) / np.sqrt(max(d - 1, 1))
+        for k in range(d - 1):
+            r, n, s = cores[k].shape
+            U, sv, V_T = np.linalg.svd(cores[k].reshape(r * n, s), full_matrices=False)
+            rk = _truncation_rank(sv, delta, max_rank)
+            cores[k] = U[:, :rk].reshape(r, n, rk)
+            cores[k + 1] = np.tensordot(sv[:rk, np.newaxis] * V_T[:rk], cores[k + 1], axes=(1, 0))
+        return self._new(cores)
+
+    def truncate(self, R):
+        return self.round(tol=0, max_rank=R)
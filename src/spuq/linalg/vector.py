@@ -7,7 +7,9 @@ implementations.
 Note for derived classes: It is sufficient to override the methods
 copy, __imul__, __iadd__, and either __isub__ or __neg__. The
 operations __mul__, __rmul__, __add__, __radd__ and so on are then
-defined automatically.
+defined automatically. The same holds for the in-place BLAS-1 style
+operations axpy, axpby, xpay and axpy_inner, which derived classes may
+override to avoid temporaries.
 """
 
 from abc import ABCMeta, abstractmethod, abstractproperty
@@ -15,6 +17,7 @@ from numbers import Number as Scalar
 import copy
 
 import numpy as np
+from scipy.linalg import get_blas_funcs
 
 from spuq.linalg.basis import Basis, CanonicalBasis, check_basis
 from spuq.utils import strclass, with_equality
@@ -24,6 +27,28 @@ from spuq.math_utils.math_object import MathObject
 __all__ = ["Scalar", "Vector", "FlatVector", "inner"]
 
 
+def array_axpy(a, x, y):
+    """Compute y += a * x in place for arrays without temporaries if possible."""
+    if y.flags.c_contiguous and x.flags.c_contiguous and x.dtype == y.dtype and y.dtype.char in "fdFD":
+        axpy = get_blas_funcs("axpy", (x, y))
+        z = axpy(x, y, n=y.shape[0], a=a)
+        if z is not y:  # pragma: no cover
+            y[:] = z
+    else:
+        y += a * x
+    return y
+
+
+def array_axpby(a, x, b, y):
+    """Compute y = a * x + b * y in place for arrays."""
+    if b == 0:
+        np.multiply(x, a, y)
+        return y
+    if b != 1:
+        y *= b
+    return array_axpy(a, x, y)
+
+
 class Transposable(object):
     __metaclass__ = ABCMeta
     @abstractmethod
@@ -96,6 +121,26 @@ class Vector(MathObject):
         """Scalar product of this vector with another vector."""
         return NotImplemented
 
+    def axpy(self, a, x):
+        """Compute self += a * x in place and return self."""
+        return self.__iadd__(a * x)
+
+    def axpby(self, a, x, b):
+        """Compute self = a * x + b * self in place and return self."""
+        return self.__imul__(b).axpy(a, x)
+
+    def xpay(self, x, a):
+        """Compute self = x + a * self in place and return self."""
+        return self.axpby(1, x, a)
+
+    def axpy_inner(self, a, x, y=None):
+        """Compute self += a * x in place and return the scalar product
+        of the updated vector with y (or with itself if y is None)."""
+        self.axpy(a, x)
+        if y is None:
+            y = self
+        return inner(self, y)
+
     def __rinner__(self, other):  # pragma: no cover
         """Scalar product of this vector with another vector (reverse)."""
         return NotImplemented
@@ -182,6 +227,13 @@ class FlatVector(Vector, Flat):
         the same class and basis."""
         return self.__class__(coeffs, self.basis)
 
+    def _rebind_coeffs(self, coeffs):
+        """Use ``coeffs`` (e.g. a view into a larger buffer) as
+        coefficient storage of this vector."""
+        assert coeffs.shape == self._coeffs.shape
+        coeffs[:] = self._coeffs
+        self._coeffs = coeffs
+
     def __eq__(self, other):
         """Compare vectors for equality.
 
@@ -215,6 +267,16 @@ class FlatVector(Vector, Flat):
         self._coeffs *= other
         return self
 
+    def axpy(self, a, x):
+        check_basis(self.basis, x.basis)
+        array_axpy(a, x._coeffs, self._coeffs)
+        return self
+
+    def axpby(self, a, x, b):
+        check_basis(self.basis, x.basis)
+        array_axpby(a, x._coeffs, b, self._coeffs)
+        return self
+
     def __repr__(self):
         return "<%s basis=%s, coeffs=%s>" % \
                (strclass(self.__class__), self.basis, self.coeffs)
@@ -1,5 +1,11 @@
-#from abc import ABCMeta, abstractmethod, abstractproperty
-from hashlib import sha1
+"""Multiindices with finitely many nonzero entries.
+
+A `Multiindex` is stored sparsely as the tuple of indices of its nonzero
+entries and the tuple of the respective values. Hash and order key are
+computed at most once, and `inc`/`dec` only copy the nonzero entries, so
+multiindices are cheap to use as dictionary keys in the inner loops of
+the Galerkin operators and estimators."""
+
 import numpy as np
 import scipy as sp
 
@@ -9,125 +15,158 @@ from spuq.utils.type_check import takes, anything, list_of, optional
 
 __all__ = ["Multiindex"]
 
+
 @total_ordering
 class Multiindex(object):
+    __slots__ = ("_inds", "_vals", "_hash", "_key", "_arr")
+
     @takes(anything, optional(np.ndarray, list_of(int)))
     def __init__(self, arr=None):
         # create numpy array or make a copy if it already is
         if arr is None or len(arr) == 0:
             arr = [0]
         arr = np.array(arr)
-        if not issubclass(arr.dtype.type, int):
+        if not issubclass(arr.dtype.type, (int, np.integer)):
             raise TypeError
-        self._arr = arr
-        self._normalise()
-        self.__hash = None
-
-    def _normalise(self):
-        nz = np.nonzero(self._arr)[0]
-        if len(nz):
-            l = np.max(nz)
-            self._arr = self._arr[:l + 1].copy()
-        else:
-            self._arr = np.resize(self._arr, 0)
+        inds = np.flatnonzero(arr)
+        self._set(tuple(int(i) for i in inds), tuple(int(v) for v in arr[inds]))
+
+    def _set(self, inds, vals):
+        self._inds = inds
+        self._vals = vals
+        self._hash = None
+        self._key = None
+        self._arr = None
+
+    @classmethod
+    def from_sparse(cls, inds, vals):
+        """Create multiindex from the (increasing) indices of its nonzero entries and their values."""
+        mi = cls.__new__(cls)
+        mi._set(tuple(inds), tuple(vals))
+        return mi
+
+    @property
+    def sparse(self):
+        """Return indices and values of the nonzero entries."""
+        return self._inds, self._vals
 
     def __eq__(self, other):
         return (type(self) is type(other) and
-                self.__hash__() == other.__hash__() and
-                np.array_equal(self._arr, other._arr))
+                self._inds == other._inds and
+                self._vals == other._vals)
 
     def __ne__(self, other):
         return not self.__eq__(other)
 
+    @property
+    def order_key(self):
+        """Key for sorting multiindices by `cmp_by_order`.
+
+        At equal order, the multiindex with the larger value at the first
+        differing position is larger."""
+        if self._key is None:
+            self._key = (sum(self._vals), tuple((-i, v) for i, v in zip(self._inds, self._vals)))
+        return self._key
+
     def cmp_by_order(self, other):
         assert type(self) is type(other)
-        sa = self._arr
-        oa = other._arr
-        cmpval = cmp(sum(sa), sum(oa))
-        if not cmpval:
-            l = min(len(sa), len(oa))
-            for i in xrange(l):
-                cmpval = cmp(sa[i], oa[i])
-                if cmpval:
-                    break
-        return cmpval
+        return cmp(self.order_key, other.order_key)
 
     def cmp_by_index(self, other):
         assert type(self) is type(other)
-        a1 = self._arr
-        a2 = other._arr
-        l1 = len(a1)
-        l2 = len(a2)
-        l = max(l1,l2)
-        a1 = np.append(a1, [0]*(l-l1))
-        a2 = np.append(a2, [0]*(l-l2))
-        return [cmp(v1,v2) for v1,v2 in zip(a1,a2)]
+        l = max(len(self), len(other))
+        return [cmp(self[i], other[i]) for i in xrange(l)]
+
+    def __lt__(self, other):
+        assert type(self) is type(other)
+        return self.order_key < other.order_key
 
     def __le__(self, other):
-        cmpval = self.cmp_by_order(other)
-        return cmpval <= 0
+        assert type(self) is type(other)
+        return self.order_key <= other.order_key
 
     def __gt__(self, other):
-        return not self <= other
+        assert type(self) is type(other)
+        return self.order_key > other.order_key
+
+    def __ge__(self, other):
+        assert type(self) is type(other)
+        return self.order_key >= other.order_key
 
     def __hash__(self):
-        if self.__hash is None:
-            self.__hash = int(sha1(self._arr).hexdigest(), 16)
-        return self.__hash
+        if self._hash is None:
+            self._hash = hash((self._inds, self._vals))
+        return self._hash
 
     def __len__(self):
-        return len(self._arr)
+        return self._inds[-1] + 1 if self._inds else 0
 
     def __repr__(self):
         return "<%s inds=%s>" % \
-               (strclass(self.__class__), self._arr)
+               (strclass(self.__class__), self.as_array)
 
     def __getitem__(self, i):
-        if 0 <= i < len(self._arr):
-            return self._arr[i]
-        else:
+        try:
+            return self._vals[self._inds.index(i)]
+        except ValueError:
             return 0
 
+    def __iter__(self):
+        return iter(self.as_array)
+
     @property
     def order(self):
-        return sum(self._arr)
+        return sum(self._vals)
 
     @property
     def as_array(self):
+        if self._arr is None:
+            arr = np.zeros(len(self), dtype=int)
+            arr[list(self._inds)] = self._vals
+            self._arr = arr
         return self._arr
 
     @property
     def supp(self):
-        return np.flatnonzero(self._arr)
+        return np.array(self._inds, dtype=int)
 
     def inc(self, pos, by=1):
         assert pos >= 0
-        value = self._arr[pos] if pos < len(self._arr) else 0
-        newval = value + by
+        inds = self._inds
+        try:
+            k = inds.index(pos)
+        except ValueError:
+            # new nonzero entry
+            if by < 0:
+                return None
+            if by == 0:
+                return self
+            k = 0
+            while k < len(inds) and inds[k] < pos:
+                k += 1
+            return self.from_sparse(inds[:k] + (pos,) + inds[k:],
+                                    self._vals[:k] + (by,) + self._vals[k:])
+        newval = self._vals[k] + by
         if newval < 0:
             return None
-#         if False:    # TODO: debugging work-around, clean up
-#             arr = self._arr.copy()
-#             if pos >= len(arr):
-#                 if True or len(arr):
-#                     print arr, type(arr), repr(arr)
-#                     arr = arr.copy()
-#                     arr.resize(pos + 1)
-#                 else:
-#                     arr = np.array([0] * (pos + 1))
-#         if True:
-        l = len(self._arr)
-        arr = np.array([0] * max(l, (pos + 1)))
-        if l:
-            arr[:l] = self._arr[:l]
-        arr[pos] = newval
-        return self.__class__(arr)
+        if newval == 0:
+            return self.from_sparse(inds[:k] + inds[k + 1:], self._vals[:k] + self._vals[k + 1:])
+        return self.from_sparse(inds, self._vals[:k] + (newval,) + self._vals[k + 1:])
 
     def dec(self, pos, by=1):
         return self.inc(pos, -by)
 
     def factorial(self):
-        return sp.misc.factorial(self._arr)
+        return sp.misc.factorial(self.as_array)
+
+    def __getstate__(self):
+        # same state as the former numpy array based implementation
+        return {"_arr": self.as_array, "_Multiindex__hash": None}
+
+    def __setstate__(self, state):
+        arr = np.asarray(state["_arr"])
+        inds = np.flatnonzero(arr)
+        self._set(tuple(int(i) for i in inds), tuple(int(v) for v in arr[inds]))
 
     @staticmethod
     def createCompleteOrderSet(m, p):
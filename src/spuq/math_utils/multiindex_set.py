@@ -1,9 +1,77 @@
-"""Implements a class for generating and storing sets of multiindices"""
+"""Implements a class for generating and storing sets of multiindices
+
+The generators enumerate the multiindices column by column and write
+them directly into arrays of the exact size. All sets are ordered like
+the complete order set, i.e. by total order and then recursively by the
+order of the leading entries. For sets which are too large to be stored
+`iterCompleteOrderSet` yields the multiindices one by one."""
 
 import numpy as np
 import scipy as sp
 
-__all__ = ["MultiindexSet"]
+from spuq.math_utils.multiindex import Multiindex
+
+__all__ = ["MultiindexSet", "IndexedMultiindexSet"]
+
+
+def _check_dtype(dtype, maxval):
+    dtype = np.dtype(dtype)
+    if not np.issubdtype(dtype, np.integer):
+        raise TypeError("multiindices require an integer dtype (got %s)" % dtype)
+    if maxval > np.iinfo(dtype).max:
+        raise OverflowError("entries up to %i cannot be stored as %s" % (maxval, dtype))
+    return dtype
+
+
+def _sort_rows(arr):
+    """Sort rows in the order of the complete order set."""
+    if arr.shape[1] <= 1:
+        return arr[np.argsort(arr[:, 0], kind="mergesort")] if arr.shape[1] else arr
+    # sort by total order, then by the order of the leading m-1, m-2, ... entries
+    csum = np.cumsum(arr, axis=1)
+    return arr[np.lexsort(csum.T)]
+
+
+def _create_bounded(m, maxval, init, combine, bound, dtype):
+    """Create all multiindices of length m with entries k in 0..maxval[k] whose
+    cost does not exceed bound.
+
+    The cost of a multiindex is obtained by applying combine(cost, k, v) for
+    the entries v at positions k, starting with init. It has to be
+    nondecreasing in v and along the positions such that the set is
+    downward closed."""
+    arr = np.zeros((1, 0), dtype)
+    cost = np.array([init])
+    for k in xrange(m):
+        parts = []
+        for v in xrange(maxval[k] + 1):
+            c = combine(cost, k, v)
+            mask = c <= bound
+            if not mask.any():
+                break
+            parts.append((v, mask, c[mask]))
+        n = sum(len(c) for _, _, c in parts)
+        new = np.empty((n, k + 1), dtype)
+        newcost = np.empty(n, cost.dtype)
+        start = 0
+        for v, mask, c in parts:
+            stop = start + len(c)
+            new[start:stop, :k] = arr[mask]
+            new[start:stop, k] = v
+            newcost[start:stop] = c
+            start = stop
+        arr, cost = new, newcost
+    return _sort_rows(arr)
+
+
+def _iter_shell(m, q):
+    """Yield all tuples of length m with sum q in the order of the complete order set."""
+    if m == 1:
+        yield (q,)
+    elif m > 1:
+        for r in xrange(q + 1):
+            for j in _iter_shell(m - 1, r):
+                yield j + (q - r,)
 
 
 class MultiindexSet(object):
@@ -41,37 +109,221 @@ class MultiindexSet(object):
     def factorial(self):
         return sp.factorial(self.arr).prod(1)
 
-    @staticmethod
-    def _makeGenerator(m, func):
-        p = 0
-        k = 0
-        while True:
-            mis = func(m, p)
-            for i in xrange(k, len(mis)):
-                yield mis[i]
-            k = len(mis)
-            p = p + 1
+    @classmethod
+    def iterCompleteOrderSet(cls, m, p=None, reversed=False, dtype=int):
+        """Yield the multiindices of the complete order set one by one
+        (without limit on the order if p is None)."""
+        dtype = _check_dtype(dtype, 0 if p is None else p)
+        if m == 0:
+            yield np.zeros(0, dtype)
+            return
+        q = 0
+        while p is None or q <= p:
+            for mi in _iter_shell(m, q):
+                arr = np.array(mi, dtype)
+                yield arr[::-1] if reversed else arr
+            q += 1
 
     @classmethod
-    def createCompleteOrderSet(cls, m, p=None, reversed=False):
+    def createCompleteOrderSet(cls, m, p=None, reversed=False, dtype=int):
+        """Create the set of all multiindices of length m and total order at most p.
+
+        If p is None a generator over all multiindices of length m is returned."""
         if p is None:
-            return cls._makeGenerator(m, cls.createCompleteOrderSet)
-
-        def create(m, p):
-            if m == 0:
-                return np.zeros((1, 0), np.int8)
-            else:
-                I = np.zeros((0, m), np.int8)
-                for q in xrange(0, p + 1):
-                    J = create(m - 1, q)
-                    Jn = q - J.sum(1).reshape((J.shape[0], 1))
-                    I = np.vstack((I, np.hstack((J, Jn))))
-                return I
-        arr = create(m, p)
+            return cls.iterCompleteOrderSet(m, reversed=reversed, dtype=dtype)
+        dtype = _check_dtype(dtype, p)
+        # the rows of each stage are sorted by their sums, hence the rows
+        # with sum at most q are a leading block
+        arr = np.zeros((1, 0), dtype)
+        sums = np.zeros(1, dtype)
+        for k in xrange(m):
+            counts = np.searchsorted(sums, np.arange(p + 1), side="right")
+            new = np.empty((counts.sum(), k + 1), dtype)
+            start = 0
+            for q, n in enumerate(counts):
+                new[start:start + n, :k] = arr[:n]
+                new[start:start + n, k] = q - sums[:n]
+                start += n
+            arr = new
+            sums = np.repeat(np.arange(p + 1, dtype=dtype), counts)
         if reversed:
             arr = arr[:, ::-1]
         return cls(arr)
 
-# createFullTensorSet(m, p)
-# createAnisoFullTensorSet(p)
-# createLimitedCompleteOrderSet(m, l, p)
+    @classmethod
+    def createLimitedCompleteOrderSet(cls, m, l, p, dtype=int):
+        """Create the complete order set of multiindices with at most l nonzero entries."""
+        arr = cls.createCompleteOrderSet(m, p, dtype=dtype).arr
+        return cls(arr[(arr != 0).sum(1) <= l])
+
+    @classmethod
+    def createAnisoFullTensorSet(cls, p, dtype=int):
+        """Create the set of all multiindices with entries up to p[k] at position k."""
+        p = list(p)
+        dtype = _check_dtype(dtype, max(p) if p else 0)
+        if not p:
+            return cls(np.zeros((1, 0), dtype))
+        arr = np.indices([pk + 1 for pk in p], dtype=dtype).reshape(len(p), -1).T
+        return cls(_sort_rows(arr))
+
+    @classmethod
+    def createFullTensorSet(cls, m, p, dtype=int):
+        """Create the set of all multiindices of length m with entries up to p."""
+        return cls.createAnisoFullTensorSet([p] * m, dtype=dtype)
+
+    @classmethod
+    def createHyperbolicCrossSet(cls, m, p, dtype=int):
+        """Create the hyperbolic cross set of multiindices with :math:`\prod_k (\mu_k+1) \le p+1`."""
+        dtype = _check_dtype(dtype, p)
+        return cls(_create_bounded(m, [p] * m, 1, lambda c, k, v: c * (v + 1), p + 1, dtype))
+
+    @classmethod
+    def createWeightedAnisoSet(cls, weights, p, dtype=int):
+        """Create the anisotropic set of multiindices with :math:`\sum_k w_k\mu_k \le p`
+        for positive weights w_k."""
+        weights = np.asarray(weights, dtype=float)
+        assert np.all(weights > 0)
+        maxval = [int(np.floor(p / w + 1e-12)) for w in weights]
+        dtype = _check_dtype(dtype, max(maxval) if maxval else 0)
+        return cls(_create_bounded(len(weights), maxval, 0.0,
+                                   lambda c, k, v: c + weights[k] * v, p * (1 + 1e-12), dtype))
+
+
+class IndexedMultiindexSet(object):
+    """Set of multiindices with consecutive integer ids and neighbour tables.
+
+    The multiindices are numbered in the order they are added. ``plus[i, m]``
+    and ``minus[i, m]`` are the ids of :math:`\mu_i+e_m` and :math:`\mu_i-e_m`
+    or -1 if these are not in the set. The tables are updated incrementally
+    when multiindices are added and have M columns, where M is the length of
+    the longest multiindex in the set."""
+
+    def __init__(self, multiindices=()):
+        self._mis = []
+        self._ids = {}
+        self._M = 0
+        self._arr = np.empty((0, 0), dtype=int)
+        self._plus = np.empty((0, 0), dtype=int)
+        self._minus = np.empty((0, 0), dtype=int)
+        self.update(multiindices)
+
+    @property
+    def M(self):
+        return self._M
+
+    @property
+    def arr(self):
+        """The multiindices as rows of an integer array (ordered by id).
+
+        The returned array is a view which becomes invalid when
+        multiindices are added."""
+        return self._arr[:len(self._mis), :self._M]
+
+    @property
+    def plus(self):
+        """Ids of the multiindices incremented at position m (-1 if absent).
+
+        The returned array is a view which becomes invalid when
+        multiindices are added."""
+        return self._plus[:len(self._mis), :self._M]
+
+    @property
+    def minus(self):
+        """Ids of the multiindices decremented at position m (-1 if absent).
+
+        The returned array is a view which becomes invalid when
+        multiindices are added."""
+        return self._minus[:len(self._mis), :self._M]
+
+    @property
+    def multiindices(self):
+        """Return the list of multiindices ordered by id."""
+        return list(self._mis)
+
+    def __len__(self):
+        return len(self._mis)
+
+    def __iter__(self):
+        return iter(self._mis)
+
+    def __contains__(self, mu):
+        return mu in self._ids
+
+    def __getitem__(self, i):
+        return self._mis[i]
+
+    def index(self, mu):
+        """Return the id of mu or -1 if it is not in the set."""
+        return self._ids.get(mu, -1)
+
+    def neighbours(self, mu, m):
+        """Return the ids of mu+e_m and mu-e_m (-1 if absent)."""
+        i = self._ids[mu]
+        if m >= self._M:
+            return -1, -1
+        return self._plus[i, m], self._minus[i, m]
+
+    def _reserve(self, n, M):
+        rows, cols = self._plus.shape
+        if n <= rows and M <= cols:
+            return
+        # grow geometrically to get amortised constant cost per added multiindex
+        if n > rows:
+            rows = max(n, 2 * rows, 8)
+        if M > cols:
+            cols = max(M, 2 * cols, 4)
+        k = len(self._mis)
+        for name, fill in (("_arr", 0), ("_plus", -1), ("_minus", -1)):
+            old = getattr(self, name)
+            new = np.empty((rows, cols), dtype=old.dtype)
+            new[:k] = fill
+            new[:k, :old.shape[1]] = old[:k]
+            setattr(self, name, new)
+
+    def add(self, mu):
+        """Add multiindex mu to the set and return its id."""
+        assert isinstance(mu, Multiindex)
+        i = self._ids.get(mu)
+        if i is not None:
+            return i
+        i = len(self._mis)
+        # new columns are -1 since no multiindex in the set is long enough
+        M = max(self._M, len(mu))
+        self._reserve(i + 1, M)
+        self._M = M
+        self._mis.append(mu)
+        self._ids[mu] = i
+        plus, minus, ids = self._plus, self._minus, self._ids
+        plus[i] = -1
+        minus[i] = -1
+        self._arr[i] = 0
+        self._arr[i, list(mu.sparse[0])] = mu.sparse[1]
+        for m in xrange(M):
+            j = ids.get(mu.inc(m), -1)
+            if j >= 0:
+                plus[i, m] = j
+                minus[j, m] = i
+        for m in mu.sparse[0]:
+            j = ids.get(mu.dec(m), -1)
+            if j >= 0:
+                minus[i, m] = j
+                plus[j, m] = i
+        return i
+
+    def update(self, multiindices):
+        """Add all given multiindices."""
+        for mu in multiindices:
+            self.add(mu)
+
+    def copy(self):
+        new = IndexedMultiindexSet()
+        new._mis = list(self._mis)
+        new._ids = dict(self._ids)
+        new._M = self._M
+        new._arr = self._arr.copy()
+        new._plus = self._plus.copy()
+        new._minus = self._minus.copy()
+        return new
+
+    def __repr__(self):
+        return "<IndexedMISet M={0}, count={1}>".format(self._M, len(self))
@@ -115,6 +115,38 @@ def test_le():
     assert_false(alpha3 > alpha5)
     assert_false(alpha4 > alpha5)
 
+def test_inc_dec_sparse():
+    alpha = Multiindex([0, 2, 0, 1])
+    assert_equal(alpha.inc(3, -1), Multiindex([0, 2]))
+    assert_equal(len(alpha.inc(3, -1)), 2)
+    assert_equal(alpha.inc(2), Multiindex([0, 2, 1, 1]))
+    assert_equal(alpha.inc(0).sparse, ((0, 1, 3), (1, 2, 1)))
+    assert_equal(alpha.dec(1, 3), None)
+    assert_equal(Multiindex.from_sparse([1, 3], [2, 1]), alpha)
+    assert_equal(hash(Multiindex.from_sparse([1, 3], [2, 1])), hash(alpha))
+
+
+def test_order_key():
+    mis = [Multiindex(list(a)) for a in
+           [[1, 1], [0, 2], [2], [0, 0, 1], [1], [0, 1], [], [3, 0, 0, 1], [1, 0, 1]]]
+    for mi1 in mis:
+        for mi2 in mis:
+            assert_equal(mi1 <= mi2, mi1.cmp_by_order(mi2) <= 0)
+            assert_equal(mi1 < mi2, mi1.cmp_by_order(mi2) < 0)
+    smis = sorted(mis)
+    assert_true(smis == sorted(mis, key=lambda mi: mi.order_key))
+    assert_equal([list(mi) for mi in smis[:4]], [[], [0, 0, 1], [0, 1], [1]])
+
+
+def test_pickle():
+    import pickle
+    alpha = Multiindex([0, 2, 0, 1])
+    for protocol in range(3):
+        beta = pickle.loads(pickle.dumps(alpha, protocol))
+        assert_equal(alpha, beta)
+        assert_equal(hash(alpha), hash(beta))
+
+
 def test_set_of_mi():
     mu1a = Multiindex(np.array([0, 1]))
     mu1b = Multiindex(np.array([0, 1]))
@@ -2,6 +2,7 @@ import numpy as np
 
 from spuq.utils.testing import *
 from spuq.math_utils.multiindex_set import *
+from spuq.math_utils.multiindex import Multiindex
 
 
 def test_init():
@@ -34,6 +35,54 @@ def test_create_comp_order():
     mi = MultiindexSet.createCompleteOrderSet(7,  5)
     assert_equal(mi.count, 792)
 
+    # entries beyond the int8 range
+    mi = MultiindexSet.createCompleteOrderSet(2, 200)
+    assert_equal(mi.p, 200)
+    assert_equal(mi.count, 201 * 202 // 2)
+    mi = MultiindexSet.createCompleteOrderSet(2, 3, dtype=np.int16)
+    assert_equal(mi.arr.dtype, np.int16)
+    assert_raises(OverflowError, MultiindexSet.createCompleteOrderSet, 1, 200, dtype=np.int8)
+    assert_raises(TypeError, MultiindexSet.createCompleteOrderSet, 1, 2, dtype=float)
+
+
+def test_create_order():
+    mi = MultiindexSet.createCompleteOrderSet(2, 2)
+    assert_equal(mi.arr.tolist(), [[0, 0], [0, 1], [1, 0], [0, 2], [1, 1], [2, 0]])
+    mi = MultiindexSet.createCompleteOrderSet(2, 2, reversed=True)
+    assert_equal(mi.arr.tolist(), [[0, 0], [1, 0], [0, 1], [2, 0], [1, 1], [0, 2]])
+
+
+def test_iter_comp_order():
+    ref = MultiindexSet.createCompleteOrderSet(3, 4)
+    gen = MultiindexSet.createCompleteOrderSet(3)
+    for i in range(len(ref)):
+        assert_equal(gen.next(), ref[i])
+    assert_equal(gen.next().sum(), 5)
+    mis = list(MultiindexSet.iterCompleteOrderSet(3, 4, reversed=True))
+    assert_equal(np.array(mis), ref.arr[:, ::-1])
+
+
+def test_create_tensor():
+    mi = MultiindexSet.createFullTensorSet(3, 2)
+    assert_equal(mi.count, 27)
+    assert_equal(mi.arr.max(), 2)
+    mi = MultiindexSet.createAnisoFullTensorSet([1, 0, 2])
+    assert_equal(mi.arr.tolist(), [[0, 0, 0], [0, 0, 1], [1, 0, 0], [0, 0, 2], [1, 0, 1], [1, 0, 2]])
+
+
+def test_create_limited_hyperbolic_aniso():
+    mi = MultiindexSet.createLimitedCompleteOrderSet(3, 1, 2)
+    assert_equal(mi.arr.tolist(), [[0, 0, 0], [0, 0, 1], [0, 1, 0], [1, 0, 0], [0, 0, 2], [0, 2, 0], [2, 0, 0]])
+    mi = MultiindexSet.createHyperbolicCrossSet(2, 3)
+    assert_equal(mi.arr.tolist(), [[0, 0], [0, 1], [1, 0], [0, 2], [1, 1], [2, 0], [0, 3], [3, 0]])
+    mi = MultiindexSet.createWeightedAnisoSet([1, 2], 3)
+    assert_equal(mi.arr.tolist(), [[0, 0], [0, 1], [1, 0], [1, 1], [2, 0], [3, 0]])
+    # subsets keep the order of the complete order set
+    full = [tuple(r) for r in MultiindexSet.createCompleteOrderSet(4, 6).arr]
+    for mi in [MultiindexSet.createHyperbolicCrossSet(4, 6), MultiindexSet.createWeightedAnisoSet([1, 1.5, 2, 3], 6)]:
+        pos = [full.index(tuple(r)) for r in mi.arr]
+        assert_equal(pos, sorted(pos))
+
 
 def test_index():
     mi = MultiindexSet(np.array([[1, 1], [2, 3], [3, 6], [1, 7]]))
@@ -59,4 +108,48 @@ def test_repr():
     assert_true(repr.startswith("<MISet m=2, p=3, arr=[[0 0]"))
 
 
+def test_indexed_neighbours():
+    mis = [Multiindex(mi) for mi in MultiindexSet.createCompleteOrderSet(3, 2)]
+    I = IndexedMultiindexSet(mis)
+    assert_equal(len(I), 10)
+    assert_equal(I.M, 3)
+    assert_equal(I.plus.shape, (10, 3))
+    for i, mu in enumerate(mis):
+        assert_equal(I.index(mu), i)
+        assert_true(I[i] == mu)
+        for m in range(3):
+            j = I.plus[i, m]
+            assert_equal(j, I.index(mu.inc(m)))
+            k = I.minus[i, m]
+            if mu[m] == 0:
+                assert_equal(k, -1)
+            else:
+                assert_true(I[k] == mu.dec(m))
+    assert_equal(I.index(Multiindex([3])), -1)
+    assert_equal(I.arr, MultiindexSet.createCompleteOrderSet(3, 2).arr)
+
+
+def test_indexed_add():
+    I = IndexedMultiindexSet([Multiindex(), Multiindex([0, 1])])
+    assert_equal(I.M, 2)
+    assert_equal(I.plus[0].tolist(), [-1, 1])
+    assert_equal(I.neighbours(Multiindex(), 2), (-1, -1))
+    # adding a longer multiindex extends the tables and links the existing entries
+    J = I.copy()
+    i = J.add(Multiindex([0, 1, 1]))
+    assert_equal(i, 2)
+    assert_equal(J.add(Multiindex([0, 1, 1])), 2)
+    assert_equal(J.M, 3)
+    assert_equal(J.plus.tolist(), [[-1, 1, -1], [-1, -1, 2], [-1, -1, -1]])
+    assert_equal(J.minus.tolist(), [[-1, -1, -1], [-1, 0, -1], [-1, -1, 1]])
+    assert_equal(J.arr.tolist(), [[0, 0, 0], [0, 1, 0], [0, 1, 1]])
+    assert_equal(len(I), 2)
+    assert_equal(I.M, 2)
+    # many additions reallocate the tables
+    J.update(Multiindex([k]) for k in range(1, 20))
+    assert_equal(J.plus[0, 0], J.index(Multiindex([1])))
+    assert_equal(J.minus[J.index(Multiindex([19]))].tolist(), [J.index(Multiindex([18])), -1, -1])
+    assert_true(Multiindex([5]) in J)
+
+
 test_main()
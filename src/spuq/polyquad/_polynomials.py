@@ -72,6 +72,7 @@ Legendre P_n(x), [ - 1, 1], w(x) = 1, 2 / (2n + 1), (n + 1, 0, 2n + 1, n)
 Stoch. Hermite He_n(x), [ - inf, inf], w(x) = 1, (sqrt(2 * pi)n!), (1, 0, 1, n)
 """
 
+import numpy as np
 import scipy
 
 from spuq.utils.type_check import takes, anything
@@ -186,8 +187,63 @@ def _compute_poly2(rc_func, n, x): # pragma: no cover
         return h1
 
 
+def vandermonde_from_rc(rc, x, out, deriv=0):
+    """Compute the values (or the ``deriv``-th derivatives) of the
+    polynomials of degree 0 to n at the points x in place in ``out``.
+
+    ``rc`` is an (n, 3) array of the recurrence coefficients
+    :math:`(a_k, b_k, c_k)` for k < n, ``x`` a one-dimensional array and
+    ``out`` an array of shape (n + 1, len(x)). The derivatives follow from
+    differentiating the recurrence
+
+    .. math:: p^{(d)}_{k+1} = (a_k + x b_k) p^{(d)}_k - c_k p^{(d)}_{k-1} + d b_k p^{(d-1)}_k
+    """
+    n = rc.shape[0]
+    assert out.shape == (n + 1, x.shape[0])
+    t = np.empty_like(x)
+    lower = None
+    for d in xrange(deriv + 1):
+        V = out if d == deriv else np.empty_like(out)
+        V[0] = 1 if d == 0 else 0
+        for k in xrange(n):
+            a, b, c = rc[k]
+            np.multiply(x, b, out=t)
+            t += a
+            np.multiply(t, V[k], out=V[k + 1])
+            if k > 0 and c != 0:
+                np.multiply(V[k - 1], c, out=t)
+                V[k + 1] -= t
+            if d > 0:
+                np.multiply(lower[k], d * b, out=t)
+                V[k + 1] += t
+        lower = V
+    return out
+
+
+def _eval_expansion(algorithm, rc_func, coeffs, x):
+    """Evaluate the expansions with the coefficient vectors given along the
+    first axis of ``coeffs`` at all points ``x``.
+
+    Returns an array of shape coeffs.shape[1:] + x.shape."""
+    coeffs = np.asarray(coeffs, dtype=float)
+    x = np.asarray(x, dtype=float)
+    C = coeffs.reshape(coeffs.shape[0], -1, 1)
+    X = x.reshape(1, -1)
+    values = algorithm(rc_func, C, X) + _0(X)
+    return values.reshape(coeffs.shape[1:] + x.shape)
+
+
 def eval_clenshaw(rc_func, coeffs, x):
-    """Evaluate the polynomial using Clenshaw's algorithm"""
+    """Evaluate the polynomial using Clenshaw's algorithm
+
+    For a matrix of coefficients, all polynomials given by the columns are
+    evaluated at once (see `_eval_expansion`)."""
+    if np.ndim(coeffs) > 1:
+        return _eval_expansion(_clenshaw, rc_func, coeffs, x)
+    return _clenshaw(rc_func, coeffs, x)
+
+
+def _clenshaw(rc_func, coeffs, x):
     q1 = q2 = _0(x)
     n = len(coeffs) - 1
     for k in reversed(xrange(n + 1)):
@@ -199,7 +255,16 @@ def eval_clenshaw(rc_func, coeffs, x):
 
 
 def eval_forsythe(rc_func, coeffs, x):
-    """Evaluate the polynomial using Forsythe's algorithm"""
+    """Evaluate the polynomial using Forsythe's algorithm
+
+    For a matrix of coefficients, all polynomials given by the columns are
+    evaluated at once (see `_eval_expansion`)."""
+    if np.ndim(coeffs) > 1:
+        return _eval_expansion(_forsythe, rc_func, coeffs, x)
+    return _forsythe(rc_func, coeffs, x)
+
+
+def _forsythe(rc_func, coeffs, x):
     n = len(coeffs) - 1
 
     t0 = _1(x)
@@ -1,4 +1,7 @@
+import os
 import math
+import hashlib
+import tempfile
 from abc import ABCMeta, abstractmethod, abstractproperty
 
 import numpy as np
@@ -22,9 +25,19 @@ class PolynomialFamily(object):
         """Return specific structure coefficient"""
         return NotImplemented
 
-    def eval(self, n, x, all_degrees=False):
-        """Evaluate polynomial of degree ``n`` at points ``x``"""
-        values = _p.compute_poly(self.recurrence_coefficients, n, x)
+    def eval(self, n, x, all_degrees=False, out=None):
+        """Evaluate polynomial of degree ``n`` at points ``x``
+
+        Unless ``x`` is a polynomial, the polynomials of all degrees up to
+        ``n`` are computed in one array of shape (n + 1,) + x.shape (see
+        `vandermonde`), which may be passed as ``out``. With
+        ``all_degrees`` this array is returned."""
+        if isinstance(x, np.poly1d):
+            values = _p.compute_poly(self.recurrence_coefficients, n, x)
+        else:
+            values = self.vandermonde(n, x, out=out)
+            if not all_degrees and np.ndim(x) == 0:
+                return float(values[-1])
         if all_degrees:
             return values
         else:
@@ -34,6 +47,29 @@ class PolynomialFamily(object):
         x = np.poly1d([1, 0])
         return self.eval(n, x)
 
+    def _rc_array(self, n):
+        """Return the recurrence coefficients for the degrees 0 to n - 1 as (n, 3) array."""
+        return np.array([self.recurrence_coefficients(k) for k in xrange(n)], dtype=float).reshape(n, 3)
+
+    def vandermonde(self, n, x, out=None, deriv=0):
+        """Return the values (or the ``deriv``-th derivatives) of the
+        polynomials of degree 0 to ``n`` at the points ``x`` as array of
+        shape (n + 1,) + x.shape.
+
+        The values are computed in place in ``out`` if given."""
+        x = np.asarray(x, dtype=float)
+        shape = (n + 1,) + x.shape
+        if out is None:
+            out = np.empty(shape)
+        assert out.shape == shape and out.flags.c_contiguous
+        _p.vandermonde_from_rc(self._rc_array(n), x.reshape(-1), out.reshape(n + 1, -1), deriv)
+        return out
+
+    def eval_expansion(self, coeffs, x):
+        """Evaluate the expansion(s) with coefficients ``coeffs`` (degrees
+        along the first axis) at the points ``x`` with Clenshaw's algorithm."""
+        return _p.eval_clenshaw(self.recurrence_coefficients, coeffs, x)
+
     def get_coefficients(self, n):
         """Return coefficients of the polynomial with degree ``n`` of
         the family."""
@@ -47,18 +83,38 @@ class PolynomialFamily(object):
         (a, b, c) = self.recurrence_coefficients(n)
         return (a / b, 1 / b, c / b)
 
-    def get_structure_coefficients(self, n):
-        """Return structure coefficients of indices up to ``n``"""
-
+    def get_triple_products(self, n, cache_dir=None):
+        """Return the array T with T[a, b, c] = E[p_a p_b p_c] for degrees
+        below ``n``.
+
+        The products are computed with a Gauss rule for all entries at
+        once and kept in memory; a request for a higher ``n`` only adds
+        the new slabs. If ``cache_dir`` is given, the array is also read
+        from and stored in a .npy file in this directory, which is named
+        after the family and its recurrence coefficients."""
+        triples = getattr(self, "_triples", np.empty((0, 0, 0)))
+        if n > len(triples) and cache_dir is not None:
+            triples = _load_triples(self, cache_dir, triples)
+        if n > len(triples):
+            triples = _grow_triples(self, triples, n)
+            if cache_dir is not None:
+                _save_triples(self, cache_dir, triples)
+        if len(triples) > len(getattr(self, "_triples", ())):
+            triples.flags.writeable = False
+            self._triples = triples
+        return triples[:n, :n, :n]
+
+    def get_structure_coefficients(self, n, cache_dir=None):
+        """Return structure coefficients of indices up to ``n``, where
+        entry [c, b, a] is the coefficient of p_c in p_a * p_b."""
         structcoeffs = getattr(self, "_structcoeffs", np.empty((0, 0, 0)))
-
         if n > structcoeffs.shape[0]:
-            structcoeffs = np.array(
-                [[[self.get_structure_coefficient(a, b, c)
-                   for a in xrange(n)]
-                  for b in xrange(n)]
-                 for c in xrange(n)])
-
+            triples = self.get_triple_products(n, cache_dir)
+            sqnorm = np.array([self.norm(c, False) for c in xrange(n)], dtype=float)
+            # triple products are symmetric, so T[c, b, a] = T[a, b, c]
+            structcoeffs = triples / sqnorm[:, np.newaxis, np.newaxis]
+            structcoeffs.flags.writeable = False
+            self._structcoeffs = structcoeffs
         return structcoeffs[0:n, 0:n, 0:n]
 
     @abstractmethod
@@ -73,7 +129,12 @@ class PolynomialFamily(object):
 
 
 class BasePolynomialFamily(PolynomialFamily):
-    """ """
+    """Family of polynomials given by a function for the recurrence coefficients.
+
+    The recurrence coefficients, the derived beta coefficients and the
+    squared norms are stored in arrays whose size grows with the largest
+    degree requested. Hence `recurrence_coefficients`, `get_beta` and
+    `norm` also accept integer arrays of degrees and then return arrays."""
 
     def __init__(self, rc_func, sqnorm_func=None, sc_func=None, normalised=False, cache_size=1000):
         if cache_size > 0:
@@ -93,6 +154,33 @@ class BasePolynomialFamily(PolynomialFamily):
         self._sc_func = sc_func
 
         self._normalised = normalised
+        self._reset_tables()
+
+    def _reset_tables(self):
+        # rows (a_n, b_n, c_n) and (beta_0, beta_1, beta_-1) for n = 0, 1, ...
+        self._rc_table = np.empty((0, 3))
+        self._beta_table = np.empty((0, 3))
+        self._sqnorm_table = np.empty(0)
+        self._triples = np.empty((0, 0, 0))
+        self._structcoeffs = np.empty((0, 0, 0))
+
+    def _grow(self, table, n, func):
+        """Return table extended by func(k) for the new rows up to at least n."""
+        if n < len(table):
+            return table
+        k = len(table)
+        new = np.array([func(i) for i in xrange(k, max(n + 1, 2 * k, 16))], dtype=float)
+        return np.concatenate((table, new.reshape((-1,) + table.shape[1:])))
+
+    def _rc_rows(self, n):
+        if n >= len(self._rc_table):
+            rc = self._grow(self._rc_table, n, self._rc_func)
+            k = len(self._beta_table)
+            a, b, c = rc[k:, 0], rc[k:, 1], rc[k:, 2]
+            beta = np.column_stack((a / b, 1 / b, c / b))
+            self._rc_table = rc
+            self._beta_table = np.concatenate((self._beta_table, beta))
+        return self._rc_table, self._beta_table
 
     def normalise(self):
         rc_func = _p.normalise_rc(self._rc_func, self._sqnorm_func)
@@ -100,15 +188,55 @@ class BasePolynomialFamily(PolynomialFamily):
         self._sqnorm_func = None
         self._sc_func = NotImplemented
         self._normalised = True
+        self._reset_tables()
+
+    def _rc_array(self, n):
+        rc, _ = self._rc_rows(n)
+        return rc[:n]
 
     def recurrence_coefficients(self, n):
-        return self._rc_func(n)
+        """Return the recurrence coefficients (a_n, b_n, c_n) for a degree
+        or (as arrays) for an array of degrees."""
+        if isinstance(n, np.ndarray):
+            rc, _ = self._rc_rows(n.max() if n.size else 0)
+            return rc[n, 0], rc[n, 1], rc[n, 2]
+        if not _is_degree(n):
+            return self._rc_func(n)
+        rc, _ = self._rc_rows(n)
+        return tuple(rc[n].tolist())
+
+    def get_beta(self, n):
+        """Return the coefficients beta needed to multiply a polynomial by x such that
+        p.x * p[n] == beta[1] * p[n + 1] - beta[0] * p[n] + beta[-1] * p[n - 1]
+
+        For an array of degrees the coefficients are returned as arrays."""
+        if isinstance(n, np.ndarray):
+            _, beta = self._rc_rows(n.max() if n.size else 0)
+            return beta[n, 0], beta[n, 1], beta[n, 2]
+        if not _is_degree(n):
+            return PolynomialFamily.get_beta(self, n)
+        _, beta = self._rc_rows(n)
+        return tuple(beta[n].tolist())
 
     def get_structure_coefficient(self, a, b, c):
-        return self._sc_func(a, b, c)
+        """Return the coefficient of p_c in the expansion of p_a * p_b.
+
+        Without an explicit formula it is computed exactly with a Gauss rule."""
+        if self._sc_func is not NotImplemented:
+            return self._sc_func(a, b, c)
+        from spuq.polyquad.quad_1d import gauss_rule
+        x, w = gauss_rule(self, (a + b + c) // 2 + 1)
+        V = self.vandermonde(max(a, b, c), x)
+        return float(np.dot(w, V[a] * V[b] * V[c])) / self.norm(c, False)
 
     def norm(self, n, sqrt=True):
-        """Return the norm of the `n`-th polynomial."""
+        """Return the norm of the `n`-th polynomial (or the norms for an array of degrees)."""
+        if isinstance(n, np.ndarray):
+            if self._normalised:
+                return np.ones(n.shape)
+            self._sqnorm_table = self._grow(self._sqnorm_table, n.max() if n.size else 0, self._sqnorm_func)
+            sqnorm = self._sqnorm_table[n]
+            return np.sqrt(sqnorm) if sqrt else sqnorm
         if self._normalised:
             return 1.0
         elif sqrt:
@@ -122,6 +250,69 @@ class BasePolynomialFamily(PolynomialFamily):
         return self._normalised
 
 
+def _is_degree(n):
+    return isinstance(n, (int, long, np.integer)) and n >= 0
+
+
+def _grow_triples(family, triples, n):
+    """Return the triple products up to degree n - 1, reusing the given ones."""
+    from spuq.polyquad.quad_1d import gauss_rule
+    k = len(triples)
+    x, w = gauss_rule(family, (3 * n - 2) // 2 + 1)
+    V = family.vandermonde(n - 1, x)
+    T = np.empty((n, n, n))
+    T[:k, :k, :k] = triples
+    # slab of the new degrees, the other entries follow by symmetry
+    slab = np.einsum("aq,bq,cq->abc", V[k:] * w, V, V)
+    T[k:] = slab
+    T[:, k:] = slab.transpose(1, 0, 2)
+    T[:, :, k:] = slab.transpose(1, 2, 0)
+    # p_a * p_b has degree a + b, so T vanishes unless |a - b| <= c <= a + b
+    a, b, c = np.ogrid[:n, :n, :n]
+    T[(c > a + b) | (c < abs(a - b))] = 0
+    return T
+
+
+def _triples_filename(family, cache_dir):
+    rc = np.ascontiguousarray(family._rc_array(16))
+    key = hashlib.sha1(np.round(rc, 12).tostring()).hexdigest()[:16]
+    return os.path.join(cache_dir, "triples_%s_%s.npy" % (family.__class__.__name__, key))
+
+
+def _load_triples(family, cache_dir, triples):
+    filename = _triples_filename(family, cache_dir)
+    if os.path.exists(filename):
+        stored = np.load(filename)
+        if len(stored) > len(triples):
+            return stored
+    return triples
+
+
+def _save_triples(family, cache_dir, triples):
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+    # write to a temporary file first such that readers never see partial files
+    fd, tmpname = tempfile.mkstemp(suffix=".npy", dir=cache_dir)
+    with os.fdopen(fd, "wb") as f:
+        np.save(f, triples)
+    os.rename(tmpname, _triples_filename(family, cache_dir))
+
+
+_shared_families = {}
+
+
+def shared_family(cls, *args, **kwargs):
+    """Return an instance of the polynomial family ``cls`` with the given
+    parameters which is shared with all other callers, such that its
+    coefficient tables are computed only once."""
+    key = (cls, args, tuple(sorted(kwargs.items())))
+    family = _shared_families.get(key)
+    if family is None:
+        family = cls(*args, **kwargs)
+        _shared_families[key] = family
+    return family
+
+
 class LegendrePolynomials(BasePolynomialFamily):
 
     def __init__(self, a= -1.0, b=1.0, normalised=True):
@@ -189,3 +380,29 @@ class ChebyshevU(BasePolynomialFamily):
         super(self.__class__, self).__init__(rc_func, sqnorm_func)
         if normalised:
             self.normalise()
+
+
+def eval_product_basis(families, multiindices, X, chunk_size=4096):
+    """Evaluate the tensor product polynomials given by the rows of the
+    integer array ``multiindices`` at the samples given as rows of ``X``.
+
+    The polynomials of family ``families[m]`` are evaluated for column m
+    of X once up to the maximum degree required and the products are
+    gathered by integer indexing. The samples are processed in chunks of
+    ``chunk_size`` to bound the memory of the temporaries. Returns an
+    array of shape (len(multiindices), len(X))."""
+    I = np.asarray(multiindices, dtype=int)
+    X = np.asarray(X, dtype=float)
+    assert I.ndim == 2 and X.ndim == 2
+    assert X.shape[1] >= I.shape[1] and len(families) >= I.shape[1]
+    # the polynomial of degree zero is 1, hence only nonzero entries matter
+    cols = [(m, np.flatnonzero(I[:, m])) for m in xrange(I.shape[1])]
+    cols = [(m, rows, I[rows, m]) for m, rows in cols if len(rows)]
+    values = np.ones((I.shape[0], X.shape[0]))
+    for start in xrange(0, X.shape[0], chunk_size):
+        stop = min(start + chunk_size, X.shape[0])
+        block = values[:, start:stop]
+        for m, rows, degs in cols:
+            V = families[m].vandermonde(degs.max(), X[start:stop, m])
+            block[rows] *= V[degs]
+    return values
@@ -2,16 +2,38 @@
 
 Note that the interfaces and classes in this module are still very
 immature, and will probably change.
+
+Gauss rules for the measure of a family of orthogonal polynomials are
+computed from the recurrence coefficients by the Golub-Welsch algorithm,
+i.e. from the eigenvalues and eigenvectors of the symmetric tridiagonal
+Jacobi matrix. The weights are normalised to sum to one (the measure of
+the polynomial families in spuq is a probability measure). Computed
+rules are kept in a process wide cache.
 """
 from abc import ABCMeta, abstractmethod
 
+import numpy
 from numpy import array, ndarray, zeros, ones, diag, arange, sqrt
 from numpy import linalg as la
 
+from spuq.utils.lru_cache import LRUCache
+
+try:
+    from scipy.linalg import eigh_tridiagonal
+except ImportError:  # scipy < 1.0
+    eigh_tridiagonal = None
+
+__all__ = ["QuadRule1d", "QuadRuleGauss", "jacobi_matrix", "gauss_rule",
+           "gauss_radau_rule", "gauss_lobatto_rule"]
+
+# rules by (family, kind, number of points, prescribed nodes)
+_rule_cache = LRUCache(max_entries=1000)
+
+
 class QuadRule1d(object):
     """Abstract base class for 1d quadrature rules on [0,1]"""
     __metaclass__ = ABCMeta
-    
+
     @abstractmethod
     def getPointsWeights(self, np):
         return NotImplemented
@@ -23,12 +45,91 @@ class QuadRule1d(object):
 
 class QuadRuleGauss(QuadRule1d):
     """Gauss quadrature rule"""
-    
+
     def getPointsWeights(self, np):
-        g = arange(1,10)/sqrt(4.*arange(1,10)**2-ones(9))
-        p,V = la.eig(diag(g,k=1) + diag(g,k=-1))
-        w = 2*V[0,:]**2
-        # transform to [0,1]
-        p = .5 * p + .5
-        w = .5 * w
-        return p, w
+        from spuq.polyquad.polynomials import shared_family, LegendrePolynomials
+        return gauss_rule(shared_family(LegendrePolynomials, 0.0, 1.0, normalised=False), np)
+
+
+def jacobi_matrix(family, n):
+    """Return diagonal and subdiagonal of the symmetric Jacobi matrix of
+    order n for the polynomial family."""
+    rc = family._rc_array(n)
+    a, b, c = rc[:, 0], rc[:, 1], rc[:, 2]
+    # x p_k = (p_{k+1} - a_k p_k + c_k p_{k-1}) / b_k, symmetrised
+    return -a / b, sqrt(c[1:] / (b[:-1] * b[1:]))
+
+
+def _eig_tridiagonal(d, e):
+    if eigh_tridiagonal is not None:
+        return eigh_tridiagonal(d, e)
+    return la.eigh(diag(d) + diag(e, 1) + diag(e, -1))
+
+
+def _rule_from_jacobi(d, e):
+    x, V = _eig_tridiagonal(d, e)
+    w = V[0] ** 2
+    w /= w.sum()
+    x.flags.writeable = False
+    w.flags.writeable = False
+    return x, w
+
+
+def _solve_shifted(d, e, shift):
+    """Solve (J - shift I) y = e_last for the Jacobi matrix J given by d and e."""
+    n = len(d)
+    J = diag(d - shift) + diag(e, 1) + diag(e, -1)
+    rhs = zeros(n)
+    rhs[-1] = 1
+    return la.solve(J, rhs)
+
+
+def _cached_rule(family, kind, n, nodes, create):
+    key = (family, kind, n, nodes)
+    rule = _rule_cache.get(key)
+    if rule is None:
+        rule = create()
+        _rule_cache[key] = rule
+    return rule
+
+
+def gauss_rule(family, n):
+    """Return points and weights of the n point Gauss rule for the
+    measure of the polynomial family (exact up to degree 2n-1).
+
+    The returned arrays are shared and hence read only."""
+    assert n >= 1
+
+    def create():
+        return _rule_from_jacobi(*jacobi_matrix(family, n))
+    return _cached_rule(family, "gauss", n, (), create)
+
+
+def gauss_radau_rule(family, n, r):
+    """Return points and weights of the n point Gauss-Radau rule with the
+    prescribed node r at an end of the support (exact up to degree 2n-2)."""
+    assert n >= 2
+
+    def create():
+        d, e = jacobi_matrix(family, n)
+        delta = _solve_shifted(d[:-1], e[:-1], r)
+        d[-1] = r + e[-1] ** 2 * delta[-1]
+        return _rule_from_jacobi(d, e)
+    return _cached_rule(family, "radau", n, (float(r),), create)
+
+
+def gauss_lobatto_rule(family, n, l, r):
+    """Return points and weights of the n point Gauss-Lobatto rule with the
+    prescribed nodes l < r at the ends of the support (exact up to degree 2n-3)."""
+    assert n >= 2
+
+    def create():
+        d, e = jacobi_matrix(family, n)
+        g = _solve_shifted(d[:-1], e[:-1], l)[-1]
+        h = _solve_shifted(d[:-1], e[:-1], r)[-1]
+        # d_n - e_n^2 g = l and d_n - e_n^2 h = r
+        e2 = (r - l) / (g - h)
+        d[-1] = l + e2 * g
+        e[-1] = sqrt(e2)
+        return _rule_from_jacobi(d, e)
+    return _cached_rule(family, "lobatto", n, (float(l), float(r)), create)
@@ -1,7 +1,54 @@
+"""Smolyak sparse grid and tensor quadrature for random variables.
+
+The sparse grids are built from nested one dimensional rules for the
+measure of each random variable:
+
+* "cc": Clenshaw-Curtis nodes (bounded random variables only) with
+  1, 3, 5, 9, 17, ... points,
+* "patterson": Gauss-Patterson type rules with 1, 3, 7, 15, ... points,
+  where each level adds the Stieltjes extension of the previous nodes
+  (for the uniform distribution these are the Gauss-Kronrod-Patterson
+  rules),
+* "leja": weighted Leja sequences with one point per level.
+
+The weights of each level are the interpolatory weights of its nodes.
+Since the rules are nested, every node of a level is identified by its
+index in the sequence of the finest level. Sparse grid points are
+therefore identified by integer tuples, and the duplicates produced by
+the combination technique are merged exactly.
+
+The index set of the combination technique is the (anisotropic) set of
+levels with :math:`\\sum_k \\gamma_k l_k \\le L`. The combination
+coefficients are computed for all levels at once, and the points and
+weights of all tensor rules are generated with vectorized mixed radix
+indexing.
+"""
+
+import numpy as np
+from numpy import linalg as la
+
+from spuq.utils.lru_cache import LRUCache
+from spuq.math_utils.multiindex_set import MultiindexSet
+from spuq.polyquad.quad_1d import gauss_rule, jacobi_matrix
+
 __author__ = 'ezander'
 
+__all__ = ["generic_integrate", "nested_rule", "nested_size", "smolyak_rule",
+           "smolyak_integrate", "tensor_rule", "tensor_integrate"]
+
+# nested node sequences and rules by (polynomial family, kind, level)
+_nested_cache = LRUCache(max_entries=1000)
+
 
-def generic_integrate(func, points, weights):
+def generic_integrate(func, points, weights, vectorized=False):
+    """Return the sum of ``w * func(x)`` over the points and weights.
+
+    If ``vectorized`` is True, func is called once with the array of all
+    points (one point per row) and has to return the values along the
+    first axis."""
+    if vectorized:
+        values = np.asarray(func(points))
+        return np.tensordot(weights, values, axes=(0, 0))
     sum = None
     for x, w in zip(points, weights):
         val = w * func(x)
@@ -9,22 +56,231 @@ def generic_integrate(func, points, weights):
             sum = val
         else:
             sum += val
-    return val
+    return sum
+
+
+def nested_size(kind, level):
+    """Return the number of nodes of the nested rule of given kind and level."""
+    if kind == "cc":
+        return 1 if level == 0 else 2 ** level + 1
+    elif kind == "patterson":
+        return 2 ** (level + 1) - 1
+    elif kind == "leja":
+        return level + 1
+    raise ValueError("unknown rule kind %s" % kind)
+
+
+def _support(rv):
+    return float(rv.invcdf(0.0)), float(rv.invcdf(1.0))
+
+
+def _orthonormal_vandermonde(family, n, x):
+    V = family.vandermonde(n, x)
+    return V / family.norm(np.arange(n + 1))[:, np.newaxis]
+
+
+def _cc_nodes(rv, level):
+    a, b = _support(rv)
+    if not (np.isfinite(a) and np.isfinite(b)):
+        raise ValueError("Clenshaw-Curtis rules require bounded random variables")
+    # positions t in [0, 1] ordered by the level in which they appear
+    t = [0.5]
+    if level > 0:
+        t += [0.0, 1.0]
+    for l in xrange(2, level + 1):
+        t += list(np.arange(1, 2 ** l, 2) / float(2 ** l))
+    # cos(pi t) written as a sine to get the midpoint and ends exactly
+    return 0.5 * (a + b) - 0.5 * (b - a) * np.sin(np.pi * (np.array(t) - 0.5))
+
+
+def _extension_nodes(family, nodes):
+    """Return the N + 1 roots of the polynomial of degree N + 1 which is
+    orthogonal to all polynomials of degree N multiplied by the node
+    polynomial of the N given nodes."""
+    N = len(nodes)
+    n = N + 1
+    xg, wg = gauss_rule(family, (3 * N + 2) // 2 + 1)
+    V = _orthonormal_vandermonde(family, n, xg)
+    omega = np.prod(xg[np.newaxis, :] - nodes[:, np.newaxis], axis=0)
+    Vw = V[:n] * (wg * omega)
+    c = la.solve(np.dot(Vw, V[:n].T), -np.dot(Vw, V[n]))
+    # roots of p_n + sum_k c_k p_k are the eigenvalues of the comrade matrix
+    d, e = jacobi_matrix(family, n + 1)
+    C = np.diag(d[:n]) + np.diag(e[:n - 1], 1) + np.diag(e[:n - 1], -1)
+    C[n - 1] -= e[n - 1] * c
+    x = la.eigvals(C)
+    if np.abs(x.imag).max() > 1e-8 * max(1.0, np.abs(x.real).max()):
+        raise ValueError("Patterson extension with real nodes does not exist for this measure")
+    return np.sort(x.real)
+
 
-def smolyak_rule(rvs, order):
-    weights = [1]
-    points = [0] * len(rvs)
+def _patterson_nodes(rv, level):
+    family = rv.orth_polys
+    if level == 0:
+        return np.array(gauss_rule(family, 1)[0])
+    nodes = _nested_nodes(rv, "patterson", level - 1)
+    return np.concatenate((nodes, _extension_nodes(family, nodes)))
+
+
+def _leja_nodes(rv, level):
+    if level > 0:
+        nodes = _nested_nodes(rv, "leja", level - 1)
+    else:
+        nodes = np.array([float(rv.invcdf(0.5))])
+        return nodes
+    a, b = _support(rv)
+    u = np.linspace(0, 1, 4001)
+    if not np.isfinite(a):
+        u = u[1:]
+    if not np.isfinite(b):
+        u = u[:-1]
+    cand = rv.invcdf(u)
+    # weighted Leja objective, the square root of the density keeps the
+    # points of unbounded random variables in the bulk of the distribution
+    obj = np.sqrt(rv.pdf(cand)) * np.prod(np.abs(cand[np.newaxis, :] - nodes[:, np.newaxis]), axis=0)
+    return np.append(nodes, cand[np.argmax(obj)])
+
+
+def _nested_nodes(rv, kind, level):
+    key = (rv.orth_polys, kind, level, "nodes")
+    nodes = _nested_cache.get(key)
+    if nodes is None:
+        create = {"cc": _cc_nodes, "patterson": _patterson_nodes, "leja": _leja_nodes}
+        if kind not in create:
+            raise ValueError("unknown rule kind %s" % kind)
+        nodes = create[kind](rv, level)
+        nodes.flags.writeable = False
+        _nested_cache[key] = nodes
+    return nodes
+
+
+def nested_rule(rv, kind, level):
+    """Return the nodes and (interpolatory) weights of the nested rule of
+    given kind and level for the distribution of the random variable.
+
+    The nodes of a level are the leading nodes of all higher levels."""
+    family = rv.orth_polys
+    key = (family, kind, level, "rule")
+    rule = _nested_cache.get(key)
+    if rule is None:
+        x = _nested_nodes(rv, kind, level)
+        V = _orthonormal_vandermonde(family, len(x) - 1, x)
+        rhs = np.zeros(len(x))
+        rhs[0] = 1
+        w = la.solve(V, rhs)
+        w.flags.writeable = False
+        rule = (x, w)
+        _nested_cache[key] = rule
+    return rule
+
+
+def _combination_coefficients(I, gamma, order):
+    """Return the coefficients of the combination technique for the levels I.
+
+    For the set of levels with sum_k gamma_k l_k <= order, the coefficient
+    of l is the signed number of subsets z of the dimensions with
+    l + z in the set, i.e. with gamma(z) <= order - gamma(l). The 0/1 rows
+    of I are exactly these subsets for l = 0."""
+    cost = np.dot(I, gamma)
+    Z = (I <= 1).all(axis=1)
+    zcost = cost[Z]
+    zsign = 1 - 2 * (I[Z].sum(axis=1) % 2)
+    perm = np.argsort(zcost, kind="mergesort")
+    zcost, csum = zcost[perm], np.cumsum(zsign[perm])
+    bound = order * (1 + 1e-12) - cost
+    return csum[np.searchsorted(zcost, bound, side="right") - 1]
+
+
+def smolyak_rule(rvs, order, kind="cc", level_weights=None):
+    """Return points (one per row) and weights of the Smolyak sparse grid
+    of level ``order`` for the random variables ``rvs``.
+
+    ``level_weights`` (default all 1) give the anisotropic index set of
+    levels with :math:`\\sum_k \\gamma_k l_k \\le` order; larger weights
+    result in fewer levels in the respective dimension."""
+    d = len(rvs)
+    if d == 0:
+        return np.zeros((1, 0)), np.ones(1)
+    gamma = np.ones(d) if level_weights is None else np.asarray(level_weights, dtype=float)
+    I = MultiindexSet.createWeightedAnisoSet(gamma, order).arr
+    coeffs = _combination_coefficients(I, gamma, order)
+    active = np.flatnonzero(coeffs)
+    I, coeffs = I[active], coeffs[active]
+
+    # one dimensional rules up to the maximum level of each dimension
+    maxlevel = I.max(axis=0)
+    sizes = np.array([nested_size(kind, l) for l in xrange(maxlevel.max() + 1)])
+    rules = [[nested_rule(rv, kind, l) for l in xrange(maxlevel[k] + 1)] for k, rv in enumerate(rvs)]
+
+    # mixed radix decomposition of the point numbers of all tensor rules,
+    # the rows of the points of level l are starts[l]:starts[l] + counts[l]
+    n = np.asfortranarray(sizes[I])
+    counts = np.prod(n, axis=1)
+    starts = np.cumsum(counts) - counts
+    strides = np.ones_like(n)
+    strides[:, :-1] = np.cumprod(n[:, :0:-1], axis=1)[:, ::-1]
+
+    def node_ids(k, rows, l):
+        return ((rows - starts[l]) // strides[l, k]) % n[l, k]
+
+    # the node ids of a point are encoded into one integer key, which is
+    # replaced by its rank whenever the next dimension might overflow it;
+    # only the points of levels with l_k > 0 have a node id other than 0
+    key = np.zeros(counts.sum(), dtype=np.int64)
+    keymax = 1
+    weights = np.repeat(coeffs.astype(float), counts)
+    for k in xrange(d):
+        size = int(sizes[maxlevel[k]])
+        if size == 1:
+            continue
+        if keymax * size >= 2 ** 62:
+            key = np.unique(key, return_inverse=True)[1].astype(np.int64)
+            keymax = int(key.max()) + 1
+        key *= size
+        keymax *= size
+        active = np.flatnonzero(I[:, k])
+        l = np.repeat(active, counts[active])
+        rows = np.arange(len(l)) + np.repeat(starts[active] - np.cumsum(counts[active]) + counts[active], counts[active])
+        ids = node_ids(k, rows, l)
+        W = np.zeros((len(rules[k]), size))
+        for j, (_, w) in enumerate(rules[k]):
+            W[j, :len(w)] = w
+        weights[rows] *= W[I[l, k], ids]
+        key[rows] += ids
+
+    # merge duplicate points
+    _, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+    weights = np.bincount(inverse, weights)
+    keep = np.abs(weights) > 1e-14 * np.abs(weights).max()
+    first, weights = first[keep], weights[keep]
+    l = np.searchsorted(starts, first, side="right") - 1
+    points = np.empty((len(first), d))
+    for k in xrange(d):
+        points[:, k] = rules[k][-1][0][node_ids(k, first, l)]
     return points, weights
 
-def smolyak_integrate(func, rvs, order):
-    points, weights = smolyak_rule(rvs, order)
-    return generic_integrate(func, points, weights)
 
-def tensor_rule(rvs, order):
-    weights = [1]
-    points = [0] * len(rvs)
+def smolyak_integrate(func, rvs, order, kind="cc", level_weights=None, vectorized=False):
+    points, weights = smolyak_rule(rvs, order, kind, level_weights)
+    return generic_integrate(func, points, weights, vectorized)
+
+
+def tensor_rule(rvs, order, kind="gauss"):
+    """Return points and weights of the tensor product of the one
+    dimensional rules of level ``order`` (Gauss rules with order + 1
+    points for kind "gauss")."""
+    if kind == "gauss":
+        rules = [gauss_rule(rv.orth_polys, order + 1) for rv in rvs]
+    else:
+        rules = [nested_rule(rv, kind, order) for rv in rvs]
+    if not rules:
+        return np.zeros((1, 0)), np.ones(1)
+    ids = np.indices([len(x) for x, _ in rules]).reshape(len(rules), -1)
+    points = np.column_stack([x[i] for (x, _), i in zip(rules, ids)])
+    weights = np.prod([w[i] for (_, w), i in zip(rules, ids)], axis=0)
     return points, weights
 
-def tensor_integrate(func, rvs, order):
-    points, weights = tensor_rule(rvs, order)
-    return generic_integrate(func, points, weights)
\ No newline at end of file
+
+def tensor_integrate(func, rvs, order, kind="gauss", vectorized=False):
+    points, weights = tensor_rule(rvs, order, kind)
+    return generic_integrate(func, points, weights, vectorized)
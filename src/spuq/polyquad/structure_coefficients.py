@@ -8,34 +8,70 @@ from spuq.linalg.scipy_operator import ScipyOperator
 from spuq.linalg.basis import CanonicalBasis
 
 
+def _row_groups(A, B):
+    """Return ids of the rows of A and B such that equal rows have equal ids."""
+    C = np.ascontiguousarray(np.vstack((A, B)), dtype=np.int64)
+    view = C.view(np.dtype((np.void, C.dtype.itemsize * C.shape[1]))).ravel()
+    ids = np.unique(view, return_inverse=True)[1]
+    return ids[:len(A)], ids[len(A):]
+
+
+def _join(ga, va, gb, vb, delta):
+    """Return the pairs (i, j) with ga[i] == gb[j] and va[i] == vb[j] + delta."""
+    base = int(max(va.max(), vb.max())) + 3
+    ka = ga * base + (va - delta + 1)
+    kb = gb * base + (vb + 1)
+    order = np.argsort(kb, kind="mergesort")
+    kb = kb[order]
+    pos = np.minimum(np.searchsorted(kb, ka), len(kb) - 1)
+    found = kb[pos] == ka
+    return np.flatnonzero(found), order[pos[found]]
+
+
 def evaluate_triples(polysys, I_a, I_b):
+    """Return the operators L_0, ..., L_K with (L_0)_ij = 1 for equal
+    multiindices and (L_k)_ij = beta_delta(mu_j[k]) if the multiindices
+    mu_i in I_a and mu_j in I_b only differ by delta = mu_i[k] - mu_j[k]
+    in {-1, 0, 1} in component k (zero entries are omitted).
+
+    Rows which agree up to component k are joined by their ids, so the
+    cost is O(K |I| log |I|) instead of comparing all pairs."""
     # get dimensions
     M = I_a.shape[0]
     N = I_b.shape[0]
     K = I_a.shape[1]
-    
+
     if not isinstance(polysys, collections.Sequence):
         polysys = [polysys] * K
-    # prepare sparse matrices
-    L = [sps.dok_matrix((M, N)) for _ in range(-1,K)]
-    for k in range(-1, K):
-        for i, mui in enumerate(I_a):
-            for j, muj in enumerate(I_b):
-                # compare indices
-                cmp_ij = mui == muj
-                # test for equality except kth component
-                if np.all(cmp_ij[:k]) and np.all(cmp_ij[k+1:]):
-                    ak, bk = mui[k], muj[k]
-                    delta = ak - bk
-                    if -1 <= delta <= 1:
-                        if k != -1:
-                            beta = polysys[k].get_beta(bk)
-                            val = beta[delta]
-                        else:
-                            val = 1
-                    
-                        if val <> 0.0:
-                            L[k+1][i, j] = val
-    # convert to efficient sparse format
-    L = [ScipyOperator(l.asformat('csr'), domain=CanonicalBasis(N), codomain=CanonicalBasis(M)) for l in L]
+    I_a = np.asarray(I_a, dtype=np.int64)
+    I_b = np.asarray(I_b, dtype=np.int64)
+
+    if M == 0 or N == 0:
+        L = [sps.csr_matrix((M, N)) for _ in range(K + 1)]
+        return [ScipyOperator(l, domain=CanonicalBasis(N), codomain=CanonicalBasis(M)) for l in L]
+
+    ga, gb = _row_groups(I_a, I_b)
+    i, j = _join(ga, np.zeros(M, dtype=np.int64), gb, np.zeros(N, dtype=np.int64), 0)
+    L = [sps.csr_matrix((np.ones(len(i)), (i, j)), shape=(M, N))]
+    for k in range(K):
+        # groups of the multiindices with component k removed
+        A, B = I_a.copy(), I_b.copy()
+        A[:, k] = 0
+        B[:, k] = 0
+        ga, gb = _row_groups(A, B)
+        va, vb = I_a[:, k], I_b[:, k]
+        maxdeg = int(max(va.max(), vb.max())) + 1
+        beta = np.array([polysys[k].get_beta(n) for n in range(maxdeg + 1)], dtype=float)
+        rows, cols, vals = [], [], []
+        for delta in (-1, 0, 1):
+            i, j = _join(ga, va, gb, vb, delta)
+            # beta[:, delta] are the coefficients of p_{n+delta} in x p_n
+            val = beta[vb[j], delta % 3]
+            nz = val != 0.0
+            rows.append(i[nz])
+            cols.append(j[nz])
+            vals.append(val[nz])
+        L.append(sps.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))), shape=(M, N)))
+    # wrap sparse matrices as operators
+    L = [ScipyOperator(l, domain=CanonicalBasis(N), codomain=CanonicalBasis(M)) for l in L]
     return L
@@ -241,4 +241,25 @@ def test_eval_forsythe():
 
 
 
+def test_eval_matrix():
+    rc = rc_legendre
+    x = np.linspace(-1, 1, 5)
+    C = np.array([[3, 1, 0], [5, 0, 2], [7, 1, 1], [9, 0, 0]], dtype=float)
+    p = compute_poly(rc, 4, x)
+    for ev in [eval_clenshaw, eval_forsythe]:
+        values = ev(rc, C, x)
+        assert_equal(values.shape, (3, 5))
+        for k in range(3):
+            assert_array_almost_equal(values[k], inner(p, C[:, k]))
+        assert_equal(ev(rc, C[:1], x).shape, (3, 5))
+
+
+def test_vandermonde_from_rc():
+    x = np.linspace(-1, 1, 5)
+    rc = np.array([rc_legendre(k) for k in range(4)])
+    out = np.empty((5, 5))
+    vandermonde_from_rc(rc, x, out)
+    assert_array_almost_equal(out, compute_poly(rc_legendre, 4, x))
+
+
 test_main()
@@ -1,3 +1,4 @@
+import os
 import math
 import numpy as np
 
@@ -223,4 +224,109 @@ def test_beta():
     do_test(p, 0)
 
 
+def test_array_coefficients():
+    for p in [LegendrePolynomials(), JacobiPolynomials(alpha=0.5, beta=1, a= -2, b=3),
+              StochasticHermitePolynomials(normalised=False)]:
+        n = np.array([0, 3, 1, 40, 3])
+        rc = p.recurrence_coefficients(n)
+        beta = p.get_beta(n)
+        for i, k in enumerate(n):
+            assert_array_almost_equal([r[i] for r in rc], p.recurrence_coefficients(int(k)))
+            assert_array_almost_equal([b[i] for b in beta], p.get_beta(int(k)))
+        assert_is_instance(p.get_beta(2)[0], float)
+        assert_equal(p.get_beta(np.zeros((2, 3), dtype=int))[0].shape, (2, 3))
+    p = LegendrePolynomials(normalised=False)
+    assert_array_almost_equal(p.norm(np.array([0, 2, 5])), [p.norm(0), p.norm(2), p.norm(5)])
+    assert_array_almost_equal(LegendrePolynomials().norm(np.array([1, 3])), [1, 1])
+
+
+def test_shared_family():
+    p = shared_family(LegendrePolynomials, 0, 2, normalised=True)
+    assert_true(p is shared_family(LegendrePolynomials, 0, 2, normalised=True))
+    assert_false(p is shared_family(LegendrePolynomials, 0, 3, normalised=True))
+    assert_true(p.normalised)
+
+
+def test_vandermonde():
+    x = np.linspace(-1, 1, 5)
+    for p in [LegendrePolynomials(), StochasticHermitePolynomials(normalised=False),
+              JacobiPolynomials(alpha=0.5, beta=1, a= -2, b=3)]:
+        V = p.vandermonde(4, x)
+        assert_equal(V.shape, (5, 5))
+        for n in range(5):
+            assert_array_almost_equal(V[n], p.eval(n, x))
+        assert_array_almost_equal(p.vandermonde(0, x), np.ones((1, 5)))
+        # in place and for point arrays of any shape
+        out = np.empty((4, 5))
+        assert_true(p.eval(3, x, all_degrees=True, out=out) is out)
+        assert_array_almost_equal(out, V[:4])
+        assert_equal(p.vandermonde(2, x.reshape(1, 5)).shape, (3, 1, 5))
+        assert_is_instance(p.eval(2, 0.3), float)
+
+
+def test_vandermonde_deriv():
+    p = LegendrePolynomials(normalised=False)
+    x = np.linspace(-1, 1, 7)
+    for d in range(3):
+        V = p.vandermonde(4, x, deriv=d)
+        for n in range(5):
+            assert_array_almost_equal(V[n], p[n].deriv(d)(x) if d else p[n](x))
+
+
+def test_eval_expansion():
+    p = JacobiPolynomials(alpha=0.5, beta=1)
+    x = np.linspace(-1, 1, 6)
+    C = np.random.rand(4, 3)
+    values = p.eval_expansion(C, x)
+    assert_equal(values.shape, (3, 6))
+    assert_array_almost_equal(values, np.dot(C.T, p.vandermonde(3, x)))
+    assert_array_almost_equal(p.eval_expansion(C[:, 1], x), values[1])
+
+
+def test_eval_product_basis():
+    p = LegendrePolynomials()
+    q = StochasticHermitePolynomials(normalised=False)
+    I = np.array([[0, 0], [1, 0], [2, 3], [0, 1]])
+    X = np.random.uniform(-1, 1, (10, 2))
+    values = eval_product_basis([p, q], I, X, chunk_size=4)
+    assert_equal(values.shape, (4, 10))
+    for i, (a, b) in enumerate(I):
+        assert_array_almost_equal(values[i], p.eval(a, X[:, 0]) * q.eval(b, X[:, 1]))
+
+
+def test_structure_coefficients():
+    for p in [LegendrePolynomials(), JacobiPolynomials(1.5, 0.5, normalised=False),
+              StochasticHermitePolynomials(mu=0.5, normalised=False)]:
+        S = p.get_structure_coefficients(5)
+        for a, b, c in [(0, 0, 0), (1, 2, 3), (2, 2, 1), (3, 4, 2), (1, 1, 4)]:
+            assert_almost_equal(S[c, b, a], p.get_structure_coefficient(a, b, c))
+        assert_true(p.get_structure_coefficients(4) is not S)
+        assert_array_equal(p.get_structure_coefficients(4), S[:4, :4, :4])
+
+
+def test_triple_products():
+    import shutil
+    import tempfile
+    H = StochasticHermitePolynomials(normalised=False)
+    T = H.get_triple_products(3)
+    # grown incrementally, E[He_2 He_3 He_3] = 2! 3! 3! / (2! 1! 1!)
+    T = H.get_triple_products(7)
+    assert_almost_equal(T[2, 3, 3], 36)
+    assert_almost_equal(T[3, 2, 3], 36)
+    assert_equal(T[1, 1, 3], 0)
+    assert_array_almost_equal(T, T.transpose(1, 2, 0))
+    cache_dir = tempfile.mkdtemp()
+    try:
+        T = StochasticHermitePolynomials(normalised=False).get_triple_products(6, cache_dir=cache_dir)
+        H2 = StochasticHermitePolynomials(normalised=False)
+        assert_array_equal(H2.get_triple_products(4, cache_dir=cache_dir), T[:4, :4, :4])
+        assert_equal(len(H2._triples), 6)
+        # other families use other files
+        L = LegendrePolynomials()
+        assert_almost_equal(L.get_triple_products(3, cache_dir=cache_dir)[1, 1, 2], 2 / math.sqrt(5))
+        assert_equal(len(os.listdir(cache_dir)), 2)
+    finally:
+        shutil.rmtree(cache_dir)
+
+
 test_main()
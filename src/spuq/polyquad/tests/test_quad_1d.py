@@ -1,5 +1,8 @@
+import numpy as np
+
 from spuq.utils.testing import *
 from spuq.polyquad.quad_1d import *
+from spuq.polyquad.polynomials import *
 
 class TestQuadRuleGauss(TestCase):
 
@@ -7,3 +10,49 @@ class TestQuadRuleGauss(TestCase):
         p,w = QuadRuleGauss().getPointsWeights(10)
         #print p,w
         assert_almost_equal(sum(w), 1)
+        assert_equal(len(p), 10)
+        assert_true(((p > 0) & (p < 1)).all())
+        # exact for polynomials up to degree 19
+        assert_almost_equal(np.dot(w, p ** 19), 1.0 / 20)
+
+    def test_gauss_rule(self):
+        L = LegendrePolynomials()
+        x, w = gauss_rule(L, 3)
+        assert_array_almost_equal(x, [-np.sqrt(0.6), 0, np.sqrt(0.6)])
+        assert_array_almost_equal(w, [5. / 18, 8. / 18, 5. / 18])
+        # rules are cached and read only
+        assert_true(gauss_rule(L, 3)[0] is x)
+        assert_false(x.flags.writeable)
+        # moments of the standard normal distribution
+        x, w = gauss_rule(StochasticHermitePolynomials(normalised=False), 5)
+        assert_almost_equal(np.dot(w, x ** 4), 3)
+        assert_almost_equal(np.dot(w, x ** 9), 0)
+        # orthonormality of Jacobi polynomials
+        J = JacobiPolynomials(alpha=0.5, beta=1.5)
+        x, w = gauss_rule(J, 6)
+        V = J.vandermonde(5, x)
+        assert_array_almost_equal(np.dot(V * w, V.T), np.eye(6))
+
+    def test_radau_lobatto(self):
+        L = LegendrePolynomials()
+        x, w = gauss_lobatto_rule(L, 3, -1, 1)
+        assert_array_almost_equal(x, [-1, 0, 1])
+        assert_array_almost_equal(w, [1. / 6, 2. / 3, 1. / 6])
+        x, w = gauss_lobatto_rule(L, 5, -1, 1)
+        assert_almost_equal(np.dot(w, x ** 6), 1.0 / 7)
+        x, w = gauss_radau_rule(L, 2, -1)
+        assert_array_almost_equal(x, [-1, 1. / 3])
+        assert_array_almost_equal(w, [0.25, 0.75])
+        x, w = gauss_radau_rule(L, 4, 1)
+        assert_almost_equal(x[-1], 1)
+        assert_almost_equal(np.dot(w, x ** 6), 1.0 / 7)
+
+    def test_structure_coefficient(self):
+        L = LegendrePolynomials()
+        x = np.linspace(-1, 1, 7)
+        # p_1 * p_2 = sum_c S(1, 2, c) p_c
+        S = [L.get_structure_coefficient(1, 2, c) for c in range(4)]
+        assert_array_almost_equal(sum(S[c] * L.eval(c, x) for c in range(4)), L.eval(1, x) * L.eval(2, x))
+
+
+test_main()
@@ -1,4 +1,83 @@
+import numpy as np
+
+from spuq.utils.testing import *
+from spuq.polyquad.smolyak import *
+from spuq.stochastics.random_variable import UniformRV, BetaRV
+
 __author__ = 'ezander'
 
 
+def test_generic_integrate():
+    points = np.array([[0.0], [1.0], [2.0]])
+    weights = np.array([0.25, 0.5, 0.25])
+    assert_almost_equal(generic_integrate(lambda x: x[0] ** 2, points, weights), 1.5)
+    assert_almost_equal(generic_integrate(lambda X: X[:, 0] ** 2, points, weights, vectorized=True), 1.5)
+
+
+def test_nested_rule():
+    U = UniformRV()
+    for kind in ["cc", "patterson", "leja"]:
+        for level in range(4):
+            x, w = nested_rule(U, kind, level)
+            assert_equal(len(x), nested_size(kind, level))
+            assert_almost_equal(sum(w), 1)
+            if level > 0:
+                # nodes of lower levels come first
+                assert_array_equal(x[:nested_size(kind, level - 1)], nested_rule(U, kind, level - 1)[0])
+    # Gauss-Kronrod rule with 7 points is exact up to degree 10
+    x, w = nested_rule(U, "patterson", 2)
+    assert_almost_equal(np.dot(w, x ** 10), 1.0 / 11)
+    x, w = nested_rule(U, "cc", 1)
+    assert_array_almost_equal(np.sort(x), [-1, 0, 1])
+    assert_array_almost_equal(w[np.argsort(x)], [1. / 6, 2. / 3, 1. / 6])
+    # non-symmetric measure
+    B = BetaRV(alpha=2, beta=3)
+    x, w = nested_rule(B, "patterson", 2)
+    assert_almost_equal(np.dot(w, x ** 5), B.integrate(lambda t: t ** 5, n=4), decimal=4)
+
+
+def test_smolyak_rule():
+    U = UniformRV()
+    x, w = smolyak_rule([U, U], 1)
+    assert_equal(len(w), 5)
+    assert_almost_equal(w[np.all(x == 0, axis=1)][0], 1. / 3)
+    # known numbers of points of Clenshaw-Curtis sparse grids
+    assert_equal(len(smolyak_rule([U, U], 3)[1]), 29)
+    assert_equal(len(smolyak_rule([U] * 10, 4)[1]), 8801)
+    for kind in ["cc", "patterson"]:
+        x, w = smolyak_rule([U] * 4, 4, kind)
+        assert_almost_equal(sum(w), 1)
+        assert_almost_equal(np.dot(w, np.prod(x ** 2, axis=1)), 3.0 ** -4)
+
+
+def test_smolyak_anisotropic():
+    U = UniformRV()
+    x, w = smolyak_rule([U] * 3, 4, level_weights=[1, 2, 5])
+    assert_almost_equal(sum(w), 1)
+    # no levels in the last dimension, levels up to 2 in the second
+    assert_array_equal(np.unique(x[:, 2]), [0])
+    assert_equal(len(np.unique(x[:, 1])), 5)
+    assert_equal(len(np.unique(x[:, 0])), 17)
+
+
+def test_smolyak_integrate():
+    U = UniformRV()
+    f = lambda X: np.exp(X.sum(axis=1))
+    for kind in ["cc", "patterson"]:
+        assert_almost_equal(smolyak_integrate(f, [U] * 3, 6, kind, vectorized=True), np.sinh(1) ** 3, decimal=5)
+    assert_almost_equal(smolyak_integrate(f, [U] * 3, 8, "leja", vectorized=True), np.sinh(1) ** 3, decimal=4)
+    assert_almost_equal(smolyak_integrate(lambda x: np.exp(sum(x)), [U] * 2, 5, "patterson"), np.sinh(1) ** 2)
+
+
+def test_tensor_rule():
+    U = UniformRV()
+    B = BetaRV(alpha=2, beta=3)
+    x, w = tensor_rule([U, U, B], 2)
+    assert_equal(x.shape, (27, 3))
+    assert_almost_equal(sum(w), 1)
+    assert_almost_equal(tensor_integrate(lambda X: X[:, 0] ** 4 * X[:, 1] ** 2, [U, U], 2, vectorized=True), 1. / 15)
+    x, w = tensor_rule([U, U], 2, "cc")
+    assert_equal(len(w), 25)
+
 
+test_main()
@@ -0,0 +1,47 @@
+import numpy as np
+
+from spuq.utils.testing import *
+from spuq.polyquad.structure_coefficients import evaluate_triples
+from spuq.polyquad.polynomials import LegendrePolynomials, JacobiPolynomials
+from spuq.math_utils.multiindex_set import MultiindexSet
+
+
+def _evaluate_triples_loop(polysys, I_a, I_b):
+    K = I_a.shape[1]
+    L = [np.zeros((len(I_a), len(I_b))) for _ in range(K + 1)]
+    for i, mui in enumerate(I_a):
+        for j, muj in enumerate(I_b):
+            diff = np.flatnonzero(mui != muj)
+            if len(diff) == 0:
+                L[0][i, j] = 1
+                for k in range(K):
+                    L[k + 1][i, j] = polysys[k].get_beta(muj[k])[0]
+            elif len(diff) == 1 and abs(mui[diff[0]] - muj[diff[0]]) == 1:
+                k = diff[0]
+                L[k + 1][i, j] = polysys[k].get_beta(muj[k])[mui[k] - muj[k]]
+    return L
+
+
+def test_evaluate_triples():
+    I = MultiindexSet.createCompleteOrderSet(3, 3).arr
+    J = MultiindexSet.createCompleteOrderSet(3, 2).arr
+    polysys = [LegendrePolynomials(), JacobiPolynomials(1.0, 2.0), LegendrePolynomials(normalised=False)]
+    for I_a, I_b in [(I, I), (I, J), (J, I)]:
+        L = evaluate_triples(polysys, I_a, I_b)
+        L_ex = _evaluate_triples_loop(polysys, I_a, I_b)
+        assert_equal(len(L), 4)
+        for l, l_ex in zip(L, L_ex):
+            assert_equal(l.matrix.format, "csr")
+            assert_array_almost_equal(l.matrix.toarray(), l_ex)
+    # symmetric family, same index set
+    L = evaluate_triples(LegendrePolynomials(), I, I)
+    assert_array_equal(L[0].matrix.toarray(), np.eye(len(I)))
+    assert_equal(L[1].matrix.nnz, 2 * 10)
+    # empty index sets give zero operators
+    L = evaluate_triples(polysys, I[:0], J)
+    assert_equal(len(L), 4)
+    assert_equal(L[1].matrix.shape, (0, len(J)))
+    assert_equal(L[3].matrix.nnz, 0)
+
+
+test_main()
@@ -4,6 +4,7 @@ import scipy.stats
 import scipy.integrate
 
 import spuq.polyquad.polynomials as polys
+from spuq.polyquad.quad_1d import gauss_rule
 from spuq.utils import strclass
     
 class RandomVariable(object):
@@ -60,9 +61,18 @@ class RandomVariable(object):
         """Sample from the distribution"""
         return NotImplemented
 
-    def integrate(self, func):
+    def integrate(self, func, n=None):
         """Integrate the given function over the measure induced by
-        this random variable."""
+        this random variable.
+
+        If the number of points ``n`` is given, the Gauss rule for the
+        orthogonal polynomials of this random variable is used, which is
+        exact for polynomials up to degree 2n-1. Otherwise adaptive
+        quadrature is used."""
+        if n is not None:
+            x, w = gauss_rule(self.orth_polys, n)
+            return float(sum(wi * func(xi) for xi, wi in zip(x, w)))
+
         def trans_func(x):
             return func(self.invcdf(x))
         return scipy.integrate.quad(trans_func, 0, 1, epsabs=1e-5)[0]
@@ -150,9 +160,8 @@ class NormalRV(ScipyRandomVariable):
 
     @property
     def orth_polys(self):
-        return polys.StochasticHermitePolynomials(self.mu,
-                                                  self.sigma,
-                                                  normalised=True)
+        return polys.shared_family(polys.StochasticHermitePolynomials, self.mu,
+                                   self.sigma, normalised=True)
 
     def __repr__(self):
         return ("<%s mu=%s sigma=%s>" %
@@ -179,7 +188,7 @@ class UniformRV(ScipyRandomVariable):
 
     @property
     def orth_polys(self):
-        return polys.LegendrePolynomials(self.a, self.b, normalised=True)
+        return polys.shared_family(polys.LegendrePolynomials, self.a, self.b, normalised=True)
 
     def __repr__(self):
         return ("<%s a=%s b=%s>" %
@@ -212,8 +221,8 @@ class BetaRV(ScipyRandomVariable):
     def orth_polys(self):
         # Note: the meaning of alpha and beta in the standard formulation of the Beta distribution and 
         # of the Jacobi polynomials is shifted by 1 and reversed in the meaning
-        return polys.JacobiPolynomials(alpha=self.beta - 1, beta=self.alpha - 1,
-                                       a=self.a, b=self.b, normalised=True)
+        return polys.shared_family(polys.JacobiPolynomials, alpha=self.beta - 1, beta=self.alpha - 1,
+                                   a=self.a, b=self.b, normalised=True)
 
     def __repr__(self):
         return ("<%s alpha=%s beta=%s a=%s b=%s>" %
@@ -238,7 +247,7 @@ class SemicircularRV(ScipyRandomVariable):
 
     @property
     def orth_polys(self):
-        return polys.ChebyshevU(a=self.a, b=self.b, normalised=True)
+        return polys.shared_family(polys.ChebyshevU, a=self.a, b=self.b, normalised=True)
         #return polys.JacobiPolynomials(alpha=0.5, beta=0.5, 
         #                               a=self.a, b=self.b, normalised=True)
 
@@ -265,7 +274,7 @@ class ArcsineRV(ScipyRandomVariable):
 
     @property
     def orth_polys(self):
-        return polys.ChebyshevT(a=self.a, b=self.b, normalised=True)
+        return polys.shared_family(polys.ChebyshevT, a=self.a, b=self.b, normalised=True)
         #return polys.JacobiPolynomials(alpha=-0.5, beta=-0.5, 
         #                               a=self.a, b=self.b, normalised=True)
 
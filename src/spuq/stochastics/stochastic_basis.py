@@ -34,9 +34,7 @@ class MultiindexBasis(StochasticBasis):
         for i, rv in enumerate(self.rvs):
             theta = rv.sample(n)
             Phi = rv.getOrthogonalPolynomials()
-            Q = np.zeros((self.I.p + 1, n))
-            for q in xrange(self.I.p + 1):
-                Q[q, :] = Phi.eval(q, theta)
+            Q = Phi.vandermonde(self.I.p, theta)
             S = S * Q[self.I.arr[:, i], :]
         return S
 
@@ -88,7 +86,4 @@ class GPCBasis(StochasticBasis):
         p = self._p
         theta = rv.sample(n)
         Phi = rv.orth_polys
-        Q = np.zeros((p + 1, n))
-        for q in xrange(p + 1):
-            Q[q, :] = Phi.eval(q, theta)
-        return Q
+        return Phi.vandermonde(p, theta)
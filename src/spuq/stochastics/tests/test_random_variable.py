@@ -49,6 +49,11 @@ def _test_rv_coherence(rv):
     assert_almost_equal(rv.integrate(p[1] * p[1]), 1, **kwargs)
     assert_almost_equal(rv.integrate(p[5] * p[5]), 1, **kwargs)
 
+    # the Gauss rule of the orthogonal polynomials is exact for polynomials
+    assert_almost_equal(rv.integrate(x ** 4, n=3) - 3, rv.kurtosis)
+    assert_almost_equal(rv.integrate(p[2] * p[3], n=3), 0, **kwargs)
+    assert_almost_equal(rv.integrate(p[5] * p[5], n=6), 1, **kwargs)
+
 
 class TestUniformRV(TestCase):
 
@@ -0,0 +1,111 @@
+"""LRUCache is a dictionary-like cache that evicts the least recently
+used entries when either the number of entries or the memory held by
+the entries exceeds a given budget.
+
+The memory of an entry is determined by the ``sizeof`` function given
+on construction (which defaults to ``nbytes_of``).
+
+>>> import numpy as np
+>>> c = LRUCache(max_nbytes=2000)
+>>> c["a"] = np.zeros(100)
+>>> c["b"] = np.zeros(100)
+>>> c["a"] is not None
+True
+>>> c["c"] = np.zeros(100)
+>>> sorted(c.keys())
+['a', 'c']
+>>> c.nbytes
+1600
+"""
+
+from collections import OrderedDict
+
+
+def nbytes_of(value):
+    """Return the number of bytes of arrays, sparse matrices or tuples thereof."""
+    if isinstance(value, (tuple, list)):
+        return sum(nbytes_of(v) for v in value)
+    if hasattr(value, "nbytes"):
+        return value.nbytes
+    if hasattr(value, "indptr"):
+        return value.data.nbytes + value.indices.nbytes + value.indptr.nbytes
+    if hasattr(value, "data") and hasattr(value, "row"):
+        return value.data.nbytes + value.row.nbytes + value.col.nbytes
+    return 0
+
+
+class LRUCache(object):
+    def __init__(self, max_nbytes=None, max_entries=None, sizeof=nbytes_of):
+        self.max_nbytes = max_nbytes
+        self.max_entries = max_entries
+        self._sizeof = sizeof
+        self._items = OrderedDict()
+        self._sizes = {}
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __getitem__(self, key):
+        value = self._items.pop(key)
+        # reinsert to mark as most recently used
+        self._items[key] = value
+        return value
+
+    def get(self, key, default=None):
+        try:
+            value = self[key]
+            self.hits += 1
+            return value
+        except KeyError:
+            self.misses += 1
+            return default
+
+    def __setitem__(self, key, value):
+        if key in self._items:
+            self.pop(key)
+        size = self._sizeof(value)
+        self._items[key] = value
+        self._sizes[key] = size
+        self.nbytes += size
+        self._evict()
+
+    def pop(self, key):
+        value = self._items.pop(key)
+        self.nbytes -= self._sizes.pop(key)
+        return value
+
+    def _evict(self):
+        # never evict the most recently inserted entry
+        while len(self._items) > 1 and (
+                (self.max_entries is not None and len(self._items) > self.max_entries) or
+                (self.max_nbytes is not None and self.nbytes > self.max_nbytes)):
+            key = next(iter(self._items))
+            self.pop(key)
+
+    def clear(self):
+        self._items.clear()
+        self._sizes.clear()
+        self.nbytes = 0
+
+    def keys(self):
+        return self._items.keys()
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses,
+                "entries": len(self), "nbytes": self.nbytes}
+
+    def __repr__(self):
+        return "<LRUCache entries=%i nbytes=%i hits=%i misses=%i>" % \
+               (len(self), self.nbytes, self.hits, self.misses)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,65 @@
+"""Process parallel map for tasks whose data cannot (or should not) be pickled.
+
+`fork_map` applies a function to a list of arguments in a pool of
+forked worker processes. The function, and all data it refers to (e.g.
+meshes, FEniCS functions or coefficient fields), is inherited by the
+workers when they are forked, so only the arguments and the results are
+pickled and sent between the processes.
+
+>>> data = dict(a=1, b=2)
+>>> fork_map(lambda k: data[k] * 10, ["a", "b", "a"], processes=2)
+[10, 20, 10]
+"""
+
+import os
+import multiprocessing
+
+__all__ = ["fork_map", "cpu_count"]
+
+# function evaluated by the workers, set before the pool is forked
+_task = None
+
+
+def _run_task(arg):
+    return _task(arg)
+
+
+def cpu_count():
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:  # pragma: no cover
+        return 1
+
+
+def fork_map(func, args, processes=1):
+    """Return ``[func(arg) for arg in args]`` evaluated by ``processes``
+    worker processes (all available cores if None).
+
+    The order of the results corresponds to the order of args. Falls
+    back to serial evaluation for a single process or if fork is not
+    available."""
+    global _task
+    args = list(args)
+    if processes is None:
+        processes = cpu_count()
+    processes = min(processes, len(args))
+    if processes <= 1 or not hasattr(os, "fork"):
+        return map(func, args)
+    if _task is not None:
+        raise RuntimeError("fork_map cannot be nested")
+    _task = func
+    try:
+        pool = multiprocessing.Pool(processes)
+        try:
+            # one argument per chunk for load balancing of expensive tasks
+            return pool.map(_run_task, args, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    finally:
+        _task = None
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,50 @@
+import numpy as np
+import scipy.sparse as sps
+
+from spuq.utils.testing import *
+from spuq.utils.lru_cache import LRUCache, nbytes_of
+
+
+def test_nbytes_of():
+    assert_equal(nbytes_of(np.zeros(10)), 80)
+    A = sps.csr_matrix(np.eye(4))
+    assert_equal(nbytes_of(A), A.data.nbytes + A.indices.nbytes + A.indptr.nbytes)
+    assert_equal(nbytes_of((np.zeros(10), np.zeros(5))), 120)
+    assert_equal(nbytes_of(None), 0)
+
+
+def test_max_entries():
+    c = LRUCache(max_entries=2)
+    c[1] = np.zeros(1)
+    c[2] = np.zeros(1)
+    c[1]
+    c[3] = np.zeros(1)
+    assert_equal(sorted(c.keys()), [1, 3])
+
+
+def test_max_nbytes():
+    c = LRUCache(max_nbytes=100)
+    c[1] = np.zeros(5)
+    c[2] = np.zeros(5)
+    assert_equal(c.nbytes, 80)
+    c[3] = np.zeros(5)
+    assert_equal(sorted(c.keys()), [2, 3])
+    assert_equal(c.nbytes, 80)
+    # an entry exceeding the budget is kept until the next insertion
+    c[4] = np.zeros(50)
+    assert_equal(c.keys(), [4])
+
+
+def test_get_stats():
+    c = LRUCache()
+    assert_is_none(c.get("a"))
+    c["a"] = np.zeros(3)
+    assert_equal(c.get("a").shape, (3,))
+    assert_equal(c.stats["hits"], 1)
+    assert_equal(c.stats["misses"], 1)
+    c.pop("a")
+    assert_equal(c.nbytes, 0)
+    assert_equal(len(c), 0)
+
+
+test_main()
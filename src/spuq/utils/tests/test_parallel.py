@@ -0,0 +1,26 @@
+import os
+import numpy as np
+
+from spuq.utils.testing import *
+from spuq.utils.parallel import fork_map
+
+
+def test_fork_map():
+    # unpicklable closure over local data
+    data = dict((i, np.arange(i)) for i in range(10))
+    res = fork_map(lambda i: data[i].sum(), range(10), processes=3)
+    assert_equal(res, [data[i].sum() for i in range(10)])
+
+
+def test_fork_map_workers():
+    pids = fork_map(lambda i: os.getpid(), range(4), processes=2)
+    assert_true(os.getpid() not in pids)
+    pids = fork_map(lambda i: os.getpid(), range(4), processes=1)
+    assert_equal(pids, 4 * [os.getpid()])
+
+
+def test_fork_map_empty():
+    assert_equal(fork_map(lambda i: i, [], processes=4), [])
+
+
+test_main()
@@ -29,16 +29,6 @@ def evaluate_Hermite_triple(I_a, I_b, I_c):
 
 
 def compute_Hermite_triples(p):
-    from scipy.misc import factorial
-    # http://stackoverflow.com/questions/1827489/numpy-meshgrid-in-3d
-    K, J, I = np.mgrid[:p + 1, :p + 1, :p + 1]
-    S = I + J + K
-    S2 = S / 2
-    ind = np.logical_and(np.logical_and(np.mod(S, 2) == 0, I <= J + K), np.logical_and(J <= J + I, K <= I + J))
-#    ind=mod(S,2)==0 & I<=J+K & J<=K+I & K<=I+J;
-
-    M = np.zeros_like(S)
-    fac = factorial(np.array(range(p + 1))).astype('int32')
-    S2ind = S2[ind].astype('int32') 
-    M[ind] = fac[I[ind]] * fac[J[ind]] * fac[K[ind]] / (fac[S2ind - I[ind]] * fac[S2ind - J[ind]] * fac[S2ind - K[ind]])
-    return M
+    from spuq.polyquad.polynomials import shared_family, StochasticHermitePolynomials
+    H = shared_family(StochasticHermitePolynomials, normalised=False)
+    return H.get_triple_products(p + 1)
@@ -65,6 +65,15 @@ def rank_truncate(R_max):
     return do_truncate
 
 
+def tol_round(tol, R_max=None):
+    """Create a truncation function that rounds by relative tolerance"""
+
+    def do_round(X):
+        return X.round(tol, R_max)
+
+    return do_round
+
+
 def test_solve_pcg(A, P, u, f, **kwargs):
     """Solve the linear problem with given solution and show solve statistics"""
     [u2, _, numiter] = pcg.pcg(A, f, P, 0 * u, **kwargs)
@@ -95,3 +104,4 @@ logger.setLevel(logging.INFO)
 eps = 0.3
 test_solve_pcg(A, P, u_flat, A * u_flat, eps=eps)
 test_solve_pcg(A, P, u, A * u, truncate_func=rank_truncate(10), eps=eps)
+test_solve_pcg(A, P, u, A * u, truncate_func=tol_round(1e-8), eps=eps)
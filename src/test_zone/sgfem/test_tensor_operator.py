@@ -88,7 +88,7 @@ print "u as matrix shape", u.as_matrix().shape, u.flatten().as_array().shape
 w = A * u
 
 # print matricisation of tensor operator
-M = A.as_matrix()
+M = A.as_matrix().toarray()
 print M.shape, norm(M)
 
 # plot mesh
@@ -32,7 +32,7 @@ for M in [1,2,5]:
     A = TensorOperator(K, D)
     u = FullTensor.from_list(u)
     # print matricisation of tensor operator
-    Amat = A.as_matrix()
+    Amat = A.as_matrix().toarray()
     print Amat.shape
 
     # compare with numpy kronecker product